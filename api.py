@@ -0,0 +1,303 @@
+"""
+API HTTP JSON du modèle de coûts, pour les outils internes et le CRM
+
+Usage:
+    python api.py                                  # http://127.0.0.1:8600, 1 worker
+    python api.py --hote 0.0.0.0 --port 8600 --workers 4
+    python api.py --catalogue data/referentiels.json
+
+Points d'accès (GET avec paramètres d'URL ou POST avec un corps JSON):
+    /applicabilite     secteur, infrastructure
+    /economies         economies
+    /recommandations   secteur, infrastructure, budget, economies
+    /penalites         ca_annuel, cout_conformite
+    /sante             version du catalogue et statistiques du cache
+
+Les listes s'écrivent en paramètres répétés (?economies=a&economies=b)
+ou séparées par ';', comme en mode lot. Un secteur ou un budget hors des
+valeurs connues (utils.session.SECTEURS, BUDGET_LIMITES) donne un 400.
+Chaque réponse est mise en cache par processus sous l'empreinte
+canonique de (point d'accès, paramètres normalisés, version du
+catalogue), qui sert aussi d'ETag: un client qui renvoie If-None-Match
+reçoit un 304 sans recalcul ni corps. Chaque worker uvicorn charge son
+catalogue (instantané binaire partagé s'il est compilé) et suit ses
+rechargements à chaud.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from utils import metriques
+from utils.cache import CacheLRU, cle_canonique
+from utils.calculations import (
+    BUDGET_LIMITES,
+    calculer_economies,
+    calculer_penalites,
+    calculer_recommandations_en_cache,
+    filtrer_referentiels_applicables
+)
+from utils.catalogue import GestionnaireCatalogue
+from utils.session import SECTEURS
+
+HOTE = '127.0.0.1'
+PORT = 8600
+SEPARATEUR_LISTES = ';'
+TAILLE_CACHE = int(os.environ.get('CONFORMITE_API_CACHE', '65536'))
+
+# Catalogue servi: transmis aux workers par l'environnement
+VARIABLE_CATALOGUE = 'CONFORMITE_API_CATALOGUE'
+
+# Corps JSON des réponses, par empreinte de requête (un cache par worker)
+CACHE_REPONSES = CacheLRU(taille_max=TAILLE_CACHE, ttl=None)
+
+ENTETES_CACHE = {'Cache-Control': 'no-cache'}  # toujours revalider (ETag)
+
+_gestionnaire = None
+
+
+class RequeteInvalide(ValueError):
+    """Paramètres absents ou mal formés (réponse 400)"""
+
+
+def _liste(valeur, champ):
+    if valeur is None:
+        return []
+    if isinstance(valeur, str):
+        valeur = [valeur]
+    if not isinstance(valeur, list) or not all(isinstance(v, str) for v in valeur):
+        raise RequeteInvalide(f"'{champ}' doit être une liste de chaînes")
+    # Ordre et doublons indifférents: une seule entrée de cache par ensemble
+    return sorted({v.strip() for texte in valeur for v in texte.split(SEPARATEUR_LISTES) if v.strip()})
+
+
+def _texte(valeur, champ, requis=False):
+    if valeur is None or valeur == '':
+        if requis:
+            raise RequeteInvalide(f"Paramètre '{champ}' requis")
+        return ''
+    if not isinstance(valeur, str):
+        raise RequeteInvalide(f"'{champ}' doit être une chaîne")
+    return valeur
+
+
+def _choix(valeur, champ, choix):
+    """Texte optionnel limité à des valeurs connues (chaque valeur inconnue ferait sa propre entrée de cache)"""
+    valeur = _texte(valeur, champ)
+    if valeur and valeur not in choix:
+        raise RequeteInvalide(f"'{champ}' doit valoir {', '.join(choix)}")
+    return valeur
+
+
+def _montant(valeur, champ, requis=False):
+    if valeur is None or valeur == '':
+        if requis:
+            raise RequeteInvalide(f"Paramètre '{champ}' requis")
+        return 0
+    if isinstance(valeur, str):
+        try:
+            valeur = float(valeur)
+        except ValueError:
+            raise RequeteInvalide(f"'{champ}' doit être un nombre") from None
+    if isinstance(valeur, bool) or not isinstance(valeur, (int, float)):
+        raise RequeteInvalide(f"'{champ}' doit être un nombre")
+    try:
+        nombre = float(valeur)  # OverflowError pour un entier JSON hors des flottants
+    except OverflowError:
+        nombre = math.inf
+    # inf ou NaN rendraient une réponse qui n'est pas du JSON valide
+    if not math.isfinite(nombre) or nombre < 0:
+        raise RequeteInvalide(f"'{champ}' doit être un nombre positif fini")
+    return int(valeur) if nombre.is_integer() else valeur
+
+
+def parametres_applicabilite(brut):
+    return {
+        'secteur': _choix(brut.get('secteur'), 'secteur', SECTEURS),
+        'infrastructure': _liste(brut.get('infrastructure'), 'infrastructure')
+    }
+
+
+def parametres_economies(brut):
+    return {'economies': _liste(brut.get('economies'), 'economies')}
+
+
+def parametres_recommandations(brut):
+    return {
+        **parametres_applicabilite(brut),
+        'budget': _choix(brut.get('budget'), 'budget', tuple(BUDGET_LIMITES)),
+        **parametres_economies(brut)
+    }
+
+
+def parametres_penalites(brut):
+    return {
+        'ca_annuel': _montant(brut.get('ca_annuel'), 'ca_annuel'),
+        'cout_conformite': _montant(brut.get('cout_conformite'), 'cout_conformite', requis=True)
+    }
+
+
+def calculer_applicabilite(catalogue, parametres):
+    obligatoires, optionnels = filtrer_referentiels_applicables(
+        catalogue.data['referentiels'], parametres, catalogue.index
+    )
+    return {
+        'obligatoires': [ref.en_dict() for ref in obligatoires],
+        'optionnels': [ref.en_dict() for ref in optionnels]
+    }
+
+
+def calculer_selection_economies(catalogue, parametres):
+    economies_data = catalogue.data['economies']
+    connues = [cle for cle in parametres['economies'] if cle in economies_data]
+    return {
+        'total': calculer_economies(connues, economies_data),
+        'economies': [{'cle': cle, **economies_data[cle]} for cle in connues],
+        'inconnues': [cle for cle in parametres['economies'] if cle not in economies_data]
+    }
+
+
+def calculer_recommandations(catalogue, parametres):
+    return calculer_recommandations_en_cache(
+        catalogue.data, parametres, parametres['economies'], catalogue.version, catalogue.index
+    ).en_dict()
+
+
+def calculer_penalites_api(catalogue, parametres):
+    return calculer_penalites(parametres['ca_annuel'], parametres['cout_conformite'])
+
+
+def _corps(calcul, catalogue, parametres):
+    resultat = {'version': catalogue.version, **calcul(catalogue, parametres)}
+    return json.dumps(resultat, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+
+
+def _correspond(if_none_match, etag):
+    """If-None-Match (liste d'ETags, faibles acceptés, ou *) désigne-t-il etag?"""
+    if not if_none_match:
+        return False
+    for candidat in if_none_match.split(','):
+        candidat = candidat.strip()
+        if candidat == '*' or candidat.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def _erreur(statut, message):
+    corps = json.dumps({'erreur': message}, ensure_ascii=False).encode('utf-8')
+    return Response(corps, status_code=statut, media_type='application/json')
+
+
+async def _parametres_bruts(requete):
+    if requete.method == 'POST':
+        try:
+            brut = await requete.json()
+        except ValueError as e:
+            raise RequeteInvalide(f"JSON invalide: {e}") from None
+        if not isinstance(brut, dict):
+            raise RequeteInvalide("Le corps doit être un objet JSON")
+        return brut
+    return {
+        cle: valeurs[0] if len(valeurs) == 1 else valeurs
+        for cle in requete.query_params
+        for valeurs in (requete.query_params.getlist(cle),)
+    }
+
+
+def point_d_acces(nom, normaliser, calcul):
+    """
+    Gestionnaire asynchrone d'un point d'accès (cache, ETag, erreurs 400)
+
+    Args:
+        nom: Nom du point d'accès (clé de cache, métriques)
+        normaliser: Paramètres bruts -> paramètres canoniques (RequeteInvalide)
+        calcul: (instantané, paramètres) -> dict sérialisable
+    """
+    async def traiter(requete):
+        debut = time.perf_counter()
+        try:
+            parametres = normaliser(await _parametres_bruts(requete))
+        except RequeteInvalide as e:
+            return _erreur(400, str(e))
+
+        catalogue = _gestionnaire.instantane()
+        cle = cle_canonique(nom, parametres, catalogue.version)
+        etag = f'"{cle[:32]}"'
+        entetes = {'ETag': etag, **ENTETES_CACHE}
+        if _correspond(requete.headers.get('if-none-match'), etag):
+            reponse = Response(status_code=304, headers=entetes)
+        else:
+            # Calculs de quelques microsecondes: exécutés dans la boucle, sans thread
+            corps = CACHE_REPONSES.obtenir_ou_calculer(cle, _corps, calcul, catalogue, parametres)
+            reponse = Response(corps, media_type='application/json', headers=entetes)
+        metriques.observer('api_secondes', time.perf_counter() - debut, point=nom)
+        return reponse
+
+    return traiter
+
+
+async def sante(requete):
+    corps = json.dumps({
+        'version': _gestionnaire.instantane().version,
+        'erreur_catalogue': _gestionnaire.derniere_erreur,
+        'cache': CACHE_REPONSES.statistiques()
+    }, ensure_ascii=False).encode('utf-8')
+    return Response(corps, media_type='application/json')
+
+
+@asynccontextmanager
+async def cycle_de_vie(application):
+    global _gestionnaire
+    _gestionnaire = GestionnaireCatalogue(os.environ.get(VARIABLE_CATALOGUE) or None).demarrer()
+    yield
+    _gestionnaire.arreter()
+
+
+METHODES = ['GET', 'POST']
+
+application = Starlette(routes=[
+    Route('/applicabilite', point_d_acces('applicabilite', parametres_applicabilite, calculer_applicabilite),
+          methods=METHODES),
+    Route('/economies', point_d_acces('economies', parametres_economies, calculer_selection_economies),
+          methods=METHODES),
+    Route('/recommandations', point_d_acces('recommandations', parametres_recommandations, calculer_recommandations),
+          methods=METHODES),
+    Route('/penalites', point_d_acces('penalites', parametres_penalites, calculer_penalites_api),
+          methods=METHODES),
+    Route('/sante', sante),
+], lifespan=cycle_de_vie)
+
+
+def construire_parser():
+    parser = argparse.ArgumentParser(description="API HTTP JSON du modèle de coûts de conformité")
+    parser.add_argument('--hote', default=HOTE, help="Adresse d'écoute")
+    parser.add_argument('--port', type=int, default=PORT, help="Port d'écoute")
+    parser.add_argument('--workers', type=int, default=1, help="Nombre de processus serveurs")
+    parser.add_argument('--catalogue', default=None,
+                        help="Catalogue JSON (data/referentiels.json par défaut)")
+    return parser
+
+
+def main(argv=None):
+    import uvicorn
+
+    args = construire_parser().parse_args(argv)
+    if args.catalogue:
+        os.environ[VARIABLE_CATALOGUE] = os.path.abspath(args.catalogue)
+    uvicorn.run(
+        'api:application', host=args.hote, port=args.port, workers=args.workers,
+        log_level='warning', access_log=False
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
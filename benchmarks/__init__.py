@@ -0,0 +1,3 @@
+"""
+Mesures de performance (voir benchmarks/bench.py)
+"""
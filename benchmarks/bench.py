@@ -0,0 +1,276 @@
+"""
+Mesures de performance de la couche de calcul et de l'assistant
+
+Usage:
+    python -m benchmarks.bench executer
+    python -m benchmarks.bench executer --tailles 10 1000 --sans-assistant
+    python -m benchmarks.bench comparer --seuil 15
+
+Chaque exécution ajoute une ligne JSON à benchmarks/historique.jsonl;
+comparer confronte deux exécutions de l'historique (par défaut les deux
+dernières) et sort en erreur si une mesure régresse au-delà du seuil.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+from benchmarks.synthetique import catalogue_synthetique
+from utils.calculations import (
+    calculer_couts_referentiel,
+    calculer_economies,
+    construire_index_applicabilite,
+    filtrer_referentiels_applicables,
+    generer_recommandations
+)
+
+RACINE = Path(__file__).resolve().parent.parent
+HISTORIQUE = Path(__file__).resolve().parent / "historique.jsonl"
+APPLICATION = RACINE / "app.py"
+
+TAILLES = (10, 100, 1000, 10000)
+REPETITIONS = 5
+REPETITIONS_ASSISTANT = 5
+SEUIL_REGRESSION = 15.0
+
+PROFIL = {'secteur': 'health', 'taille': 'small', 'budget': 'medium', 'infrastructure': ['cloud']}
+
+
+def mesurer(fonction, repetitions=REPETITIONS):
+    """
+    Chronomètre un appel sans argument (timeit, nombre d'appels automatique)
+
+    Returns:
+        dict: median_us, min_us par appel et nombre total d'appels
+    """
+    minuteur = timeit.Timer(fonction)
+    nombre, _ = minuteur.autorange()
+    durees = [t / nombre for t in minuteur.repeat(repeat=repetitions, number=nombre)]
+    return {
+        'median_us': statistics.median(durees) * 1e6,
+        'min_us': min(durees) * 1e6,
+        'iterations': nombre * repetitions
+    }
+
+
+def mesurer_calculs(tailles=TAILLES, repetitions=REPETITIONS):
+    """Micro-mesures des fonctions de calcul sur des catalogues synthétiques"""
+    resultats = {}
+    for taille in tailles:
+        data = catalogue_synthetique(taille)
+        referentiels = data['referentiels']
+        economies = data['economies']
+        selection = list(economies)
+        total_economies = calculer_economies(selection, economies)
+        index = construire_index_applicabilite(referentiels)
+        obligatoires, optionnels = filtrer_referentiels_applicables(referentiels, PROFIL, index)
+
+        cas = {
+            'calculer_economies': lambda: calculer_economies(selection, economies),
+            'calculer_couts_referentiel': lambda: [
+                calculer_couts_referentiel(ref, total_economies) for ref in referentiels.values()
+            ],
+            'construire_index_applicabilite': lambda: construire_index_applicabilite(referentiels),
+            'filtrer_referentiels_applicables': lambda: filtrer_referentiels_applicables(
+                referentiels, PROFIL, index
+            ),
+            'generer_recommandations': lambda: generer_recommandations(
+                obligatoires, optionnels, total_economies, PROFIL['budget']
+            )
+        }
+        for nom, fonction in cas.items():
+            resultats[f"{nom}[{taille}]"] = mesurer(fonction, repetitions)
+            print(f"  {nom}[{taille}]: {resultats[f'{nom}[{taille}]']['median_us']:.1f} µs", file=sys.stderr)
+    return resultats
+
+
+def _chronometrer(durees, nom, action):
+    """Exécute action (un rerun AppTest) et ajoute sa durée à durees[nom]"""
+    debut = perf_counter()
+    at = action()
+    durees.setdefault(nom, []).append(perf_counter() - debut)
+    if at.exception:
+        raise RuntimeError(f"{nom}: {at.exception[0].message}")
+    return at
+
+
+def parcourir_assistant(durees):
+    """Parcourt les trois étapes de l'assistant en chronométrant chaque rerun"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APPLICATION), default_timeout=60)
+    _chronometrer(durees, 'etape1_chargement', at.run)
+    for position, valeur in enumerate((PROFIL['secteur'], PROFIL['taille'], PROFIL['budget'], 'initial')):
+        _chronometrer(durees, 'etape1_saisie', at.selectbox[position].select(valeur).run)
+    _chronometrer(durees, 'etape1_saisie', at.checkbox(key="infra_cloud").check().run)
+    _chronometrer(durees, 'etape1_vers_etape2', at.button[0].click().run)
+
+    for cle in ('chiffrement', 'surveillance'):
+        _chronometrer(durees, 'etape2_case', at.checkbox(key=f"eco_{cle}").check().run)
+    suivant = next(b for b in at.button if "recommandations" in b.label)
+    _chronometrer(durees, 'etape2_vers_etape3', suivant.click().run)
+
+    radio = at.radio[0]
+    _chronometrer(durees, 'etape3_fragment', radio.set_value(radio.options[-1]).run)
+
+
+def mesurer_assistant(repetitions=REPETITIONS_ASSISTANT):
+    """
+    Latence de bout en bout des reruns de chaque étape (AppTest, sans navigateur)
+
+    Le premier parcours remplit les caches partagés (st.cache_resource,
+    recommandations): la médiane reflète le régime établi.
+    """
+    durees = {}
+    for _ in range(repetitions):
+        parcourir_assistant(durees)
+
+    resultats = {}
+    for nom, valeurs in durees.items():
+        resultats[f"assistant.{nom}"] = {
+            'median_us': statistics.median(valeurs) * 1e6,
+            'min_us': min(valeurs) * 1e6,
+            'iterations': len(valeurs)
+        }
+        print(f"  assistant.{nom}: {statistics.median(valeurs) * 1000:.1f} ms", file=sys.stderr)
+    return resultats
+
+
+def _commit_courant():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RACINE,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executer(tailles=TAILLES, repetitions=REPETITIONS, assistant=True, etiquette=None, historique=HISTORIQUE):
+    """
+    Exécute la suite et ajoute le résultat à l'historique
+
+    Returns:
+        dict: Enregistrement de l'exécution
+    """
+    resultats = mesurer_calculs(tailles, repetitions)
+    if assistant:
+        resultats.update(mesurer_assistant())
+
+    execution = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'etiquette': etiquette,
+        'commit': _commit_courant(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'processeur': platform.processor() or platform.machine(),
+        'resultats': resultats
+    }
+    with open(historique, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(execution, ensure_ascii=False) + '\n')
+    return execution
+
+
+def charger_historique(historique=HISTORIQUE):
+    """Liste des exécutions enregistrées, de la plus ancienne à la plus récente"""
+    if not Path(historique).exists():
+        return []
+    with open(historique, 'r', encoding='utf-8') as f:
+        return [json.loads(ligne) for ligne in f if ligne.strip()]
+
+
+def comparer(reference, courante, seuil=SEUIL_REGRESSION, statistique='median_us'):
+    """
+    Compare deux exécutions mesure par mesure
+
+    Args:
+        reference: Exécution de référence
+        courante: Exécution à évaluer
+        seuil: Hausse relative (%) au-delà de laquelle une mesure régresse
+        statistique: 'median_us' ou 'min_us' (moins sensible au bruit de la machine)
+
+    Returns:
+        list: (mesure, valeur de référence, valeur courante, écart %, régression)
+    """
+    lignes = []
+    for nom, mesure in courante['resultats'].items():
+        if nom not in reference['resultats']:
+            continue
+        avant = reference['resultats'][nom][statistique]
+        apres = mesure[statistique]
+        ecart = (apres - avant) / avant * 100 if avant > 0 else 0.0
+        lignes.append((nom, avant, apres, ecart, ecart > seuil))
+    return lignes
+
+
+def _libelle(execution):
+    return f"{execution['date']} {execution.get('commit') or ''} {execution.get('etiquette') or ''}".strip()
+
+
+def construire_parser():
+    parser = argparse.ArgumentParser(description="Mesures de performance de l'assistant de conformité")
+    parser.add_argument('--historique', type=Path, default=HISTORIQUE,
+                        help="Fichier JSONL de l'historique des mesures")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+
+    execution = commandes.add_parser('executer', help="Exécuter la suite et l'ajouter à l'historique")
+    execution.add_argument('--tailles', type=int, nargs='+', default=list(TAILLES),
+                           help="Nombres de référentiels des catalogues synthétiques")
+    execution.add_argument('--repetitions', type=int, default=REPETITIONS,
+                           help="Répétitions de chaque micro-mesure")
+    execution.add_argument('--sans-assistant', action='store_true',
+                           help="Ne pas mesurer les reruns de l'assistant (AppTest)")
+    execution.add_argument('--etiquette', default=None, help="Libellé libre de l'exécution")
+
+    comparaison = commandes.add_parser('comparer', help="Comparer deux exécutions de l'historique")
+    comparaison.add_argument('--reference', type=int, default=-2,
+                             help="Position de l'exécution de référence (-2 = avant-dernière)")
+    comparaison.add_argument('--courante', type=int, default=-1,
+                             help="Position de l'exécution évaluée (-1 = dernière)")
+    comparaison.add_argument('--seuil', type=float, default=SEUIL_REGRESSION,
+                             help="Hausse (%%) signalée comme régression")
+    comparaison.add_argument('--statistique', choices=['median_us', 'min_us'], default='median_us',
+                             help="Statistique comparée (min_us est plus stable sur une machine partagée)")
+    return parser
+
+
+def main(argv=None):
+    args = construire_parser().parse_args(argv)
+
+    if args.commande == 'executer':
+        execution = executer(args.tailles, args.repetitions, not args.sans_assistant,
+                             args.etiquette, args.historique)
+        print(f"✅ {len(execution['resultats'])} mesures ajoutées à {args.historique}")
+        return 0
+
+    executions = charger_historique(args.historique)
+    try:
+        reference = executions[args.reference]
+        courante = executions[args.courante]
+    except IndexError:
+        print(f"⚠️ Historique insuffisant ({len(executions)} exécution(s))", file=sys.stderr)
+        return 2
+
+    lignes = comparer(reference, courante, args.seuil, args.statistique)
+    print(f"Référence: {_libelle(reference)}")
+    print(f"Courante:  {_libelle(courante)}")
+    for nom, avant, apres, ecart, regression in lignes:
+        marque = "⚠️" if regression else "  "
+        print(f"{marque} {nom:<45} {avant:>14.1f} µs {apres:>14.1f} µs {ecart:>+8.1f} %")
+
+    regressions = [ligne for ligne in lignes if ligne[4]]
+    if regressions:
+        print(f"⚠️ {len(regressions)} régression(s) au-delà de {args.seuil:g} %", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Test de charge: N sessions simultanées qui parcourent les trois étapes
+
+Usage:
+    python -m benchmarks.charge --sessions 8 --duree 60
+    python -m benchmarks.charge --sessions 4 --parcours 3 --reflexion 0 --sortie charge.json
+
+Chaque session simulée est un processus qui enchaîne des parcours complets
+(un nouveau prospect par parcours: profil, infrastructures et économies
+tirés au hasard, temps de réflexion exponentiels entre deux actions) avec
+AppTest, sans navigateur ni réseau. AppTest n'étant pas utilisable depuis
+plusieurs threads d'un même processus, les caches partagés (cache_resource,
+CacheLRU) le sont par session simulée et non par instance: le test mesure
+le coût des reruns sous contention CPU, caches chauds après le premier
+parcours de chaque processus.
+
+Le rapport donne le débit (parcours et reruns par seconde), les p50/p95/p99
+de latence des reruns par étape et l'évolution du CPU et de la mémoire
+résidente (RSS) de l'ensemble des sessions.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetique import profil_aleatoire
+from utils.catalogue import charger_catalogue
+
+RACINE = Path(__file__).resolve().parent.parent
+APPLICATION = RACINE / "app.py"
+
+SESSIONS = 4
+DUREE = 60.0
+REFLEXION_MOYENNE = 1.0  # secondes entre deux actions d'une session
+INTERVALLE_ECHANTILLON = 1.0
+PERCENTILES = (50, 95, 99)
+
+# Ordre d'affichage des latences
+ETAPES = ('chargement', 'etape1', 'etape1_vers_etape2', 'etape2', 'etape2_vers_etape3', 'etape3')
+
+
+def _reflechir(aleatoire, reflexion):
+    """Temps de réflexion exponentiel, borné à quatre fois la moyenne"""
+    if reflexion > 0:
+        time.sleep(min(aleatoire.expovariate(1 / reflexion), 4 * reflexion))
+
+
+def _agir(mesures, etape, action):
+    """Exécute un rerun AppTest et note sa durée sous l'étape donnée"""
+    debut = time.perf_counter()
+    at = action()
+    mesures.append((etape, time.perf_counter() - debut))
+    if at.exception:
+        raise RuntimeError(f"{etape}: {at.exception[0].message}")
+    return at
+
+
+def parcourir(aleatoire, economies_data, reflexion):
+    """
+    Un prospect parcourt l'assistant de l'étape 1 à l'étape 3
+
+    Returns:
+        list: (étape, durée en secondes) de chaque rerun
+    """
+    from streamlit.testing.v1 import AppTest
+
+    profil, economies = profil_aleatoire(aleatoire, economies_data)
+    mesures = []
+
+    at = AppTest.from_file(str(APPLICATION), default_timeout=60)
+    _agir(mesures, 'chargement', at.run)
+    for position, champ in enumerate(('secteur', 'taille', 'budget', 'maturite')):
+        _reflechir(aleatoire, reflexion)
+        _agir(mesures, 'etape1', at.selectbox[position].select(profil[champ]).run)
+    for infrastructure in profil['infrastructure']:
+        _reflechir(aleatoire, reflexion)
+        _agir(mesures, 'etape1', at.checkbox(key=f"infra_{infrastructure}").check().run)
+    _reflechir(aleatoire, reflexion)
+    _agir(mesures, 'etape1_vers_etape2', at.button[0].click().run)
+
+    for cle in economies:
+        _reflechir(aleatoire, reflexion)
+        _agir(mesures, 'etape2', at.checkbox(key=f"eco_{cle}").check().run)
+    _reflechir(aleatoire, reflexion)
+    suivant = next(b for b in at.button if "recommandations" in b.label)
+    _agir(mesures, 'etape2_vers_etape3', suivant.click().run)
+
+    # Consultation des approches (fragment), comme un prospect qui compare
+    radio = at.radio[0]
+    for option in aleatoire.sample(radio.options, 2):
+        _reflechir(aleatoire, reflexion)
+        _agir(mesures, 'etape3', radio.set_value(option).run)
+    return mesures
+
+
+def travailleur(numero, graine, reflexion, nb_parcours, depart, fin, resultats):
+    """
+    Processus d'une session simulée: enchaîne les parcours jusqu'à fin
+
+    Les mesures de chaque parcours sont envoyées sur la file resultats.
+    """
+    aleatoire = random.Random(graine * 1000 + numero)
+    economies_data = charger_catalogue()['economies']
+    depart.wait()
+    fait = 0
+    while time.time() < fin.value and (nb_parcours is None or fait < nb_parcours):
+        try:
+            resultats.put(('mesures', numero, parcourir(aleatoire, economies_data, reflexion)))
+        except Exception as e:
+            resultats.put(('erreur', numero, f"{type(e).__name__}: {e}"))
+        fait += 1
+    resultats.put(('fin', numero, None))
+
+
+def _ressources(pids):
+    """
+    CPU cumulé (secondes) et RSS (octets) des processus, lus dans /proc
+
+    Returns:
+        tuple: (cpu, rss); les processus terminés sont ignorés
+    """
+    tics = os.sysconf('SC_CLK_TCK')
+    page = os.sysconf('SC_PAGE_SIZE')
+    cpu = rss = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", 'r') as f:
+                champs = f.read().rsplit(')', 1)[1].split()
+            with open(f"/proc/{pid}/statm", 'r') as f:
+                rss += int(f.read().split()[1]) * page
+        except (OSError, IndexError):
+            continue
+        # utime et stime: champs 14 et 15 de stat (après le nom du processus)
+        cpu += (int(champs[11]) + int(champs[12])) / tics
+    return cpu, rss
+
+
+def echantillonner(pids, arret, serie, compteurs, intervalle=INTERVALLE_ECHANTILLON):
+    """Relève CPU (%) et RSS (Mo) des sessions toutes les intervalle secondes"""
+    debut = time.perf_counter()
+    cpu_avant, _ = _ressources(pids)
+    instant_avant = debut
+    while not arret.wait(intervalle):
+        maintenant = time.perf_counter()
+        cpu, rss = _ressources(pids)
+        point = {
+            't': round(maintenant - debut, 2),
+            'cpu_pct': round((cpu - cpu_avant) / (maintenant - instant_avant) * 100, 1),
+            'rss_mo': round(rss / 1024 / 1024, 1),
+            'parcours': compteurs['parcours'],
+            'reruns': compteurs['reruns']
+        }
+        serie.append(point)
+        print(f"  t={point['t']:>6.1f}s  cpu={point['cpu_pct']:>6.1f}%  rss={point['rss_mo']:>8.1f} Mo  "
+              f"parcours={point['parcours']}  reruns={point['reruns']}", file=sys.stderr)
+        cpu_avant, instant_avant = cpu, maintenant
+
+
+def resumer_latences(durees):
+    """
+    Returns:
+        dict: {etape: {nombre, p50_ms, p95_ms, p99_ms, max_ms}}
+    """
+    resume = {}
+    for etape in sorted(durees, key=lambda e: ETAPES.index(e) if e in ETAPES else len(ETAPES)):
+        valeurs = np.array(durees[etape]) * 1000
+        quantiles = np.percentile(valeurs, PERCENTILES)
+        resume[etape] = {'nombre': len(valeurs)}
+        resume[etape].update({f"p{p}_ms": round(float(q), 1) for p, q in zip(PERCENTILES, quantiles)})
+        resume[etape]['max_ms'] = round(float(valeurs.max()), 1)
+    return resume
+
+
+def executer_charge(sessions=SESSIONS, duree=DUREE, reflexion=REFLEXION_MOYENNE, nb_parcours=None, graine=0):
+    """
+    Lance les sessions simulées et agrège leurs mesures
+
+    Args:
+        sessions: Nombre de sessions simultanées (un processus chacune)
+        duree: Durée du test en secondes (les parcours en cours se terminent)
+        reflexion: Temps de réflexion moyen entre deux actions (0 pour saturer)
+        nb_parcours: Nombre maximal de parcours par session (None: illimité)
+        graine: Graine des tirages (profils, économies, temps de réflexion)
+
+    Returns:
+        dict: Paramètres, débit, latences par étape, erreurs et série CPU/RSS
+    """
+    contexte = multiprocessing.get_context('spawn')
+    resultats = contexte.Queue()
+    depart = contexte.Event()
+    fin = contexte.Value('d', 0.0)
+    processus = [
+        contexte.Process(target=travailleur, args=(i, graine, reflexion, nb_parcours, depart, fin, resultats),
+                         daemon=True)
+        for i in range(sessions)
+    ]
+    for p in processus:
+        p.start()
+
+    durees = {}
+    erreurs = []
+    compteurs = {'parcours': 0, 'reruns': 0}
+    serie = []
+    arret = threading.Event()
+    echantillonneur = threading.Thread(
+        target=echantillonner, args=([p.pid for p in processus], arret, serie, compteurs), daemon=True
+    )
+
+    debut = time.perf_counter()
+    fin.value = time.time() + duree
+    depart.set()
+    echantillonneur.start()
+
+    actifs = sessions
+    while actifs:
+        genre, _, contenu = resultats.get()
+        if genre == 'mesures':
+            for etape, valeur in contenu:
+                durees.setdefault(etape, []).append(valeur)
+            compteurs['parcours'] += 1
+            compteurs['reruns'] += len(contenu)
+        elif genre == 'erreur':
+            erreurs.append(contenu)
+        else:
+            actifs -= 1
+    ecoule = time.perf_counter() - debut
+
+    arret.set()
+    echantillonneur.join()
+    for p in processus:
+        p.join()
+
+    return {
+        'sessions': sessions,
+        'duree_s': round(ecoule, 2),
+        'reflexion_s': reflexion,
+        'parcours': compteurs['parcours'],
+        'reruns': compteurs['reruns'],
+        'parcours_par_s': round(compteurs['parcours'] / ecoule, 3),
+        'reruns_par_s': round(compteurs['reruns'] / ecoule, 2),
+        'latences': resumer_latences(durees),
+        'erreurs': erreurs,
+        'ressources': serie
+    }
+
+
+def afficher(rapport):
+    print(f"Sessions simultanées: {rapport['sessions']}  (réflexion moyenne {rapport['reflexion_s']:g} s)")
+    print(f"Durée: {rapport['duree_s']:.1f} s  •  {rapport['parcours']} parcours, {rapport['reruns']} reruns")
+    print(f"Débit: {rapport['parcours_par_s']:.2f} parcours/s  •  {rapport['reruns_par_s']:.1f} reruns/s")
+    print()
+    print(f"{'Étape':<22}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for etape, mesure in rapport['latences'].items():
+        print(f"{etape:<22}{mesure['nombre']:>7}{mesure['p50_ms']:>10.1f}{mesure['p95_ms']:>10.1f}"
+              f"{mesure['p99_ms']:>10.1f}{mesure['max_ms']:>10.1f}")
+
+    if rapport['ressources']:
+        cpu = [point['cpu_pct'] for point in rapport['ressources']]
+        rss = [point['rss_mo'] for point in rapport['ressources']]
+        print()
+        print(f"CPU: moyenne {sum(cpu) / len(cpu):.0f} %, pic {max(cpu):.0f} %  "
+              f"•  RSS: pic {max(rss):.0f} Mo, fin {rss[-1]:.0f} Mo")
+    if rapport['erreurs']:
+        print(f"\n⚠️ {len(rapport['erreurs'])} parcours en erreur, dont: {rapport['erreurs'][0]}")
+
+
+def construire_parser():
+    parser = argparse.ArgumentParser(description="Test de charge de l'assistant de conformité (AppTest)")
+    parser.add_argument('--sessions', type=int, default=SESSIONS, help="Sessions simultanées")
+    parser.add_argument('--duree', type=float, default=DUREE, help="Durée du test (secondes)")
+    parser.add_argument('--reflexion', type=float, default=REFLEXION_MOYENNE,
+                        help="Temps de réflexion moyen entre deux actions (secondes, 0 pour saturer)")
+    parser.add_argument('--parcours', type=int, default=None,
+                        help="Nombre maximal de parcours par session")
+    parser.add_argument('--graine', type=int, default=0, help="Graine des tirages")
+    parser.add_argument('--sortie', type=Path, default=None,
+                        help="Fichier JSON du rapport complet (avec la série CPU/RSS)")
+    return parser
+
+
+def main(argv=None):
+    args = construire_parser().parse_args(argv)
+    rapport = executer_charge(args.sessions, args.duree, args.reflexion, args.parcours, args.graine)
+    afficher(rapport)
+    if args.sortie:
+        args.sortie.write_text(json.dumps(rapport, ensure_ascii=False, indent=2), encoding='utf-8')
+    return 1 if rapport['erreurs'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
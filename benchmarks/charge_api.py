@@ -0,0 +1,257 @@
+"""
+Test de charge de l'API HTTP (api.py): requêtes par seconde et latences
+
+Usage:
+    python -m benchmarks.charge_api --serveur 2 --duree 20
+    python -m benchmarks.charge_api --port 8600 --connexions 64 --point recommandations --etag
+
+Le client est une boucle asyncio de connexions HTTP/1.1 persistantes
+(bibliothèque standard uniquement), chacune enchaînant ses requêtes sans
+temps de réflexion. Les requêtes sont tirées parmi --profils profils
+synthétiques distincts: peu de profils mesurent le cache de réponses
+chaud, beaucoup le coût du calcul. Avec --etag, le client renvoie l'ETag
+déjà reçu pour une URL (If-None-Match) et mesure le chemin 304.
+
+--serveur N lance lui-même api.py avec N workers sur --port et l'arrête
+à la fin; sinon le serveur doit déjà écouter. Sur une même machine, le
+client consomme lui aussi du CPU: le débit mesuré est un minimum.
+
+Le rapport donne le débit (requêtes/s), la répartition des statuts HTTP
+et les p50/p95/p99 de latence par point d'accès.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from urllib.parse import urlencode
+
+from benchmarks.charge import resumer_latences
+from benchmarks.synthetique import profil_aleatoire
+from utils.catalogue import charger_catalogue
+
+RACINE = Path(__file__).resolve().parent.parent
+SERVEUR = RACINE / "api.py"
+
+HOTE = '127.0.0.1'
+PORT = 8600
+CONNEXIONS = 32
+DUREE = 15.0
+PROFILS = 200
+DELAI_DEMARRAGE = 30.0  # secondes d'attente maximale du serveur lancé par --serveur
+
+POINTS = ('applicabilite', 'economies', 'recommandations', 'penalites')
+
+
+def _requete(point, profil, economies, aleatoire):
+    """Chemin et paramètres d'URL d'une requête vers un point d'accès"""
+    if point == 'applicabilite':
+        parametres = {'secteur': profil['secteur'], 'infrastructure': ';'.join(profil['infrastructure'])}
+    elif point == 'economies':
+        parametres = {'economies': ';'.join(economies)}
+    elif point == 'recommandations':
+        parametres = {
+            'secteur': profil['secteur'],
+            'infrastructure': ';'.join(profil['infrastructure']),
+            'budget': profil['budget'],
+            'economies': ';'.join(economies)
+        }
+    else:
+        parametres = {
+            'ca_annuel': aleatoire.choice((500_000, 2_000_000, 10_000_000, 50_000_000)),
+            'cout_conformite': aleatoire.choice((25_000, 80_000, 150_000))
+        }
+    return f"/{point}?{urlencode(parametres)}"
+
+
+def generer_requetes(points, nb_profils, graine=0):
+    """
+    Tire nb_profils requêtes distinctes, réparties entre les points d'accès
+
+    Returns:
+        list: [(point, chemin)]
+    """
+    aleatoire = random.Random(graine)
+    economies_data = charger_catalogue()['economies']
+    requetes = []
+    for numero in range(nb_profils):
+        point = points[numero % len(points)]
+        profil, economies = profil_aleatoire(aleatoire, economies_data)
+        requetes.append((point, _requete(point, profil, economies, aleatoire)))
+    return requetes
+
+
+async def _lire_reponse(lecteur):
+    """
+    Lit une réponse HTTP/1.1 (corps de longueur connue)
+
+    Returns:
+        tuple: (statut, en-têtes en minuscules)
+    """
+    entete = await lecteur.readuntil(b"\r\n\r\n")
+    lignes = entete.decode('latin-1').split("\r\n")
+    statut = int(lignes[0].split(' ', 2)[1])
+    entetes = {}
+    for ligne in lignes[1:]:
+        if ':' in ligne:
+            nom, valeur = ligne.split(':', 1)
+            entetes[nom.strip().lower()] = valeur.strip()
+    longueur = int(entetes.get('content-length', 0))
+    if longueur:
+        await lecteur.readexactly(longueur)
+    return statut, entetes
+
+
+async def connexion(hote, port, requetes, graine, fin, etag, durees, statuts, erreurs):
+    """Une connexion persistante qui enchaîne des requêtes jusqu'à fin"""
+    aleatoire = random.Random(graine)
+    etags = {}
+    try:
+        lecteur, ecrivain = await asyncio.open_connection(hote, port)
+    except OSError as e:
+        erreurs.append(f"{type(e).__name__}: {e}")
+        return
+    try:
+        while time.perf_counter() < fin:
+            point, chemin = aleatoire.choice(requetes)
+            entetes = f"GET {chemin} HTTP/1.1\r\nHost: {hote}\r\n"
+            if etag and chemin in etags:
+                entetes += f"If-None-Match: {etags[chemin]}\r\n"
+            debut = time.perf_counter()
+            ecrivain.write((entetes + "\r\n").encode('latin-1'))
+            statut, reponse = await _lire_reponse(lecteur)
+            durees.setdefault(point, []).append(time.perf_counter() - debut)
+            statuts[statut] = statuts.get(statut, 0) + 1
+            if 'etag' in reponse:
+                etags[chemin] = reponse['etag']
+    except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+        erreurs.append(f"{type(e).__name__}: {e}")
+    finally:
+        ecrivain.close()
+
+
+async def _charger(hote, port, requetes, connexions, duree, etag, graine):
+    durees, statuts, erreurs = {}, {}, []
+    fin = time.perf_counter() + duree
+    debut = time.perf_counter()
+    await asyncio.gather(*(
+        connexion(hote, port, requetes, graine * 1000 + numero, fin, etag, durees, statuts, erreurs)
+        for numero in range(connexions)
+    ))
+    return durees, statuts, erreurs, time.perf_counter() - debut
+
+
+def attendre_serveur(hote, port, delai=DELAI_DEMARRAGE):
+    """Attend que /sante réponde; lève TimeoutError au-delà de delai secondes"""
+    limite = time.monotonic() + delai
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://{hote}:{port}/sante", timeout=1) as reponse:
+                return json.loads(reponse.read())
+        except OSError:
+            if time.monotonic() > limite:
+                raise TimeoutError(f"Le serveur http://{hote}:{port} ne répond pas") from None
+            time.sleep(0.2)
+
+
+def executer_charge(hote=HOTE, port=PORT, connexions=CONNEXIONS, duree=DUREE, profils=PROFILS,
+                    points=POINTS, etag=False, graine=0):
+    """
+    Envoie des requêtes sans temps de réflexion pendant duree secondes
+
+    Args:
+        hote, port: Adresse du serveur
+        connexions: Connexions persistantes simultanées
+        duree: Durée du test en secondes
+        profils: Nombre de requêtes distinctes (taille du jeu de travail du cache)
+        points: Points d'accès sollicités, à parts égales
+        etag: Renvoyer les ETags reçus (If-None-Match)
+        graine: Graine des tirages
+
+    Returns:
+        dict: Paramètres, débit, statuts, latences par point d'accès et erreurs
+    """
+    requetes = generer_requetes(points, profils, graine)
+    sante = attendre_serveur(hote, port)
+    durees, statuts, erreurs, ecoule = asyncio.run(
+        _charger(hote, port, requetes, connexions, duree, etag, graine)
+    )
+    total = sum(statuts.values())
+    return {
+        'url': f"http://{hote}:{port}",
+        'version_catalogue': sante['version'],
+        'connexions': connexions,
+        'profils': profils,
+        'etag': etag,
+        'duree_s': round(ecoule, 2),
+        'requetes': total,
+        'requetes_par_s': round(total / ecoule, 1),
+        'statuts': {str(statut): nombre for statut, nombre in sorted(statuts.items())},
+        'latences': resumer_latences(durees),
+        'erreurs': erreurs
+    }
+
+
+def afficher(rapport):
+    print(f"{rapport['url']} (catalogue {rapport['version_catalogue']})  •  "
+          f"{rapport['connexions']} connexions, {rapport['profils']} requêtes distinctes"
+          f"{', If-None-Match' if rapport['etag'] else ''}")
+    print(f"Durée: {rapport['duree_s']:.1f} s  •  {rapport['requetes']} requêtes  •  "
+          f"Débit: {rapport['requetes_par_s']:.0f} requêtes/s")
+    print("Statuts: " + ", ".join(f"{statut}: {nombre}" for statut, nombre in rapport['statuts'].items()))
+    print()
+    print(f"{'Point':<22}{'n':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for point, mesure in rapport['latences'].items():
+        print(f"{point:<22}{mesure['nombre']:>9}{mesure['p50_ms']:>10.1f}{mesure['p95_ms']:>10.1f}"
+              f"{mesure['p99_ms']:>10.1f}{mesure['max_ms']:>10.1f}")
+    if rapport['erreurs']:
+        print(f"\n⚠️ {len(rapport['erreurs'])} connexions en erreur, dont: {rapport['erreurs'][0]}")
+
+
+def construire_parser():
+    parser = argparse.ArgumentParser(description="Test de charge de l'API HTTP du modèle de coûts")
+    parser.add_argument('--hote', default=HOTE, help="Adresse du serveur")
+    parser.add_argument('--port', type=int, default=PORT, help="Port du serveur")
+    parser.add_argument('--serveur', type=int, default=None, metavar='WORKERS',
+                        help="Lancer api.py avec ce nombre de workers pendant le test")
+    parser.add_argument('--connexions', type=int, default=CONNEXIONS, help="Connexions simultanées")
+    parser.add_argument('--duree', type=float, default=DUREE, help="Durée du test (secondes)")
+    parser.add_argument('--profils', type=int, default=PROFILS, help="Nombre de requêtes distinctes")
+    parser.add_argument('--point', choices=POINTS, action='append', default=None,
+                        help="Point d'accès sollicité (répétable; tous par défaut)")
+    parser.add_argument('--etag', action='store_true', help="Renvoyer les ETags reçus (If-None-Match)")
+    parser.add_argument('--graine', type=int, default=0, help="Graine des tirages")
+    parser.add_argument('--sortie', type=Path, default=None, help="Fichier JSON du rapport")
+    return parser
+
+
+def main(argv=None):
+    args = construire_parser().parse_args(argv)
+    serveur = None
+    if args.serveur:
+        serveur = subprocess.Popen([
+            sys.executable, str(SERVEUR), '--hote', args.hote, '--port', str(args.port),
+            '--workers', str(args.serveur)
+        ], cwd=RACINE)
+    try:
+        rapport = executer_charge(
+            args.hote, args.port, args.connexions, args.duree, args.profils,
+            tuple(args.point or POINTS), args.etag, args.graine
+        )
+    finally:
+        if serveur is not None:
+            serveur.terminate()
+            serveur.wait()
+    afficher(rapport)
+    if args.sortie:
+        args.sortie.write_text(json.dumps(rapport, ensure_ascii=False, indent=2), encoding='utf-8')
+    return 1 if rapport['erreurs'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Catalogues et profils synthétiques pour les mesures de performance
+"""
+
+import random
+
+from utils.session import BUDGETS, INFRASTRUCTURES, MATURITES, SECTEURS, TAILLES
+
+CATEGORIES = ('gouvernance', 'securite', 'processus')
+
+
+def catalogue_synthetique(nb_referentiels, nb_economies=None, graine=0):
+    """
+    Génère un catalogue au format de data/referentiels.json
+
+    Environ un référentiel sur cinq est obligatoire, un sur trois commun à
+    tous les secteurs et un sur quatre réservé au cloud.
+
+    Args:
+        nb_referentiels: Nombre de référentiels
+        nb_economies: Nombre d'économies (nb_referentiels / 10, au moins 10)
+        graine: Graine du générateur
+
+    Returns:
+        dict: Catalogue avec les clés 'referentiels' et 'economies'
+    """
+    aleatoire = random.Random(graine)
+    nb_economies = nb_economies or max(10, nb_referentiels // 10)
+
+    referentiels = {}
+    for i in range(nb_referentiels):
+        ref_id = f"ref_{i:05d}"
+        if aleatoire.random() < 0.33:
+            secteurs = ['all']
+        else:
+            secteurs = aleatoire.sample(SECTEURS, aleatoire.randint(1, 3))
+        referentiels[ref_id] = {
+            'id': ref_id,
+            'name': f"Référentiel {i}",
+            'fullName': f"Référentiel synthétique numéro {i}",
+            'mandatory': aleatoire.random() < 0.2,
+            'sectors': secteurs,
+            'baseCost': aleatoire.randrange(5000, 150000, 500),
+            'description': "Référentiel généré pour les mesures",
+            'cloud': aleatoire.random() < 0.25,
+            'source': "Synthétique"
+        }
+
+    economies = {
+        f"eco_{i:04d}": {
+            'label': f"Contrôle {i}",
+            'description': "Contrôle généré pour les mesures",
+            'economie': aleatoire.randrange(5000, 30000, 1000),
+            'categorie': CATEGORIES[i % len(CATEGORIES)]
+        }
+        for i in range(nb_economies)
+    }
+    return {'referentiels': referentiels, 'economies': economies}
+
+
+def profil_aleatoire(aleatoire, economies_data):
+    """
+    Tire un profil complet et une sélection d'économies
+
+    Args:
+        aleatoire: Instance de random.Random
+        economies_data: Dictionnaire des économies du catalogue
+
+    Returns:
+        tuple: (profil, liste de clés d'économies)
+    """
+    profil = {
+        'secteur': aleatoire.choice(SECTEURS),
+        'taille': aleatoire.choice(TAILLES),
+        'budget': aleatoire.choice(BUDGETS),
+        'maturite': aleatoire.choice(MATURITES),
+        'infrastructure': aleatoire.sample(INFRASTRUCTURES, aleatoire.randint(1, 3))
+    }
+    cles = list(economies_data)
+    economies = aleatoire.sample(cles, aleatoire.randint(0, len(cles)))
+    return profil, economies
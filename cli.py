@@ -0,0 +1,287 @@
+"""
+Mode lot en ligne de commande: profils en entrée, recommandations en sortie
+
+Usage:
+    python cli.py profils.jsonl > recommandations.jsonl
+    cat profils.csv | python cli.py --format csv --workers 4
+    python cli.py profils.jsonl --excel portefeuille.xlsx
+    python cli.py profils.jsonl --totaux > totaux.jsonl
+
+Chaque profil (une ligne JSON ou une ligne CSV) produit un enregistrement
+JSON sur une ligne. Le traitement est un pipeline de générateurs: la mémoire
+utilisée ne dépend pas de la taille de l'entrée.
+
+Avec --totaux, seuls les totaux par approche, économies et dépassements
+sont produits, par lots vectorisés (utils.portefeuille) au lieu d'un
+calcul complet par profil: mêmes montants, bien plus de profils/s.
+"""
+
+import argparse
+import csv
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import pandas as pd
+
+from utils.calculations import calculer_recommandations_profil
+from utils.catalogue import charger_instantane
+from utils.excel_export import ecrire_excel_portefeuille
+from utils.portefeuille import calculer_portefeuille
+
+# Champs CSV contenant des listes (valeurs séparées par ';')
+CHAMPS_LISTES = ('infrastructure', 'economies')
+SEPARATEUR_LISTES = ';'
+
+# Colonnes du portefeuille vectorisé (--totaux)
+CHAMPS_PORTEFEUILLE = ('secteur', 'infrastructure', 'budget', 'economies')
+
+TAILLE_LOT = 256
+TAILLE_LOT_TOTAUX = 8192
+
+# Catalogue chargé une seule fois par processus (principal ou worker)
+_catalogue = None
+
+
+def _initialiser_worker(chemin_catalogue):
+    """Charge le catalogue et son index une fois au démarrage du processus"""
+    global _catalogue
+    _catalogue = charger_instantane(chemin_catalogue)
+
+
+def _liste(valeur):
+    """Liste de clés depuis une liste ou une chaîne séparée par ';'"""
+    if isinstance(valeur, str):
+        return [v.strip() for v in valeur.split(SEPARATEUR_LISTES) if v.strip()]
+    return valeur
+
+
+def lire_jsonl(flux):
+    """Génère un profil par ligne JSON non vide"""
+    for numero, ligne in enumerate(flux, 1):
+        ligne = ligne.strip()
+        if not ligne:
+            continue
+        try:
+            profil = json.loads(ligne)
+        except json.JSONDecodeError as e:
+            yield numero, {'_erreur': f"JSON invalide: {e}"}
+            continue
+        if not isinstance(profil, dict):
+            yield numero, {'_erreur': "Le profil doit être un objet JSON"}
+            continue
+        for champ in CHAMPS_LISTES:
+            if champ in profil:
+                profil[champ] = _liste(profil[champ])
+        yield numero, profil
+
+
+def lire_csv(flux):
+    """Génère un profil par ligne CSV, les champs listes séparés par ';'"""
+    for numero, ligne in enumerate(csv.DictReader(flux), 2):
+        profil = dict(ligne)
+        for champ in CHAMPS_LISTES:
+            profil[champ] = _liste(profil.get(champ) or '')
+        if profil.get('ca_annuel'):
+            try:
+                profil['ca_annuel'] = float(profil['ca_annuel'])
+            except ValueError:
+                yield numero, {'_erreur': f"ca_annuel invalide: {profil['ca_annuel']!r}"}
+                continue
+        yield numero, profil
+
+
+def evaluer_profil(numero, profil):
+    """
+    Calcule l'enregistrement de sortie pour un profil
+
+    Args:
+        numero: Numéro de ligne dans l'entrée
+        profil: Dictionnaire du profil (economies = liste de clés)
+
+    Returns:
+        dict: Profil + recommandations, ou erreur
+    """
+    if '_erreur' in profil:
+        return {'ligne': numero, 'erreur': profil['_erreur']}
+    try:
+        recommandations = calculer_recommandations_profil(
+            _catalogue.data, profil, profil.get('economies', []), _catalogue.index
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        return {'ligne': numero, 'erreur': f"{type(e).__name__}: {e}"}
+    return {'ligne': numero, 'profil': profil, 'recommandations': recommandations}
+
+
+def _evaluer_lot(lot):
+    """Évalue un lot de profils dans un worker"""
+    return [evaluer_profil(numero, profil) for numero, profil in lot]
+
+
+def _totaux_portefeuille(profils):
+    data = _catalogue.data
+    tableau = pd.DataFrame(
+        [{champ: profil.get(champ) for champ in CHAMPS_PORTEFEUILLE} for profil in profils],
+        columns=CHAMPS_PORTEFEUILLE
+    )
+    # Mêmes contrôles communs que calculer_recommandations_profil
+    resultats = calculer_portefeuille(
+        tableau, data['referentiels'], data['economies'], controles=data.get('controles')
+    )
+    return resultats.to_dict('records')
+
+
+def totaliser_lot(lot):
+    """
+    Totaux vectorisés d'un lot de profils (mode --totaux)
+
+    Si le lot contient un profil mal formé, chaque profil est repris seul
+    pour que l'erreur reste propre à sa ligne.
+
+    Returns:
+        list: Enregistrements {'ligne', 'profil', 'totaux'} ou {'ligne', 'erreur'}, dans l'ordre
+    """
+    valides = [(numero, profil) for numero, profil in lot if '_erreur' not in profil]
+    totaux = {}
+    erreurs = {}
+    try:
+        if valides:
+            totaux = dict(zip((numero for numero, _ in valides), _totaux_portefeuille([p for _, p in valides])))
+    except (KeyError, TypeError, ValueError) as e:
+        if len(valides) > 1:
+            return [enregistrement for element in lot for enregistrement in totaliser_lot([element])]
+        erreurs[valides[0][0]] = f"{type(e).__name__}: {e}"
+
+    return [
+        {'ligne': numero, 'erreur': profil['_erreur']} if '_erreur' in profil
+        else {'ligne': numero, 'erreur': erreurs[numero]} if numero in erreurs
+        else {'ligne': numero, 'profil': profil, 'totaux': totaux[numero]}
+        for numero, profil in lot
+    ]
+
+
+def _lots(profils, taille):
+    """Découpe un itérable en listes de taille fixe"""
+    iterateur = iter(profils)
+    while True:
+        lot = list(islice(iterateur, taille))
+        if not lot:
+            return
+        yield lot
+
+
+def evaluer_en_parallele(profils, chemin_catalogue, workers, taille_lot, evaluer_lot=_evaluer_lot):
+    """
+    Évalue les profils dans un pool de processus, en conservant l'ordre
+
+    Le nombre de lots en vol est borné (2 par worker) pour que la lecture
+    de l'entrée suive le rythme du calcul.
+    """
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_initialiser_worker,
+        initargs=(chemin_catalogue,)
+    ) as pool:
+        en_vol = deque()
+        for lot in _lots(profils, taille_lot):
+            en_vol.append(pool.submit(evaluer_lot, lot))
+            if len(en_vol) >= 2 * workers:
+                yield from en_vol.popleft().result()
+        while en_vol:
+            yield from en_vol.popleft().result()
+
+
+def evaluer_en_serie(profils, chemin_catalogue):
+    """Évalue les profils dans le processus courant"""
+    _initialiser_worker(chemin_catalogue)
+    for numero, profil in profils:
+        yield evaluer_profil(numero, profil)
+
+
+def totaliser_en_serie(profils, chemin_catalogue, taille_lot):
+    """Totaux vectorisés par lots, dans le processus courant"""
+    _initialiser_worker(chemin_catalogue)
+    for lot in _lots(profils, taille_lot):
+        yield from totaliser_lot(lot)
+
+
+def ecrire_jsonl(enregistrements, flux):
+    """Écrit un enregistrement JSON par ligne et retourne le nombre d'erreurs"""
+    erreurs = 0
+    for enregistrement in enregistrements:
+        if 'erreur' in enregistrement:
+            erreurs += 1
+        elif 'recommandations' in enregistrement:
+            enregistrement = {**enregistrement, 'recommandations': enregistrement['recommandations'].en_dict()}
+        flux.write(json.dumps(enregistrement, ensure_ascii=False))
+        flux.write('\n')
+    return erreurs
+
+
+def construire_parser():
+    parser = argparse.ArgumentParser(
+        description="Calcule les recommandations de conformité pour des profils en lot"
+    )
+    parser.add_argument('entree', nargs='?', default='-',
+                        help="Fichier de profils JSONL ou CSV ('-' = entrée standard)")
+    parser.add_argument('-o', '--sortie', default='-',
+                        help="Fichier JSONL de sortie ('-' = sortie standard)")
+    parser.add_argument('--excel', default=None,
+                        help="Écrire le portefeuille dans ce classeur .xlsx au lieu du JSONL")
+    parser.add_argument('--totaux', action='store_true',
+                        help="Totaux seulement, calculés par lots vectorisés (JSONL)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help="Format d'entrée (déduit de l'extension, jsonl par défaut)")
+    parser.add_argument('--catalogue', default=None,
+                        help="Catalogue JSON (data/referentiels.json par défaut)")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Nombre de processus de calcul (0 = processus courant)")
+    parser.add_argument('--taille-lot', type=int, default=None,
+                        help="Profils par lot (256 par défaut, 8192 avec --totaux)")
+    return parser
+
+
+def main(argv=None):
+    parser = construire_parser()
+    args = parser.parse_args(argv)
+    if args.totaux and args.excel:
+        parser.error("--totaux produit du JSONL: incompatible avec --excel")
+    taille_lot = args.taille_lot or (TAILLE_LOT_TOTAUX if args.totaux else TAILLE_LOT)
+
+    format_entree = args.format or ('csv' if args.entree.lower().endswith('.csv') else 'jsonl')
+    lecteur = lire_csv if format_entree == 'csv' else lire_jsonl
+
+    entree = sys.stdin if args.entree == '-' else open(args.entree, 'r', encoding='utf-8', newline='')
+    sortie = None
+    if not args.excel:
+        sortie = sys.stdout if args.sortie == '-' else open(args.sortie, 'w', encoding='utf-8')
+    try:
+        profils = lecteur(entree)
+        if args.totaux and args.workers > 0:
+            enregistrements = evaluer_en_parallele(profils, args.catalogue, args.workers, taille_lot, totaliser_lot)
+        elif args.totaux:
+            enregistrements = totaliser_en_serie(profils, args.catalogue, taille_lot)
+        elif args.workers > 0:
+            enregistrements = evaluer_en_parallele(profils, args.catalogue, args.workers, taille_lot)
+        else:
+            enregistrements = evaluer_en_serie(profils, args.catalogue)
+        if args.excel:
+            erreurs = ecrire_excel_portefeuille(enregistrements, args.excel)
+        else:
+            erreurs = ecrire_jsonl(enregistrements, sortie)
+    finally:
+        if entree is not sys.stdin:
+            entree.close()
+        if sortie not in (None, sys.stdout):
+            sortie.close()
+
+    if erreurs:
+        print(f"⚠️ {erreurs} profil(s) en erreur", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
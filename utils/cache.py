@@ -0,0 +1,104 @@
+"""
+Cache mémoire borné (LRU + TTL) partagé entre les sessions
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+_ABSENT = object()
+
+
+def cle_canonique(*elements):
+    """
+    Calcule une clé de cache stable pour des structures JSON
+
+    Les dictionnaires sont sérialisés avec leurs clés triées: deux profils
+    égaux donnent toujours la même clé, quel que soit l'ordre de saisie.
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale
+    """
+    texte = json.dumps(elements, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(texte.encode('utf-8')).hexdigest()
+
+
+class CacheLRU:
+    """
+    Cache LRU borné avec expiration (TTL) et compteurs de succès/échecs
+
+    Sûr entre threads: les sessions Streamlit s'exécutent chacune dans
+    leur propre thread et partagent la même instance.
+    """
+
+    def __init__(self, taille_max=1024, ttl=None):
+        self.taille_max = taille_max
+        self.ttl = ttl
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+
+    def obtenir(self, cle, defaut=None):
+        """Retourne la valeur associée à cle, ou defaut si absente ou expirée"""
+        maintenant = time.monotonic()
+        with self._verrou:
+            entree = self._entrees.get(cle, _ABSENT)
+            if entree is not _ABSENT:
+                valeur, expiration = entree
+                if expiration is None or expiration > maintenant:
+                    self._entrees.move_to_end(cle)
+                    self.succes += 1
+                    return valeur
+                del self._entrees[cle]
+            self.echecs += 1
+            return defaut
+
+    def definir(self, cle, valeur):
+        """Ajoute ou remplace une entrée, en évinçant la moins récente si plein"""
+        expiration = time.monotonic() + self.ttl if self.ttl else None
+        with self._verrou:
+            self._entrees[cle] = (valeur, expiration)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def obtenir_ou_calculer(self, cle, fonction, *args, **kwargs):
+        """Retourne la valeur en cache ou la calcule et la stocke"""
+        valeur = self.obtenir(cle, _ABSENT)
+        if valeur is _ABSENT:
+            valeur = fonction(*args, **kwargs)
+            self.definir(cle, valeur)
+        return valeur
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+
+    def valeurs(self):
+        """Valeurs présentes (instantané, expirées comprises)"""
+        with self._verrou:
+            return [valeur for valeur, _ in self._entrees.values()]
+
+    def statistiques(self):
+        """
+        Returns:
+            dict: taille, succès, échecs, évictions et taux de succès
+        """
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {
+                'taille': len(self._entrees),
+                'taille_max': self.taille_max,
+                'succes': self.succes,
+                'echecs': self.echecs,
+                'evictions': self.evictions,
+                'taux_succes': self.succes / total if total else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entrees)
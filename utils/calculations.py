@@ -2,6 +2,52 @@
 Module de calcul des coûts et recommandations
 """
 
+import math
+
+import numpy as np
+
+from utils.cache import CacheLRU, cle_canonique
+from utils.controles import construire_matrice_controles
+from utils.metriques import chronometrer
+from utils.modeles import (
+    AUCUNE_MUTUALISATION,
+    Budget,
+    CoutReferentiel,
+    Recommandations,
+    Referentiel,
+    SelectionEconomies,
+    SelectionOptionnels,
+    SituationBudget,
+    Totaux
+)
+
+# Paramètres du modèle de coûts
+COUT_REFERENCE = 60000  # Référence Loi 25
+PLAFOND_ECONOMIES = 0.65
+FACTEUR_MINIMAL = 0.45
+FACTEUR_MAXIMAL = 1.15
+
+BUDGET_LIMITES = {
+    'low': 50000,
+    'medium': 200000,
+    'high': 1000000
+}
+BUDGET_DEFAUT = 50000
+
+# Pénalités Loi 25: le plus élevé de 10 M$ ou 2 % du chiffre d'affaires
+PENALITE_FIXE = 10000000
+TAUX_PENALITE_CA = 0.02
+
+STRATEGIES = ('minimal', 'standard', 'maximal')
+
+# Optimiseur des optionnels: nombre maximal de cases du sac à dos.
+# Le pas (en $) grandit avec le budget pour rester sous cette borne.
+CAPACITE_MAX_OPTIMISATION = 10000
+VALEUR_OPTIONNEL_DEFAUT = 1
+
+# Recommandations partagées entre sessions (lecture seule pour les appelants)
+CACHE_RECOMMANDATIONS = CacheLRU(taille_max=2048, ttl=3600)
+
 def formater_cout(montant):
     """Formate un montant en $ CAD"""
     return f"{montant:,.0f} $".replace(',', ' ')
@@ -25,31 +71,124 @@ def calculer_economies(economies_selectionnees, economies_data):
     return total
 
 
-def calculer_couts_referentiel(ref_data, total_economies):
+def construire_index_economies(economies_data, version=None):
     """
-    Calcule les 3 variantes de coûts pour un référentiel
+    Construit l'index des économies (une fois au chargement du catalogue)
+    
+    Chaque économie correspond à un bit selon son rang dans le catalogue;
+    une sélection est un masque dont le total est tenu à jour à chaque
+    case cochée ou décochée (voir basculer_economie).
     
     Args:
-        ref_data: Dictionnaire des données du référentiel
-        total_economies: Total des économies calculées
+        economies_data: Dictionnaire complet des économies disponibles
+        version: Version du catalogue, reportée dans les sélections
         
     Returns:
-        dict: Coûts minimal, standard, maximal + économies
+        dict: Clés, rangs, valeurs, regroupement par catégorie,
+            potentiel maximal et nombre d'économies
     """
-    base_cost = ref_data['baseCost']
+    cles = tuple(economies_data.keys())
+    categories = {}
+    for cle, item in economies_data.items():
+        categories.setdefault(item['categorie'], []).append((cle, item))
+    
+    return {
+        'cles': cles,
+        'rangs': {cle: rang for rang, cle in enumerate(cles)},
+        'valeurs': tuple(economies_data[cle]['economie'] for cle in cles),
+        'categories': {c: tuple(items) for c, items in categories.items()},
+        'potentiel_max': sum(item['economie'] for item in economies_data.values()),
+        'nombre': len(cles),
+        'version': version
+    }
+
+
+def selection_economies(index, cles=()):
+    """
+    Sélection initiale à partir d'une liste de clés (les inconnues sont ignorées)
     
+    Returns:
+        SelectionEconomies: Masque, total, nombre et version de l'index
+    """
+    selection = SelectionEconomies(0, 0, 0, index['version'])
+    for cle in cles:
+        selection = basculer_economie(selection, index, cle, True)
+    return selection
+
+
+def basculer_economie(selection, index, cle, coche):
+    """
+    Coche ou décoche une économie en O(1)
+    
+    Args:
+        selection: SelectionEconomies courante
+        index: Index construit par construire_index_economies
+        cle: Clé de l'économie
+        coche: True pour cocher, False pour décocher
+        
+    Returns:
+        SelectionEconomies: Nouvelle sélection (inchangée si déjà dans cet état)
+    """
+    rang = index['rangs'].get(cle)
+    if rang is None:
+        return selection
+    bit = 1 << rang
+    if bool(selection.masque & bit) == coche:
+        return selection
+    signe = 1 if coche else -1
+    return SelectionEconomies(
+        selection.masque ^ bit,
+        selection.total + signe * index['valeurs'][rang],
+        selection.nombre + signe,
+        selection.version
+    )
+
+
+def economie_cochee(selection, index, cle):
+    """Indique si l'économie cle fait partie de la sélection"""
+    rang = index['rangs'].get(cle)
+    return rang is not None and bool(selection.masque >> rang & 1)
+
+
+def cles_selectionnees(selection, index):
+    """Liste des clés cochées, dans l'ordre du catalogue"""
+    return [index['cles'][rang] for rang in _rangs(selection.masque)]
+
+
+def _variantes_couts(base_cost, total_economies):
+    """Économies, coûts minimal/standard/maximal et % d'économie d'un coût de base"""
     # Calculer les économies proportionnelles
-    proportion = base_cost / 60000  # Référence Loi 25
-    economies = min(total_economies * proportion, base_cost * 0.65)
+    proportion = base_cost / COUT_REFERENCE
+    economies = min(total_economies * proportion, base_cost * PLAFOND_ECONOMIES)
     
     # Coût standard (après économies)
     cout_standard = base_cost - economies
     
     # Coût minimal (45% du standard = approche économique)
-    cout_minimal = cout_standard * 0.45
+    cout_minimal = cout_standard * FACTEUR_MINIMAL
     
     # Coût maximal (115% du coût de base = approche premium)
-    cout_maximal = base_cost * 1.15
+    cout_maximal = base_cost * FACTEUR_MAXIMAL
+    
+    economie_pct = round((economies / base_cost) * 100) if base_cost > 0 else 0
+    return economies, cout_minimal, cout_standard, cout_maximal, economie_pct
+
+
+def calculer_couts_referentiel(ref_data, total_economies):
+    """
+    Calcule les 3 variantes de coûts pour un référentiel
+    
+    Args:
+        ref_data: Dictionnaire des données du référentiel
+        total_economies: Total des économies calculées
+        
+    Returns:
+        dict: Coûts minimal, standard, maximal + économies
+    """
+    base_cost = ref_data['baseCost']
+    economies, cout_minimal, cout_standard, cout_maximal, economie_pct = _variantes_couts(
+        base_cost, total_economies
+    )
     
     return {
         'baseCost': base_cost,
@@ -57,41 +196,109 @@ def calculer_couts_referentiel(ref_data, total_economies):
         'cout_minimal': cout_minimal,
         'cout_standard': cout_standard,
         'cout_maximal': cout_maximal,
-        'economie_pct': round((economies / base_cost) * 100) if base_cost > 0 else 0
+        'economie_pct': economie_pct
+    }
+
+
+def chiffrer_referentiel(ref, total_economies):
+    """
+    Variante de calculer_couts_referentiel produisant un enregistrement
+    
+    Args:
+        ref: Referentiel (ou dictionnaire, converti au besoin)
+        total_economies: Total des économies calculées
+        
+    Returns:
+        CoutReferentiel: Coûts, avec une référence vers le référentiel
+    """
+    if not isinstance(ref, Referentiel):
+        ref = Referentiel.depuis_catalogue(ref)
+    return CoutReferentiel(ref, *_variantes_couts(ref.baseCost, total_economies))
+
+
+def construire_index_applicabilite(referentiels, controles=None):
+    """
+    Construit l'index d'applicabilité du catalogue (une fois au chargement)
+    
+    Chaque référentiel correspond à un bit selon son rang dans le catalogue.
+    Les enregistrements (Referentiel) sont partagés entre les requêtes.
+    
+    Args:
+        referentiels: Dictionnaire de tous les référentiels
+        controles: Section 'controles' du catalogue (optionnelle)
+        
+    Returns:
+        dict: Enregistrements, masques par secteur, masque 'all', cloud et
+            obligatoire, matrice des contrôles communs (None sans contrôles)
+    """
+    enregistrements = []
+    masque_tous = 0
+    masques_secteurs = {}
+    masque_cloud = 0
+    masque_obligatoire = 0
+    
+    for rang, (ref_id, ref_data) in enumerate(referentiels.items()):
+        bit = 1 << rang
+        enregistrements.append(Referentiel.depuis_catalogue(ref_data, ref_id))
+        
+        for secteur in ref_data['sectors']:
+            if secteur == 'all':
+                masque_tous |= bit
+            else:
+                masques_secteurs[secteur] = masques_secteurs.get(secteur, 0) | bit
+        if ref_data.get('cloud', False):
+            masque_cloud |= bit
+        if ref_data.get('mandatory', False):
+            masque_obligatoire |= bit
+    
+    return {
+        'referentiels': tuple(enregistrements),
+        'tous': masque_tous,
+        'secteurs': {s: m | masque_tous for s, m in masques_secteurs.items()},
+        'cloud': masque_cloud,
+        'obligatoire': masque_obligatoire,
+        'controles': construire_matrice_controles(referentiels, controles)
     }
 
 
-def filtrer_referentiels_applicables(referentiels, profil):
+def _rangs(masque):
+    """Génère les rangs des bits à 1 d'un masque, du plus faible au plus fort"""
+    while masque:
+        bit = masque & -masque
+        yield bit.bit_length() - 1
+        masque ^= bit
+
+
+@chronometrer('calcul_secondes', fonction='filtrer_referentiels_applicables')
+def filtrer_referentiels_applicables(referentiels, profil, index=None):
     """
     Filtre les référentiels applicables selon le profil
     
     Args:
         referentiels: Dictionnaire de tous les référentiels
         profil: Dictionnaire avec secteur, infra, etc.
+        index: Index précalculé par construire_index_applicabilite
+            (construit à la volée si absent)
         
     Returns:
         tuple: (obligatoires, optionnels)
     """
-    obligatoires = []
-    optionnels = []
-    
-    has_cloud = 'cloud' in profil.get('infrastructure', []) or 'hybrid' in profil.get('infrastructure', [])
-    secteur = profil.get('secteur', '')
-    
-    for ref_id, ref_data in referentiels.items():
-        # Vérifier secteur
-        if 'all' not in ref_data['sectors'] and secteur not in ref_data['sectors']:
-            continue
-            
-        # Vérifier cloud
-        if ref_data.get('cloud', False) and not has_cloud:
-            continue
-            
-        # Ajouter aux listes appropriées
-        if ref_data.get('mandatory', False):
-            obligatoires.append({**ref_data, 'id': ref_id})
-        else:
-            optionnels.append({**ref_data, 'id': ref_id})
+    if index is None:
+        index = construire_index_applicabilite(referentiels)
+    
+    infrastructure = profil.get('infrastructure', [])
+    has_cloud = 'cloud' in infrastructure or 'hybrid' in infrastructure
+    
+    # Vérifier secteur
+    applicables = index['secteurs'].get(profil.get('secteur', ''), index['tous'])
+    
+    # Vérifier cloud
+    if not has_cloud:
+        applicables &= ~index['cloud']
+    
+    enregistrements = index['referentiels']
+    obligatoires = [enregistrements[r] for r in _rangs(applicables & index['obligatoire'])]
+    optionnels = [enregistrements[r] for r in _rangs(applicables & ~index['obligatoire'])]
     
     return obligatoires, optionnels
 
@@ -105,80 +312,276 @@ def calculer_budget_restant(cout, budget_total):
         budget_total: Budget disponible
         
     Returns:
-        dict: reste, depasse (bool), montant_depassement
+        SituationBudget: reste, depasse (bool), montant_depassement
     """
     reste = budget_total - cout
     depasse = reste < 0
     
+    return SituationBudget(abs(reste), depasse, abs(reste) if depasse else 0)
+
+
+def calculer_penalites(ca_annuel, cout_conformite):
+    """
+    Calcule l'exposition aux pénalités Loi 25 et le ROI de la conformité
+    
+    Args:
+        ca_annuel: Chiffre d'affaires annuel (0 si inconnu)
+        cout_conformite: Investissement de conformité retenu
+        
+    Returns:
+        dict: penalite_max, protection_nette, roi_protection (%)
+    """
+    penalite_pct_ca = ca_annuel * TAUX_PENALITE_CA if ca_annuel > 0 else 0
+    penalite_max = max(PENALITE_FIXE, penalite_pct_ca)
+    protection_nette = penalite_max - cout_conformite
+    roi_protection = (protection_nette / cout_conformite * 100) if cout_conformite > 0 else 0
+    
     return {
-        'reste': abs(reste),
-        'depasse': depasse,
-        'montant_depassement': abs(reste) if depasse else 0
+        'penalite_max': penalite_max,
+        'protection_nette': protection_nette,
+        'roi_protection': roi_protection
     }
 
 
-def generer_recommandations(obligatoires, optionnels, total_economies, budget):
+@chronometrer('calcul_secondes', fonction='generer_recommandations')
+def generer_recommandations(obligatoires, optionnels, total_economies, budget, controles=None):
     """
     Génère les recommandations complètes avec tous les calculs
     
+    Si le catalogue décrit des contrôles communs (voir utils.controles),
+    le montant évité en ne les mettant en œuvre qu'une fois est une ligne
+    distincte (mutualisation), déduite de la somme des obligatoires.
+    
     Args:
         obligatoires: Liste des référentiels obligatoires
         optionnels: Liste des référentiels optionnels
         total_economies: Total des économies
         budget: Budget total disponible
+        controles: MatriceControles du catalogue (optionnelle)
         
     Returns:
-        dict: Recommandations complètes structurées
+        Recommandations: Recommandations complètes structurées
     """
-    budget_limites = {
-        'low': 50000,
-        'medium': 200000,
-        'high': 1000000
-    }
-    
-    budget_montant = budget_limites.get(budget, 50000)
+    budget_montant = BUDGET_LIMITES.get(budget, BUDGET_DEFAUT)
     
     # Calculer pour chaque obligatoire
-    obligatoires_couts = []
-    for ref in obligatoires:
-        couts = calculer_couts_referentiel(ref, total_economies)
-        obligatoires_couts.append({
-            **ref,
-            **couts
-        })
-    
-    # Calculer totaux
-    total_minimal = sum(r['cout_minimal'] for r in obligatoires_couts)
-    total_standard = sum(r['cout_standard'] for r in obligatoires_couts)
-    total_maximal = sum(r['cout_maximal'] for r in obligatoires_couts)
-    
-    # Budget restant pour chaque approche
-    budget_minimal = calculer_budget_restant(total_minimal, budget_montant)
-    budget_standard = calculer_budget_restant(total_standard, budget_montant)
-    budget_maximal = calculer_budget_restant(total_maximal, budget_montant)
+    obligatoires_couts = tuple(chiffrer_referentiel(ref, total_economies) for ref in obligatoires)
+    
+    # Contrôles communs aux obligatoires: mis en œuvre une seule fois
+    mutualisation = chiffrer_mutualisation(obligatoires_couts, controles)
+    totaux = totaliser(obligatoires_couts, mutualisation)
     
     # Calculer pour optionnels
-    optionnels_couts = []
+    optionnels_couts = tuple(chiffrer_referentiel(ref, total_economies) for ref in optionnels)
+    
+    return Recommandations(
+        obligatoires=obligatoires_couts,
+        optionnels=optionnels_couts,
+        totaux=totaux,
+        budget=situer_budget(totaux, budget_montant),
+        economies_totales=total_economies,
+        mutualisation=mutualisation
+    )
+
+
+def chiffrer_mutualisation(obligatoires_couts, controles=None):
+    """
+    Montant évité par approche grâce aux contrôles communs aux obligatoires
+    
+    Args:
+        obligatoires_couts: Référentiels obligatoires chiffrés (CoutReferentiel)
+        controles: MatriceControles du catalogue (None: pas de mutualisation)
+        
+    Returns:
+        Totaux: Montant déduit de chaque approche (zéros sans contrôles)
+    """
+    if controles is None or len(obligatoires_couts) < 2:
+        return AUCUNE_MUTUALISATION
+    return Totaux(*(
+        controles.montant_mutualise(obligatoires_couts, [r[f'cout_{s}'] for r in obligatoires_couts])
+        for s in STRATEGIES
+    ))
+
+
+def totaliser(obligatoires_couts, mutualisation=AUCUNE_MUTUALISATION):
+    """
+    Investissement total de chaque approche
+    
+    Args:
+        obligatoires_couts: Référentiels obligatoires chiffrés (CoutReferentiel)
+        mutualisation: Montants déduits pour les contrôles communs (Totaux)
+        
+    Returns:
+        Totaux: Totaux minimal, standard et maximal
+    """
+    total_minimal = sum(r.cout_minimal for r in obligatoires_couts)
+    total_standard = sum(r.cout_standard for r in obligatoires_couts)
+    total_maximal = sum(r.cout_maximal for r in obligatoires_couts)
+    
+    if mutualisation != AUCUNE_MUTUALISATION:
+        total_minimal -= mutualisation.minimal
+        total_standard -= mutualisation.standard
+        total_maximal -= mutualisation.maximal
+    
+    return Totaux(total_minimal, total_standard, total_maximal)
+
+
+def situer_budget(totaux, budget_montant):
+    """
+    Budget restant (ou dépassement) pour chaque approche
+    
+    Args:
+        totaux: Totaux des trois approches
+        budget_montant: Budget total disponible ($)
+        
+    Returns:
+        Budget: Montant et situation de chaque approche
+    """
+    return Budget(
+        budget_montant,
+        calculer_budget_restant(totaux.minimal, budget_montant),
+        calculer_budget_restant(totaux.standard, budget_montant),
+        calculer_budget_restant(totaux.maximal, budget_montant)
+    )
+
+
+def _pas_optimisation(budget_disponible):
+    """Granularité des coûts (en $ entiers) pour le sac à dos"""
+    return max(1, math.ceil(budget_disponible / CAPACITE_MAX_OPTIMISATION))
+
+
+def optimiser_optionnels(optionnels, budget_disponible, strategie='standard', valeurs=None, pas=None):
+    """
+    Choisit les optionnels de plus grande valeur totale tenant dans le budget
+    
+    Sac à dos 0/1 par programmation dynamique: les coûts sont arrondis au
+    pas supérieur (l'ensemble retenu ne dépasse donc jamais le budget) et
+    chaque référentiel met à jour le tableau des meilleures valeurs en une
+    opération NumPy. À valeur égale, l'ensemble le moins cher est retenu.
+    
+    Args:
+        optionnels: Référentiels optionnels chiffrés (CoutReferentiel)
+        budget_disponible: Budget restant après les obligatoires
+        strategie: Approche dont le coût est utilisé (minimal, standard, maximal)
+        valeurs: Dictionnaire {id: valeur} (sinon champ 'valeur' du
+            référentiel, 1 par défaut)
+        pas: Granularité des coûts en $ (automatique si absent)
+        
+    Returns:
+        SelectionOptionnels: Référentiels retenus, coût, valeur et reste
+    """
+    budget_disponible = max(budget_disponible, 0)
+    valeurs = valeurs or {}
+    pas = pas or _pas_optimisation(budget_disponible)
+    capacite = int(budget_disponible // pas)
+    
+    candidats = []
     for ref in optionnels:
-        couts = calculer_couts_referentiel(ref, total_economies)
-        optionnels_couts.append({
-            **ref,
-            **couts
-        })
+        valeur = valeurs.get(ref['id'], ref.get('valeur', VALEUR_OPTIONNEL_DEFAUT))
+        cout = math.ceil(ref[f'cout_{strategie}'] / pas)
+        if valeur > 0 and cout <= capacite:
+            candidats.append((ref, cout, valeur))
+    
+    if sum(cout for _, cout, _ in candidats) <= capacite:
+        # Tout tient dans le budget: rien à arbitrer
+        retenus = [ref for ref, _, _ in candidats]
+    else:
+        meilleur = np.zeros(capacite + 1)
+        choix = np.zeros((len(candidats), capacite + 1), dtype=bool)
+        for i, (_, cout, valeur) in enumerate(candidats):
+            candidat = meilleur[:capacite + 1 - cout] + valeur
+            ameliore = candidat > meilleur[cout:]
+            choix[i, cout:] = ameliore
+            meilleur[cout:] = np.where(ameliore, candidat, meilleur[cout:])
+        
+        # Plus petite capacité atteignant la meilleure valeur = ensemble le moins cher
+        reste_cases = int(np.argmax(meilleur >= meilleur[-1]))
+        retenus = []
+        for i in range(len(candidats) - 1, -1, -1):
+            if choix[i, reste_cases]:
+                ref, cout, _ = candidats[i]
+                retenus.append(ref)
+                reste_cases -= cout
+        retenus.reverse()
+    
+    cout_total = sum(ref[f'cout_{strategie}'] for ref in retenus)
+    return SelectionOptionnels(
+        strategie=strategie,
+        referentiels=tuple(retenus),
+        cout_total=cout_total,
+        valeur_totale=sum(valeurs.get(r['id'], r.get('valeur', VALEUR_OPTIONNEL_DEFAUT)) for r in retenus),
+        budget_disponible=budget_disponible,
+        reste=budget_disponible - cout_total
+    )
+
+
+@chronometrer('calcul_secondes', fonction='optimiser_optionnels_par_strategie')
+def optimiser_optionnels_par_strategie(recommandations, valeurs=None, pas=None):
+    """
+    Applique optimiser_optionnels au budget restant de chaque approche
     
+    Args:
+        recommandations: Résultat de generer_recommandations
+        valeurs: Dictionnaire {id: valeur} des optionnels (optionnel)
+        pas: Granularité des coûts en $ (automatique si absent)
+        
+    Returns:
+        dict: {strategie: SelectionOptionnels}
+    """
+    budget_montant = recommandations['budget']['montant']
     return {
-        'obligatoires': obligatoires_couts,
-        'optionnels': optionnels_couts,
-        'totaux': {
-            'minimal': total_minimal,
-            'standard': total_standard,
-            'maximal': total_maximal
-        },
-        'budget': {
-            'montant': budget_montant,
-            'minimal': budget_minimal,
-            'standard': budget_standard,
-            'maximal': budget_maximal
-        },
-        'economies_totales': total_economies
+        strategie: optimiser_optionnels(
+            recommandations['optionnels'],
+            budget_montant - recommandations['totaux'][strategie],
+            strategie, valeurs, pas
+        )
+        for strategie in STRATEGIES
     }
+
+
+@chronometrer('calcul_secondes', fonction='calculer_recommandations_profil')
+def calculer_recommandations_profil(data, profil, economies_selectionnees, index=None):
+    """
+    Enchaîne économies, filtrage et recommandations pour un profil
+    
+    Args:
+        data: Catalogue complet (référentiels + économies)
+        profil: Dictionnaire avec secteur, infra, budget, etc.
+        economies_selectionnees: Liste des clés d'économies sélectionnées
+        index: Index d'applicabilité précalculé (optionnel)
+        
+    Returns:
+        Recommandations: Recommandations complètes structurées
+    """
+    if index is None:
+        index = construire_index_applicabilite(data['referentiels'], data.get('controles'))
+    total_economies = calculer_economies(economies_selectionnees, data['economies'])
+    obligatoires, optionnels = filtrer_referentiels_applicables(data['referentiels'], profil, index)
+    return generer_recommandations(
+        obligatoires, optionnels, total_economies, profil.get('budget'), index.get('controles')
+    )
+
+
+def calculer_recommandations_en_cache(data, profil, economies_selectionnees, version, index=None):
+    """
+    Version mémoïsée de calculer_recommandations_profil
+    
+    La clé combine le profil, les économies sélectionnées (ordre indifférent)
+    et la version du catalogue. Le résultat, immuable, est partagé entre sessions.
+    La version est obligatoire: sans elle, un catalogue rechargé à chaud
+    reprendrait les résultats de l'ancien.
+    
+    Args:
+        data: Catalogue complet (référentiels + économies)
+        profil: Dictionnaire avec secteur, infra, budget, etc.
+        economies_selectionnees: Liste des clés d'économies sélectionnées
+        version: Version de data (voir utils.catalogue.version_catalogue)
+        index: Index d'applicabilité précalculé (optionnel)
+        
+    Returns:
+        Recommandations: Recommandations complètes structurées
+    """
+    cle = cle_canonique(profil, sorted(economies_selectionnees), version)
+    return CACHE_RECOMMANDATIONS.obtenir_ou_calculer(
+        cle, calculer_recommandations_profil, data, profil, economies_selectionnees, index
+    )
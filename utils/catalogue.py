@@ -0,0 +1,297 @@
+"""
+Chargement du catalogue de référentiels et d'économies
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+
+from utils.cache import cle_canonique
+from utils.calculations import construire_index_applicabilite, construire_index_economies
+from utils.catalogue_binaire import CatalogueBinaire, chemin_binaire
+
+CHEMIN_DONNEES = Path(__file__).resolve().parent.parent / "data" / "referentiels.json"
+
+logger = logging.getLogger(__name__)
+
+
+def charger_catalogue(chemin=None):
+    """
+    Charge le catalogue JSON (référentiels + économies)
+
+    Args:
+        chemin: Chemin du fichier JSON (data/referentiels.json par défaut)
+
+    Returns:
+        dict: Catalogue avec les clés 'referentiels' et 'economies'
+    """
+    chemin = Path(chemin) if chemin else CHEMIN_DONNEES
+    with open(chemin, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def version_catalogue(data):
+    """
+    Identifiant de version du catalogue, dérivé de son contenu
+
+    Returns:
+        str: 16 premiers caractères de l'empreinte SHA-256 du catalogue
+    """
+    return cle_canonique(data)[:16]
+
+
+def valider_catalogue(data):
+    """
+    Vérifie la structure du catalogue avant de le mettre en service
+
+    Raises:
+        ValueError: si une section ou un champ requis est absent ou invalide,
+            quelle que soit la forme du document
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Le catalogue doit être un objet JSON")
+    referentiels = data.get('referentiels')
+    economies = data.get('economies')
+    if not isinstance(referentiels, dict) or not referentiels:
+        raise ValueError("Section 'referentiels' absente ou vide")
+    if not isinstance(economies, dict):
+        raise ValueError("Section 'economies' absente")
+    controles = data.get('controles', {})
+    if not isinstance(controles, dict):
+        raise ValueError("Section 'controles' invalide")
+
+    for ref_id, ref in referentiels.items():
+        if not isinstance(ref, dict):
+            raise ValueError(f"Référentiel '{ref_id}': objet attendu")
+        for champ in ('name', 'sectors', 'baseCost'):
+            if champ not in ref:
+                raise ValueError(f"Référentiel '{ref_id}': champ '{champ}' manquant")
+        if (not isinstance(ref['sectors'], list) or not ref['sectors']
+                or not all(isinstance(s, str) for s in ref['sectors'])):
+            raise ValueError(f"Référentiel '{ref_id}': 'sectors' doit être une liste non vide")
+        if not isinstance(ref['baseCost'], (int, float)) or ref['baseCost'] < 0:
+            raise ValueError(f"Référentiel '{ref_id}': 'baseCost' invalide")
+        exiges = ref.get('controles', [])
+        if (not isinstance(exiges, list) or not all(isinstance(c, str) for c in exiges)
+                or len(set(exiges)) != len(exiges)):
+            raise ValueError(f"Référentiel '{ref_id}': 'controles' doit être une liste de clés sans doublons")
+        for cle in exiges:
+            if cle not in controles:
+                raise ValueError(f"Référentiel '{ref_id}': contrôle '{cle}' inconnu")
+
+    for cle, item in economies.items():
+        if not isinstance(item, dict):
+            raise ValueError(f"Économie '{cle}': objet attendu")
+        for champ in ('label', 'economie', 'categorie'):
+            if champ not in item:
+                raise ValueError(f"Économie '{cle}': champ '{champ}' manquant")
+        if not isinstance(item['economie'], (int, float)):
+            raise ValueError(f"Économie '{cle}': 'economie' invalide")
+
+    for cle, controle in controles.items():
+        if not isinstance(controle, dict) or 'label' not in controle:
+            raise ValueError(f"Contrôle '{cle}': champ 'label' manquant")
+        if not isinstance(controle.get('effort'), (int, float)) or controle['effort'] <= 0:
+            raise ValueError(f"Contrôle '{cle}': 'effort' invalide")
+
+
+def _figer(valeur):
+    """Copie en lecture seule: dict -> MappingProxyType, list -> tuple"""
+    if isinstance(valeur, dict):
+        return MappingProxyType({k: _figer(v) for k, v in valeur.items()})
+    if isinstance(valeur, list):
+        return tuple(_figer(v) for v in valeur)
+    return valeur
+
+
+@dataclass(frozen=True)
+class InstantaneCatalogue:
+    """
+    Version immuable du catalogue et de ses structures dérivées
+
+    Les sessions lisent un instantané sans verrou: un rechargement en crée
+    un nouveau et remplace la référence, l'ancien reste valide pour les
+    reruns en cours.
+    """
+    version: str
+    data: MappingProxyType
+    index: dict
+    empreinte_fichier: str = ''
+    index_economies: dict = None
+
+
+def construire_instantane(data, empreinte_fichier=''):
+    """
+    Valide le catalogue et construit son instantané immuable
+
+    Raises:
+        ValueError: si le catalogue est invalide
+    """
+    valider_catalogue(data)
+    fige = _figer(data)
+    version = version_catalogue(data)
+    return InstantaneCatalogue(
+        version=version,
+        data=fige,
+        index=construire_index_applicabilite(fige['referentiels'], fige.get('controles')),
+        empreinte_fichier=empreinte_fichier,
+        index_economies=construire_index_economies(fige['economies'], version)
+    )
+
+
+def instantane_binaire(catalogue):
+    """
+    Instantané d'un catalogue binaire compilé (validé à la compilation)
+
+    Args:
+        catalogue: CatalogueBinaire ouvert
+
+    Returns:
+        InstantaneCatalogue: Entrées et enregistrements décodés à la demande
+    """
+    data = catalogue.donnees()
+    return InstantaneCatalogue(
+        version=catalogue.version,
+        data=data,
+        index=catalogue.index_applicabilite(),
+        empreinte_fichier=catalogue.empreinte_source,
+        index_economies=construire_index_economies(data['economies'], catalogue.version)
+    )
+
+
+def _instantane_compile(chemin, empreinte):
+    """Instantané binaire à jour du fichier JSON, ou None (absent, périmé, illisible)"""
+    compile = chemin_binaire(chemin)
+    if not compile.exists():
+        return None
+    try:
+        catalogue = CatalogueBinaire(compile)
+    except (OSError, ValueError) as e:
+        logger.warning("Catalogue compilé %s ignoré: %s", compile, e)
+        return None
+    if catalogue.empreinte_source != empreinte:
+        logger.info("Catalogue compilé %s périmé: lecture du JSON", compile)
+        return None
+    return instantane_binaire(catalogue)
+
+
+def _construire_depuis_contenu(chemin, contenu, empreinte):
+    instantane = _instantane_compile(chemin, empreinte)
+    if instantane is None:
+        instantane = construire_instantane(json.loads(contenu.decode('utf-8')), empreinte)
+    return instantane
+
+
+def charger_instantane(chemin=None):
+    """
+    Charge, valide et fige le catalogue d'un fichier
+
+    Un fichier .bin est ouvert directement; pour un fichier JSON,
+    l'instantané compilé voisin (même nom, extension .bin) est utilisé
+    s'il a été produit à partir de ce contenu exact.
+    """
+    chemin = Path(chemin) if chemin else CHEMIN_DONNEES
+    if chemin.suffix == '.bin':
+        return instantane_binaire(CatalogueBinaire(chemin))
+    contenu = chemin.read_bytes()
+    return _construire_depuis_contenu(chemin, contenu, hashlib.sha256(contenu).hexdigest())
+
+
+class GestionnaireCatalogue:
+    """
+    Surveille le fichier du catalogue et publie les nouvelles versions
+
+    Un thread de fond compare la date de modification (puis l'empreinte)
+    du fichier; une nouvelle version est lue, validée et indexée hors du
+    chemin des requêtes, puis publiée par simple affectation de référence.
+    Un fichier invalide est ignoré: l'instantané courant reste en service.
+    """
+
+    def __init__(self, chemin=None, intervalle=2.0):
+        self.chemin = Path(chemin) if chemin else CHEMIN_DONNEES
+        self.intervalle = intervalle
+        self.derniere_erreur = None
+        self._signature = self._signature_fichier()
+        self._signature_rejetee = None
+        self._instantane = charger_instantane(self.chemin)
+        self._arret = threading.Event()
+        self._thread = None
+
+    def instantane(self):
+        """Instantané courant (lecture sans verrou)"""
+        return self._instantane
+
+    def _signature_fichier(self):
+        stat = self.chemin.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def verifier(self):
+        """
+        Recharge le catalogue si le fichier a changé
+
+        Returns:
+            bool: True si une nouvelle version a été publiée
+        """
+        try:
+            signature = self._signature_fichier()
+            if signature in (self._signature, self._signature_rejetee):
+                return False
+
+            contenu = self.chemin.read_bytes()
+            empreinte = hashlib.sha256(contenu).hexdigest()
+            if empreinte == self._instantane.empreinte_fichier:
+                self._signature = signature
+                return False
+        except OSError as e:
+            # Fichier en cours de remplacement: nouvel essai au prochain passage
+            self.derniere_erreur = f"{type(e).__name__}: {e}"
+            logger.warning("Catalogue %s illisible: %s", self.chemin, self.derniere_erreur)
+            return False
+
+        try:
+            nouveau = _construire_depuis_contenu(self.chemin, contenu, empreinte)
+        except ValueError as e:
+            # json.JSONDecodeError et UnicodeDecodeError sont des ValueError
+            self._rejeter(signature, e)
+            return False
+        except Exception as e:
+            # Forme imprévue: ne doit ni arrêter la surveillance ni passer inaperçue
+            logger.exception("Catalogue %s: erreur inattendue au chargement", self.chemin)
+            self._rejeter(signature, e)
+            return False
+
+        self.derniere_erreur = None
+        self._signature = signature
+        self._signature_rejetee = None
+        self._instantane = nouveau
+        logger.info("Catalogue rechargé: version %s", nouveau.version)
+        return True
+
+    def _rejeter(self, signature, erreur):
+        """Garde l'instantané courant; ce contenu ne sera relu que s'il change"""
+        self._signature_rejetee = signature
+        self.derniere_erreur = f"{type(erreur).__name__}: {erreur}"
+        logger.warning("Catalogue %s ignoré: %s", self.chemin, self.derniere_erreur)
+
+    def _surveiller(self):
+        while not self._arret.wait(self.intervalle):
+            try:
+                self.verifier()
+            except Exception as e:
+                self.derniere_erreur = f"{type(e).__name__}: {e}"
+                logger.exception("Surveillance du catalogue %s", self.chemin)
+
+    def demarrer(self):
+        """Démarre la surveillance en arrière-plan"""
+        if self._thread is None or not self._thread.is_alive():
+            self._arret.clear()
+            self._thread = threading.Thread(target=self._surveiller, name="surveillance-catalogue", daemon=True)
+            self._thread.start()
+        return self
+
+    def arreter(self):
+        self._arret.set()
@@ -0,0 +1,478 @@
+"""
+Instantané binaire en colonnes du catalogue, ouvert en mémoire partagée
+
+Usage:
+    python -m utils.catalogue_binaire                  # data/referentiels.json -> data/referentiels.bin
+    python -m utils.catalogue_binaire source.json destination.bin
+
+Format (petit-boutiste):
+    MAGIQUE (8 octets) | longueur de l'en-tête (uint32) | en-tête JSON |
+    sections alignées sur 64 octets
+
+L'en-tête donne la version du catalogue, l'empreinte SHA-256 du JSON
+source et, pour chaque section, son type NumPy, sa longueur et son
+décalage. Les colonnes de texte sont des indices dans une table de
+chaînes dédoublonnées (-1: champ absent); les secteurs et les contrôles
+exigés par chaque référentiel sont stockés en lignes compressées
+(indices + débuts). Les champs hors schéma sont conservés dans l'en-tête.
+
+À l'ouverture, le fichier est projeté en mémoire (mmap) et les colonnes
+sont des vues NumPy sans copie: les processus qui ouvrent le même fichier
+partagent les pages du cache système. Les entrées du catalogue ne sont
+décodées qu'à la première lecture, et les masques d'applicabilité sont
+calculés en NumPy, comme la matrice des contrôles communs.
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from types import MappingProxyType
+
+import numpy as np
+
+from utils.controles import matrice_depuis_colonnes
+from utils.modeles import Referentiel
+
+MAGIQUE = b'CONFCAT2'
+ALIGNEMENT = 64
+ABSENT = -1
+
+CHAMPS_TEXTE_REFERENTIELS = ('id', 'name', 'fullName', 'description', 'source')
+CHAMPS_DRAPEAUX_REFERENTIELS = ('mandatory', 'cloud')
+CHAMPS_TEXTE_ECONOMIES = ('label', 'description', 'categorie')
+CHAMPS_TEXTE_CONTROLES = ('label', 'domaine')
+
+# Ordre des champs à la reconstruction (celui du catalogue JSON)
+ORDRE_REFERENTIELS = ('id', 'name', 'fullName', 'mandatory', 'sectors', 'baseCost', 'description', 'cloud',
+                      'source', 'controles')
+ORDRE_ECONOMIES = ('label', 'description', 'economie', 'categorie')
+ORDRE_CONTROLES = ('label', 'domaine', 'effort')
+
+
+def chemin_binaire(chemin_json):
+    """Emplacement par défaut de l'instantané compilé d'un catalogue JSON"""
+    return Path(chemin_json).with_suffix('.bin')
+
+
+class _TableChaines:
+    """Dédoublonne les chaînes et leur attribue un indice"""
+
+    def __init__(self):
+        self.indices = {}
+
+    def indice(self, valeur):
+        if not isinstance(valeur, str):
+            return ABSENT
+        indice = self.indices.get(valeur)
+        if indice is None:
+            indice = self.indices[valeur] = len(self.indices)
+        return indice
+
+    def sections(self):
+        encodees = [chaine.encode('utf-8') for chaine in self.indices]
+        debuts = np.zeros(len(encodees) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encodees], out=debuts[1:])
+        return {
+            'chaines': np.frombuffer(b''.join(encodees), dtype=np.uint8),
+            'chaines_debuts': debuts
+        }
+
+
+def _montants(valeurs):
+    """int64 si toutes les valeurs sont entières (relecture à l'identique), float64 sinon"""
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in valeurs):
+        return np.array(valeurs, dtype=np.int64)
+    return np.array(valeurs, dtype=np.float64)
+
+
+def _drapeaux(valeurs):
+    return np.array([ABSENT if v is None else int(bool(v)) for v in valeurs], dtype=np.int8)
+
+
+def _lignes_compressees(listes):
+    """Listes d'entiers -> (valeurs int32, débuts int64)"""
+    debuts = np.zeros(len(listes) + 1, dtype=np.int64)
+    np.cumsum([len(liste) for liste in listes], out=debuts[1:])
+    return np.array([v for liste in listes for v in liste], dtype=np.int32), debuts
+
+
+def _autres(entrees, ordre, champs_texte):
+    """Champs hors schéma (ou de texte qui ne sont pas des chaînes), par rang"""
+    connus = set(ordre) - set(champs_texte)
+    autres = {}
+    for rang, (_, entree) in enumerate(entrees):
+        extra = {k: v for k, v in entree.items()
+                 if k not in connus and not (k in champs_texte and isinstance(v, str))}
+        if extra:
+            autres[str(rang)] = extra
+    return autres
+
+
+def compiler(data, version, empreinte_source=''):
+    """
+    Compile un catalogue (déjà validé) en instantané binaire
+
+    Args:
+        data: Catalogue au format de data/referentiels.json
+        version: Version du catalogue (utils.catalogue.version_catalogue)
+        empreinte_source: SHA-256 du fichier JSON source
+
+    Returns:
+        bytes: Contenu du fichier binaire
+    """
+    chaines = _TableChaines()
+    sections = {}
+    controles = list(data.get('controles', {}).items())
+    rangs_controles = {cle: rang for rang, (cle, _) in enumerate(controles)}
+
+    referentiels = list(data['referentiels'].items())
+    cles = [cle for cle, _ in referentiels]
+    sections['ref_cle'] = np.array([chaines.indice(c) for c in cles], dtype=np.int32)
+    for champ in CHAMPS_TEXTE_REFERENTIELS:
+        sections[f'ref_{champ}'] = np.array(
+            [chaines.indice(ref.get(champ)) for _, ref in referentiels], dtype=np.int32
+        )
+    for champ in CHAMPS_DRAPEAUX_REFERENTIELS:
+        sections[f'ref_{champ}'] = _drapeaux([ref.get(champ) for _, ref in referentiels])
+    sections['ref_baseCost'] = _montants([ref['baseCost'] for _, ref in referentiels])
+    sections['ref_secteurs'], sections['ref_secteurs_debuts'] = _lignes_compressees(
+        [[chaines.indice(s) for s in ref['sectors']] for _, ref in referentiels]
+    )
+    sections['ref_a_controles'] = _drapeaux([
+        True if 'controles' in ref else None for _, ref in referentiels
+    ])
+    sections['ref_controles'], sections['ref_controles_debuts'] = _lignes_compressees(
+        [[rangs_controles[c] for c in ref.get('controles', ())] for _, ref in referentiels]
+    )
+
+    economies = list(data['economies'].items())
+    sections['eco_cle'] = np.array([chaines.indice(c) for c, _ in economies], dtype=np.int32)
+    for champ in CHAMPS_TEXTE_ECONOMIES:
+        sections[f'eco_{champ}'] = np.array(
+            [chaines.indice(item.get(champ)) for _, item in economies], dtype=np.int32
+        )
+    sections['eco_economie'] = _montants([item['economie'] for _, item in economies])
+
+    sections['ctl_cle'] = np.array([chaines.indice(c) for c, _ in controles], dtype=np.int32)
+    for champ in CHAMPS_TEXTE_CONTROLES:
+        sections[f'ctl_{champ}'] = np.array(
+            [chaines.indice(controle.get(champ)) for _, controle in controles], dtype=np.int32
+        )
+    sections['ctl_effort'] = _montants([controle['effort'] for _, controle in controles])
+
+    autres = {
+        'referentiels': _autres(referentiels, ORDRE_REFERENTIELS, CHAMPS_TEXTE_REFERENTIELS),
+        'economies': _autres(economies, ORDRE_ECONOMIES, CHAMPS_TEXTE_ECONOMIES),
+        'controles': _autres(controles, ORDRE_CONTROLES, CHAMPS_TEXTE_CONTROLES)
+    }
+
+    sections.update(chaines.sections())
+
+    # Décalages relatifs au début de la zone de données (après l'en-tête)
+    descripteurs = {}
+    decalage = 0
+    for nom, tableau in sections.items():
+        descripteurs[nom] = {'type': tableau.dtype.str, 'longueur': len(tableau), 'decalage': decalage}
+        decalage += -(-tableau.nbytes // ALIGNEMENT) * ALIGNEMENT
+
+    entete = json.dumps({
+        'version': version,
+        'empreinte_source': empreinte_source,
+        'nb_referentiels': len(referentiels),
+        'nb_economies': len(economies),
+        'nb_controles': len(controles),
+        'controles': 'controles' in data,
+        'sections': descripteurs,
+        'autres': autres
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    debut_donnees = -(-(len(MAGIQUE) + 4 + len(entete)) // ALIGNEMENT) * ALIGNEMENT
+    contenu = bytearray(debut_donnees + decalage)
+    contenu[:len(MAGIQUE)] = MAGIQUE
+    struct.pack_into('<I', contenu, len(MAGIQUE), len(entete))
+    contenu[len(MAGIQUE) + 4:len(MAGIQUE) + 4 + len(entete)] = entete
+    for nom, tableau in sections.items():
+        position = debut_donnees + descripteurs[nom]['decalage']
+        octets = tableau.astype(tableau.dtype.newbyteorder('<'), copy=False).tobytes()
+        contenu[position:position + len(octets)] = octets
+    return bytes(contenu)
+
+
+def compiler_fichier(source, destination=None):
+    """
+    Compile un catalogue JSON en instantané binaire (remplacement atomique)
+
+    Raises:
+        ValueError: si le catalogue est invalide
+
+    Returns:
+        Path: Chemin du fichier écrit
+    """
+    from utils.catalogue import valider_catalogue, version_catalogue
+
+    source = Path(source)
+    destination = Path(destination) if destination else chemin_binaire(source)
+    contenu_source = source.read_bytes()
+    data = json.loads(contenu_source.decode('utf-8'))
+    valider_catalogue(data)
+
+    contenu = compiler(data, version_catalogue(data), hashlib.sha256(contenu_source).hexdigest())
+    temporaire = destination.with_suffix(destination.suffix + '.tmp')
+    temporaire.write_bytes(contenu)
+    # Les processus qui ont déjà projeté l'ancien fichier gardent leur copie
+    os.replace(temporaire, destination)
+    return destination
+
+
+class _VueTable(Mapping):
+    """Table du catalogue (référentiels ou économies) décodée à la demande"""
+
+    def __init__(self, catalogue, colonne_cles, decoder):
+        self._catalogue = catalogue
+        self._colonne_cles = colonne_cles
+        self._decoder = decoder
+        self._rangs = None
+        self._entrees = [None] * len(colonne_cles)
+
+    def cle(self, rang):
+        return self._catalogue.chaine(int(self._colonne_cles[rang]))
+
+    def _rang(self, cle):
+        if self._rangs is None:
+            self._rangs = {c: rang for rang, c in enumerate(self)}
+        return self._rangs[cle]
+
+    def entree(self, rang):
+        entree = self._entrees[rang]
+        if entree is None:
+            entree = self._entrees[rang] = MappingProxyType(self._decoder(rang))
+        return entree
+
+    def __getitem__(self, cle):
+        return self.entree(self._rang(cle))
+
+    def __contains__(self, cle):
+        try:
+            self._rang(cle)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __iter__(self):
+        return (self.cle(rang) for rang in range(len(self._entrees)))
+
+    def __len__(self):
+        return len(self._entrees)
+
+
+class _SequenceReferentiels(Sequence):
+    """Enregistrements Referentiel créés au premier accès, par rang"""
+
+    def __init__(self, table):
+        self._table = table
+        self._enregistrements = [None] * len(table)
+
+    def __getitem__(self, rang):
+        if isinstance(rang, slice):
+            return tuple(self[r] for r in range(*rang.indices(len(self))))
+        enregistrement = self._enregistrements[rang]
+        if enregistrement is None:
+            enregistrement = self._enregistrements[rang] = Referentiel.depuis_catalogue(
+                self._table.entree(rang), self._table.cle(rang)
+            )
+        return enregistrement
+
+    def __len__(self):
+        return len(self._enregistrements)
+
+
+def _masque(rangs, taille):
+    """Masque d'entiers Python (bit r = rang r) depuis un tableau de rangs"""
+    if taille == 0 or len(rangs) == 0:
+        return 0
+    bits = np.zeros(taille, dtype=np.uint8)
+    bits[rangs] = 1
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+
+class CatalogueBinaire:
+    """
+    Instantané binaire ouvert en lecture (mmap partagé entre processus)
+
+    Raises:
+        ValueError: si le fichier n'est pas un instantané de ce format
+    """
+
+    def __init__(self, chemin):
+        self.chemin = Path(chemin)
+        with open(self.chemin, 'rb') as f:
+            self._carte = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._carte[:len(MAGIQUE)] != MAGIQUE:
+            raise ValueError(f"{self.chemin}: format de catalogue binaire inconnu")
+        (longueur,) = struct.unpack_from('<I', self._carte, len(MAGIQUE))
+        debut_entete = len(MAGIQUE) + 4
+        entete = json.loads(self._carte[debut_entete:debut_entete + longueur].decode('utf-8'))
+        debut_donnees = -(-(debut_entete + longueur) // ALIGNEMENT) * ALIGNEMENT
+
+        self.version = entete['version']
+        self.empreinte_source = entete['empreinte_source']
+        self.nb_referentiels = entete['nb_referentiels']
+        self.nb_economies = entete['nb_economies']
+        self.nb_controles = entete['nb_controles']
+        self._section_controles = entete['controles']
+        self._autres = entete['autres']
+        self.colonnes = {
+            nom: np.frombuffer(self._carte, dtype=np.dtype(d['type']), count=d['longueur'],
+                               offset=debut_donnees + d['decalage'])
+            for nom, d in entete['sections'].items()
+        }
+        self._chaines = [None] * (len(self.colonnes['chaines_debuts']) - 1)
+        self._donnees = None
+
+    def chaine(self, indice):
+        """Chaîne de la table (None pour ABSENT), décodée une seule fois"""
+        if indice == ABSENT:
+            return None
+        chaine = self._chaines[indice]
+        if chaine is None:
+            debuts = self.colonnes['chaines_debuts']
+            chaine = self._chaines[indice] = self.colonnes['chaines'][
+                int(debuts[indice]):int(debuts[indice + 1])
+            ].tobytes().decode('utf-8')
+        return chaine
+
+    def _referentiel(self, rang):
+        c = self.colonnes
+        valeurs = {champ: self.chaine(int(c[f'ref_{champ}'][rang])) for champ in CHAMPS_TEXTE_REFERENTIELS}
+        for champ in CHAMPS_DRAPEAUX_REFERENTIELS:
+            drapeau = int(c[f'ref_{champ}'][rang])
+            valeurs[champ] = None if drapeau == ABSENT else bool(drapeau)
+        debuts = c['ref_secteurs_debuts']
+        valeurs['sectors'] = tuple(self.chaine(int(s)) for s in c['ref_secteurs'][debuts[rang]:debuts[rang + 1]])
+        valeurs['baseCost'] = c['ref_baseCost'][rang].item()
+        valeurs['controles'] = None
+        if c['ref_a_controles'][rang] != ABSENT:
+            debuts = c['ref_controles_debuts']
+            cles = c['ctl_cle']
+            valeurs['controles'] = tuple(
+                self.chaine(int(cles[r])) for r in c['ref_controles'][debuts[rang]:debuts[rang + 1]]
+            )
+
+        ref = {champ: valeurs[champ] for champ in ORDRE_REFERENTIELS if valeurs[champ] is not None}
+        ref.update(self._autres['referentiels'].get(str(rang), {}))
+        return ref
+
+    def _economie(self, rang):
+        c = self.colonnes
+        valeurs = {champ: self.chaine(int(c[f'eco_{champ}'][rang])) for champ in CHAMPS_TEXTE_ECONOMIES}
+        valeurs['economie'] = c['eco_economie'][rang].item()
+        item = {champ: valeurs[champ] for champ in ORDRE_ECONOMIES if valeurs[champ] is not None}
+        item.update(self._autres['economies'].get(str(rang), {}))
+        return item
+
+    def _controle(self, rang):
+        c = self.colonnes
+        valeurs = {champ: self.chaine(int(c[f'ctl_{champ}'][rang])) for champ in CHAMPS_TEXTE_CONTROLES}
+        valeurs['effort'] = c['ctl_effort'][rang].item()
+        controle = {champ: valeurs[champ] for champ in ORDRE_CONTROLES if valeurs[champ] is not None}
+        controle.update(self._autres['controles'].get(str(rang), {}))
+        return controle
+
+    def donnees(self):
+        """
+        Returns:
+            MappingProxyType: Catalogue en lecture seule, même forme que le JSON
+                (entrées décodées à la première lecture)
+        """
+        if self._donnees is None:
+            donnees = {
+                'referentiels': _VueTable(self, self.colonnes['ref_cle'], self._referentiel),
+                'economies': _VueTable(self, self.colonnes['eco_cle'], self._economie)
+            }
+            if self._section_controles:
+                donnees['controles'] = _VueTable(self, self.colonnes['ctl_cle'], self._controle)
+            self._donnees = MappingProxyType(donnees)
+        return self._donnees
+
+    def matrice_controles(self):
+        """
+        Même résultat que construire_matrice_controles, sans décoder les entrées
+
+        Returns:
+            MatriceControles ou None: None si le catalogue ne décrit pas de contrôles
+        """
+        c = self.colonnes
+        if self.nb_controles == 0 or len(c['ref_controles']) == 0:
+            return None
+        return matrice_depuis_colonnes(
+            self.donnees()['referentiels'], c['ref_baseCost'], c['ref_controles_debuts'],
+            c['ref_controles'], c['ctl_effort']
+        )
+
+    def index_applicabilite(self):
+        """
+        Même résultat que construire_index_applicabilite, calculé sur les colonnes
+
+        Les enregistrements Referentiel ne sont créés que pour les rangs lus.
+        """
+        c = self.colonnes
+        n = self.nb_referentiels
+        debuts = c['ref_secteurs_debuts']
+        proprietaires = np.repeat(np.arange(n), np.diff(debuts))
+        secteurs = c['ref_secteurs']
+
+        masque_tous = 0
+        masques_secteurs = {}
+        for indice in np.unique(secteurs):
+            rangs = proprietaires[secteurs == indice]
+            secteur = self.chaine(int(indice))
+            if secteur == 'all':
+                masque_tous = _masque(rangs, n)
+            else:
+                masques_secteurs[secteur] = _masque(rangs, n)
+
+        return {
+            'referentiels': _SequenceReferentiels(self.donnees()['referentiels']),
+            'tous': masque_tous,
+            'secteurs': {s: m | masque_tous for s, m in masques_secteurs.items()},
+            'cloud': _masque(np.flatnonzero(c['ref_cloud'] == 1), n),
+            'obligatoire': _masque(np.flatnonzero(c['ref_mandatory'] == 1), n),
+            'controles': self.matrice_controles()
+        }
+
+
+def construire_parser():
+    parser = argparse.ArgumentParser(description="Compile le catalogue JSON en instantané binaire")
+    parser.add_argument('source', nargs='?', type=Path, default=None,
+                        help="Catalogue JSON (data/referentiels.json par défaut)")
+    parser.add_argument('destination', nargs='?', type=Path, default=None,
+                        help="Fichier binaire (même nom, extension .bin, par défaut)")
+    return parser
+
+
+def main(argv=None):
+    from utils.catalogue import CHEMIN_DONNEES
+
+    args = construire_parser().parse_args(argv)
+    source = args.source or CHEMIN_DONNEES
+    debut = time.perf_counter()
+    try:
+        destination = compiler_fichier(source, args.destination)
+    except (OSError, ValueError) as e:
+        print(f"❌ {source}: {e}", file=sys.stderr)
+        return 1
+    catalogue = CatalogueBinaire(destination)
+    print(f"✅ {destination}: {catalogue.nb_referentiels} référentiels, {catalogue.nb_economies} économies, "
+          f"{destination.stat().st_size / 1024:.1f} Ko en {(time.perf_counter() - debut) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Contrôles communs entre référentiels et mutualisation de l'effort
+
+Un catalogue peut associer à chaque référentiel les contrôles qu'il
+exige (gestion des accès, réponse aux incidents...), avec l'effort
+relatif de chaque contrôle. Le coût d'un référentiel est réparti entre
+ses contrôles selon cet effort; un contrôle exigé par plusieurs
+référentiels n'est mis en œuvre qu'une fois, au niveau du plus exigeant
+d'entre eux. Le montant évité est une ligne distincte des recommandations
+(Recommandations.mutualisation), déduite des totaux.
+
+La section 'controles' est facultative et absente du catalogue livré:
+sans bibliothèque de contrôles sourcée, aucune mutualisation n'est
+appliquée.
+
+Les parts sont rangées en matrice creuse CSR (référentiels × contrôles,
+tableaux NumPy): l'effort dédoublonné d'un ensemble quelconque de
+référentiels ne parcourt que les lignes de cet ensemble.
+"""
+
+import numpy as np
+
+
+class MatriceControles:
+    """
+    Matrice creuse référentiels × contrôles des parts de coût de base
+
+    Args:
+        ids: Identifiants des référentiels, dans l'ordre des lignes
+        debuts: Début de chaque ligne dans colonnes/parts (len(ids) + 1)
+        colonnes: Rang du contrôle de chaque entrée
+        parts: Part du coût de base de chaque entrée ($)
+        nb_controles: Nombre de contrôles du catalogue
+    """
+
+    def __init__(self, ids, debuts, colonnes, parts, nb_controles):
+        self.ids = ids
+        self.debuts = np.asarray(debuts, dtype=np.int64)
+        self.colonnes = np.asarray(colonnes, dtype=np.int64)
+        self.parts = np.asarray(parts, dtype=np.float64)
+        self.nb_controles = nb_controles
+        self._lignes = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def ligne(self, ref_id):
+        """Rang de la ligne d'un référentiel, None s'il n'est pas dans la matrice"""
+        if self._lignes is None:
+            self._lignes = {cle: rang for rang, cle in enumerate(self.ids)}
+        return self._lignes.get(ref_id)
+
+    def effort(self, lignes, poids=None):
+        """
+        Effort cumulé et effort dédoublonné d'un ensemble de lignes
+
+        Args:
+            lignes: Rangs des lignes (sans doublons)
+            poids: Facteur appliqué aux parts de chaque ligne (1 par défaut)
+
+        Returns:
+            tuple: (somme des parts, somme sur chaque contrôle de la plus grande part)
+        """
+        lignes = np.asarray(lignes, dtype=np.int64)
+        if len(lignes) == 0:
+            return 0.0, 0.0
+        longueurs = self.debuts[lignes + 1] - self.debuts[lignes]
+        # Positions des entrées des lignes retenues, sans boucle Python
+        decalages = self.debuts[lignes] - (np.cumsum(longueurs) - longueurs)
+        positions = np.arange(longueurs.sum()) + np.repeat(decalages, longueurs)
+        parts = self.parts[positions]
+        if poids is not None:
+            parts = parts * np.repeat(np.asarray(poids, dtype=np.float64), longueurs)
+
+        # Plus grande part de chaque contrôle (les parts sont positives)
+        maximums = np.zeros(self.nb_controles)
+        np.maximum.at(maximums, self.colonnes[positions], parts)
+        return float(parts.sum()), float(maximums.sum())
+
+    def montant_mutualise(self, referentiels, couts):
+        """
+        Montant évité en ne mettant en œuvre qu'une fois les contrôles communs
+
+        Le coût chiffré de chaque référentiel est réparti entre ses contrôles
+        comme son coût de base; chaque contrôle commun n'est compté qu'au
+        niveau du référentiel le plus exigeant.
+
+        Args:
+            referentiels: Référentiels (Referentiel ou CoutReferentiel) de l'ensemble
+            couts: Coût chiffré de chacun pour une approche ($), dans le même ordre
+
+        Returns:
+            float: Somme des parts moins somme des plus grandes parts (0 si rien n'est partagé)
+        """
+        lignes, poids = [], []
+        for ref, cout in zip(referentiels, couts):
+            ligne = self.ligne(ref['id'])
+            if ligne is not None and ref['baseCost'] > 0:
+                lignes.append(ligne)
+                poids.append(cout / ref['baseCost'])
+        if len(lignes) < 2:
+            return 0.0
+        cumule, dedoublonne = self.effort(lignes, poids)
+        return cumule - dedoublonne
+
+
+def matrice_depuis_colonnes(ids, couts_base, debuts, colonnes, efforts):
+    """
+    Construit la matrice depuis les contrôles de chaque référentiel (CSR)
+
+    Args:
+        ids: Identifiants des référentiels (séquence ou vue, une ligne chacun)
+        couts_base: Coût de base de chacun
+        debuts: Début de chaque ligne dans colonnes (len(ids) + 1); une
+            ligne peut être vide
+        colonnes: Rangs des contrôles exigés
+        efforts: Effort relatif de chaque contrôle du catalogue
+
+    Returns:
+        MatriceControles
+    """
+    debuts = np.asarray(debuts, dtype=np.int64)
+    colonnes = np.asarray(colonnes, dtype=np.int64)
+    efforts = np.asarray(efforts, dtype=np.float64)
+    longueurs = np.diff(debuts)
+    lignes = np.repeat(np.arange(len(longueurs)), longueurs)
+
+    # Répartition du coût de base au prorata de l'effort des contrôles de la ligne
+    efforts_entrees = efforts[colonnes]
+    totaux = np.bincount(lignes, weights=efforts_entrees, minlength=len(longueurs))
+    parts = np.asarray(couts_base, dtype=np.float64)[lignes] / totaux[lignes] * efforts_entrees
+    return MatriceControles(ids, debuts, colonnes, parts, len(efforts))
+
+
+def construire_matrice_controles(referentiels, controles):
+    """
+    Matrice des contrôles d'un catalogue JSON (une fois au chargement)
+
+    Args:
+        referentiels: Dictionnaire de tous les référentiels
+        controles: Dictionnaire {clé: {label, effort, ...}} des contrôles
+
+    Returns:
+        MatriceControles ou None: None si le catalogue ne décrit pas de contrôles
+    """
+    if not controles:
+        return None
+    rangs = {cle: rang for rang, cle in enumerate(controles)}
+    ids, couts_base, debuts, colonnes = [], [], [0], []
+    for ref_id, ref in referentiels.items():
+        exiges = ref.get('controles')
+        if not exiges:
+            continue
+        ids.append(ref_id)
+        couts_base.append(ref['baseCost'])
+        colonnes.extend(rangs[cle] for cle in exiges)
+        debuts.append(len(colonnes))
+    if not ids:
+        return None
+    efforts = [controle['effort'] for controle in controles.values()]
+    return matrice_depuis_colonnes(tuple(ids), couts_base, debuts, colonnes, efforts)
@@ -0,0 +1,238 @@
+"""
+Export Excel des recommandations (openpyxl en mode écriture seule)
+
+Les lignes sont produites par des générateurs à partir de la couche de
+calcul et écrites au fil de l'eau: la mémoire reste bornée même pour un
+portefeuille de dizaines de milliers de profils.
+
+Les textes venus des profils ou du catalogue commençant par =, +, - ou @
+sont préfixés d'une apostrophe: Excel ne les interprète pas comme formules.
+"""
+
+import io
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+
+from utils.roadmap import ROADMAPS
+
+STRATEGIES = ('minimal', 'standard', 'maximal')
+LIBELLES_STRATEGIES = {'minimal': "Économique", 'standard': "Recommandée", 'maximal': "Premium"}
+
+COLONNES_REFERENTIELS = [
+    "Référentiel", "Nom complet", "Source", "Coût de base", "Économies", "Économies (%)",
+    "Coût économique", "Coût recommandé", "Coût premium"
+]
+LIBELLE_MUTUALISATION = "Contrôles communs (mis en œuvre une seule fois)"
+COLONNES_TOTAUX = ["Approche", "Investissement", "Budget", "Reste", "Dépasse", "Dépassement"]
+COLONNES_ROADMAP = ["Approche", "Durée (mois)", "Mois", "Phase", "Tâche"]
+COLONNES_PROFIL = ["Champ", "Valeur"]
+CHAMPS_PROFIL = (
+    ('secteur', "Secteur"), ('taille', "Taille"), ('budget', "Budget"), ('maturite', "Maturité"),
+    ('infrastructure', "Infrastructure"), ('ca_annuel', "Chiffre d'affaires annuel"),
+    ('economies', "Économies sélectionnées")
+)
+COLONNES_PORTEFEUILLE = (
+    ["Ligne", "Identifiant", "Secteur", "Taille", "Budget", "Infrastructure",
+     "Économies sélectionnées", "Économies totales", "Nb obligatoires", "Nb optionnels",
+     "Budget disponible"]
+    + [f"Total {LIBELLES_STRATEGIES[s].lower()}" for s in STRATEGIES]
+    + [f"Dépassement {LIBELLES_STRATEGIES[s].lower()}" for s in STRATEGIES]
+)
+
+_POLICE_ENTETE = Font(bold=True, color="FFFFFF")
+_FOND_ENTETE = PatternFill("solid", fgColor="1E40AF")
+_DEBUTS_FORMULE = ('=', '+', '-', '@')
+
+
+def _texte(valeur):
+    """Neutralise un texte qu'Excel prendrait pour une formule (injection CSV/Excel)"""
+    if isinstance(valeur, str) and valeur.startswith(_DEBUTS_FORMULE):
+        return "'" + valeur
+    return valeur
+
+
+def _cellules(ligne):
+    return [_texte(valeur) for valeur in ligne]
+
+
+def _liste(valeurs):
+    """Liste du profil en texte 'a;b' (une chaîne seule est gardée telle quelle)"""
+    if isinstance(valeurs, str):
+        return valeurs
+    return ";".join(str(v) for v in valeurs)
+
+
+def _entete(feuille, colonnes):
+    """Ligne d'en-tête stylée (cellules write-only)"""
+    cellules = []
+    for titre in colonnes:
+        cellule = WriteOnlyCell(feuille, value=titre)
+        cellule.font = _POLICE_ENTETE
+        cellule.fill = _FOND_ENTETE
+        cellules.append(cellule)
+    return cellules
+
+
+def _nouvelle_feuille(classeur, titre, colonnes):
+    feuille = classeur.create_sheet(titre)
+    feuille.freeze_panes = 'A2'
+    feuille.append(_entete(feuille, colonnes))
+    return feuille
+
+
+def lignes_profil(profil):
+    """Génère une ligne par champ renseigné du profil"""
+    for champ, libelle in CHAMPS_PROFIL:
+        if champ not in profil:
+            continue
+        valeur = profil[champ]
+        if isinstance(valeur, (list, tuple)):
+            valeur = _liste(valeur)
+        yield [libelle, valeur]
+
+
+def lignes_referentiels(referentiels):
+    """Génère une ligne par référentiel chiffré"""
+    for ref in referentiels:
+        yield [
+            ref['name'], ref.get('fullName', ''), ref.get('source', ''),
+            ref['baseCost'], round(ref['economies'], 2), ref['economie_pct'],
+            round(ref['cout_minimal'], 2), round(ref['cout_standard'], 2), round(ref['cout_maximal'], 2)
+        ]
+
+
+def lignes_mutualisation(recommandations):
+    """
+    Ligne des contrôles communs, déduite des obligatoires (aucune sans
+    contrôles): obligatoires + cette ligne = totaux
+    """
+    mutualisation = recommandations['mutualisation']
+    if any(mutualisation):
+        yield [LIBELLE_MUTUALISATION, "", "", None, None, None] + [
+            -round(mutualisation[s], 2) for s in STRATEGIES
+        ]
+
+
+def lignes_totaux(recommandations):
+    """Génère une ligne par approche: total et situation budgétaire"""
+    budget = recommandations['budget']
+    for strategie in STRATEGIES:
+        info = budget[strategie]
+        yield [
+            LIBELLES_STRATEGIES[strategie], round(recommandations['totaux'][strategie], 2),
+            budget['montant'], round(info['reste'], 2),
+            "Oui" if info['depasse'] else "Non", round(info['montant_depassement'], 2)
+        ]
+
+
+def lignes_roadmap():
+    """Génère une ligne par tâche de chaque roadmap"""
+    for strategie in STRATEGIES:
+        roadmap = ROADMAPS[strategie]
+        for phase in roadmap['phases']:
+            for tache in phase['taches']:
+                yield [LIBELLES_STRATEGIES[strategie], roadmap['duree_mois'], phase['mois'], phase['titre'], tache]
+
+
+def ligne_portefeuille(numero, profil, recommandations):
+    """Ligne de synthèse d'un profil du portefeuille"""
+    budget = recommandations['budget']
+    return (
+        [
+            numero, str(profil.get('id', '')), profil.get('secteur', ''), profil.get('taille', ''),
+            profil.get('budget', ''), _liste(profil.get('infrastructure', [])),
+            _liste(profil.get('economies', [])), recommandations['economies_totales'],
+            len(recommandations['obligatoires']), len(recommandations['optionnels']), budget['montant']
+        ]
+        + [round(recommandations['totaux'][s], 2) for s in STRATEGIES]
+        + [round(budget[s]['montant_depassement'], 2) for s in STRATEGIES]
+    )
+
+
+def construire_excel_scenario(profil, recommandations):
+    """
+    Construit le classeur Excel d'un scénario
+
+    Feuilles Totaux, Obligatoires, Optionnels, Profil (champs saisis) et Roadmap.
+
+    Args:
+        profil: Profil du scénario (secteur, taille, budget, infrastructure...)
+        recommandations: Résultat de calculer_recommandations_profil
+
+    Returns:
+        bytes: Contenu du fichier .xlsx
+    """
+    classeur = Workbook(write_only=True)
+
+    feuille = _nouvelle_feuille(classeur, "Totaux", COLONNES_TOTAUX)
+    for ligne in lignes_totaux(recommandations):
+        feuille.append(ligne)
+
+    feuille = _nouvelle_feuille(classeur, "Obligatoires", COLONNES_REFERENTIELS)
+    for ligne in lignes_referentiels(recommandations['obligatoires']):
+        feuille.append(_cellules(ligne))
+    for ligne in lignes_mutualisation(recommandations):
+        feuille.append(ligne)
+
+    feuille = _nouvelle_feuille(classeur, "Optionnels", COLONNES_REFERENTIELS)
+    for ligne in lignes_referentiels(recommandations['optionnels']):
+        feuille.append(_cellules(ligne))
+
+    feuille = _nouvelle_feuille(classeur, "Profil", COLONNES_PROFIL)
+    for ligne in lignes_profil(profil):
+        feuille.append(_cellules(ligne))
+
+    feuille = _nouvelle_feuille(classeur, "Roadmap", COLONNES_ROADMAP)
+    for ligne in lignes_roadmap():
+        feuille.append(ligne)
+
+    buffer = io.BytesIO()
+    classeur.save(buffer)
+    return buffer.getvalue()
+
+
+def ecrire_excel_portefeuille(enregistrements, destination):
+    """
+    Écrit un portefeuille complet dans un classeur Excel en flux
+
+    Les enregistrements sont consommés un à un: une ligne de synthèse par
+    profil (feuille Portefeuille) et une ligne par référentiel obligatoire
+    (feuille Référentiels). Aucune structure intermédiaire n'est construite.
+
+    Args:
+        enregistrements: Itérable de dicts {'ligne', 'profil', 'recommandations'}
+            ou {'ligne', 'erreur'} (voir cli.evaluer_profil)
+        destination: Chemin ou fichier binaire de sortie
+
+    Returns:
+        int: Nombre d'enregistrements en erreur
+    """
+    classeur = Workbook(write_only=True)
+    synthese = _nouvelle_feuille(classeur, "Portefeuille", COLONNES_PORTEFEUILLE)
+    details = _nouvelle_feuille(classeur, "Référentiels", ["Ligne", "Identifiant"] + COLONNES_REFERENTIELS)
+    erreurs = _nouvelle_feuille(classeur, "Erreurs", ["Ligne", "Erreur"])
+
+    nb_erreurs = 0
+    for enregistrement in enregistrements:
+        numero = enregistrement['ligne']
+        if 'erreur' in enregistrement:
+            nb_erreurs += 1
+            erreurs.append(_cellules([numero, enregistrement['erreur']]))
+            continue
+        profil = enregistrement['profil']
+        recommandations = enregistrement['recommandations']
+        synthese.append(_cellules(ligne_portefeuille(numero, profil, recommandations)))
+        identifiant = _texte(str(profil.get('id', '')))
+        for ligne in lignes_referentiels(recommandations['obligatoires']):
+            details.append([numero, identifiant] + _cellules(ligne))
+        for ligne in lignes_mutualisation(recommandations):
+            details.append([numero, identifiant] + ligne)
+
+    feuille = _nouvelle_feuille(classeur, "Roadmap", COLONNES_ROADMAP)
+    for ligne in lignes_roadmap():
+        feuille.append(ligne)
+
+    classeur.save(destination)
+    return nb_erreurs
@@ -0,0 +1,240 @@
+"""
+Gabarits HTML des cartes de l'étape 3
+
+Chaque gabarit est écrit avec la syntaxe de string.Template ($champ) et
+découpé une fois pour toutes à l'import en morceaux littéraux et champs:
+le rendu n'est qu'un ''.join. Les fonctions publiques prennent quelques
+valeurs hachables (montants, SituationBudget, clés de ROADMAPS) et
+mémoïsent le HTML produit: un rerun qui retrouve les mêmes paramètres ne
+reconstruit aucune chaîne. Le contenu vient du code et du catalogue, il
+n'est pas échappé.
+"""
+
+from functools import lru_cache
+from string import Template
+
+from utils.calculations import formater_cout
+from utils.roadmap import ROADMAPS
+
+TAILLE_MEMO = 4096
+
+
+class Gabarit:
+    """Gabarit string.Template précompilé en liste de morceaux"""
+    __slots__ = ('_morceaux', '_positions')
+
+    def __init__(self, texte):
+        morceaux = []
+        positions = {}
+        debut = 0
+        for correspondance in Template.pattern.finditer(texte):
+            morceaux.append(texte[debut:correspondance.start()])
+            if correspondance.group('escaped') is not None:
+                morceaux.append('$')
+            else:
+                nom = correspondance.group('named') or correspondance.group('braced')
+                if nom is None:
+                    raise ValueError(f"Champ invalide dans le gabarit: {correspondance.group()!r}")
+                positions.setdefault(nom, []).append(len(morceaux))
+                morceaux.append('')
+            debut = correspondance.end()
+        morceaux.append(texte[debut:])
+        self._morceaux = tuple(morceaux)
+        self._positions = positions
+
+    def rendre(self, **valeurs):
+        """
+        Raises:
+            KeyError: si un champ du gabarit n'a pas de valeur
+        """
+        morceaux = list(self._morceaux)
+        for nom, positions in self._positions.items():
+            valeur = str(valeurs[nom])
+            for position in positions:
+                morceaux[position] = valeur
+        return ''.join(morceaux)
+
+
+_CARTE_PENALITE = Gabarit("""<div class="glass-box" style='background: linear-gradient(135deg, $fond); border: 2px solid $bordure;'>
+<div style='text-align: center;'>
+<div style='color: $couleur; font-size: 0.9rem; font-weight: 700; text-transform: uppercase; letter-spacing: 0.05em;'>
+$titre
+</div>
+<div style='color: $couleur; font-size: 2.8rem; font-weight: 800; margin: 1rem 0; font-family: Poppins;'>
+$montant
+</div>
+<div style='color: $couleur; font-size: 0.9rem; opacity: 0.9;'>$legende</div>
+</div>
+</div>""")
+
+_ALERTE_PENALITE = Gabarit("""<div class="elegant-danger">
+<strong>🚨 Analyse critique:</strong> Votre organisation risque une pénalité pouvant atteindre
+<strong style='font-size: 1.2rem;'>$penalite</strong> en cas de non-conformité à la Loi 25.
+Investir <strong>$cout</strong> aujourd'hui vous protège avec un ROI de <strong>$roi%</strong>!
+</div>""")
+
+# Carte d'approche: même structure pour la comparaison (glass-box) et
+# l'investissement total (premium-card), seuls les styles diffèrent
+_CARTE_APPROCHE = Gabarit("""<div class="$classe" style='$style'>
+<div style='text-align: center;'>
+<div style='$style_titre'>$titre</div>
+<div style='$style_montant'>$montant</div>
+<div style='$style_reste'>
+$reste
+</div>$pied
+</div>
+</div>""")
+
+_PIED_DETAILS = Gabarit("""
+<div style='margin-top: 1rem; font-size: 0.9rem; opacity: 0.9;'>
+$details
+</div>""")
+
+_PIED_OPTIMAL = """
+<div style='margin-top: 1rem; background: linear-gradient(135deg, #10b981 0%, #059669 100%); color: white; padding: 0.5rem; border-radius: 0.5rem; font-size: 0.85rem; font-weight: 700;'>
+✨ CHOIX OPTIMAL
+</div>"""
+
+_PHASE = Gabarit("""<div class="elegant-timeline-phase">
+<div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;'>
+<strong style='color: #3b82f6; font-size: 1.2rem; font-family: Poppins;'>Mois $mois: $titre</strong>
+<div style='background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%); color: white; padding: 0.5rem 1rem;
+border-radius: 2rem; font-size: 0.9rem; font-weight: 700;'>
+$pct% complété
+</div>
+</div>
+<ul style='margin: 0; padding-left: 1.5rem; color: #4b5563; line-height: 1.8;'>
+$taches
+</ul>
+</div>""")
+
+_TACHE = Gabarit("<li style='margin: 0.3rem 0;'>$tache</li>")
+
+_SYNTHESE = Gabarit("""<div class="elegant-info">
+<strong style='font-size: 1.1rem;'>📋 Synthèse:</strong> Vous devez implémenter <strong style='font-size: 1.2rem; color: #1e40af;'>$nombre référentiel(s) obligatoire(s)</strong>
+pour assurer votre conformité légale.
+</div>""")
+
+PENALITES = {
+    'risque': ('#fee2e2 0%, #fecaca 100%', '#ef4444', '#991b1b', "⚠️ Risque maximal"),
+    'investissement': ('#dbeafe 0%, #bfdbfe 100%', '#3b82f6', '#1e40af', "💰 Investissement"),
+    'protection': ('#d1fae5 0%, #a7f3d0 100%', '#10b981', '#065f46', "✅ Protection nette")
+}
+
+# Comparaison des stratégies: cartes pleines, texte blanc
+COMPARAISON = {
+    'minimal': ("linear-gradient(135deg, #10b981 0%, #059669 100%); color: white; border: none;",
+                "💰 ÉCONOMIQUE", "⏱️ 9-12 mois<br>👤 100% interne"),
+    'standard': ("linear-gradient(135deg, #3b82f6 0%, #2563eb 100%); color: white; border: 3px solid #1e40af; "
+                 "box-shadow: 0 12px 40px rgba(59, 130, 246, 0.4);",
+                 "⭐ RECOMMANDÉE", "⏱️ 6-9 mois<br>🤝 Mix interne/externe<br>✨ MEILLEUR ROI"),
+    'maximal': ("linear-gradient(135deg, #a855f7 0%, #9333ea 100%); color: white; border: none;",
+                "🏆 PREMIUM", "⏱️ 3-6 mois<br>🎯 Consultants seniors<br>💎 Excellence")
+}
+
+# Investissement total: cartes claires, liseré de couleur
+RESUME = {
+    'minimal': ("linear-gradient(135deg, #f0fdf4 0%, #d1fae5 100%); border-top: 5px solid #10b981;",
+                '#065f46', 'rgba(16, 185, 129, 0.1)', "💰 Économique"),
+    'standard': ("linear-gradient(135deg, #eff6ff 0%, #dbeafe 100%); border-top: 5px solid #3b82f6; "
+                 "box-shadow: 0 15px 40px rgba(59, 130, 246, 0.2);",
+                 '#1e40af', 'rgba(59, 130, 246, 0.1)', "⭐ Recommandée"),
+    'maximal': ("linear-gradient(135deg, #faf5ff 0%, #f3e8ff 100%); border-top: 5px solid #a855f7;",
+                '#7c3aed', 'rgba(168, 85, 247, 0.1)', "🏆 Premium")
+}
+
+
+def _reste(situation, restant, depassement):
+    if situation['depasse']:
+        return depassement + formater_cout(situation['montant_depassement'])
+    return restant + formater_cout(situation['reste'])
+
+
+@lru_cache(maxsize=TAILLE_MEMO)
+def carte_penalite(variante, montant, legende):
+    """
+    Args:
+        variante: 'risque', 'investissement' ou 'protection'
+        montant: Montant affiché
+        legende: Texte sous le montant
+    """
+    fond, bordure, couleur, titre = PENALITES[variante]
+    return _CARTE_PENALITE.rendre(
+        fond=fond, bordure=bordure, couleur=couleur, titre=titre,
+        montant=formater_cout(montant), legende=legende
+    )
+
+
+@lru_cache(maxsize=TAILLE_MEMO)
+def alerte_penalite(penalite_max, cout, roi):
+    return _ALERTE_PENALITE.rendre(penalite=formater_cout(penalite_max), cout=formater_cout(cout), roi=roi)
+
+
+@lru_cache(maxsize=TAILLE_MEMO)
+def carte_comparaison(strategie, total, situation):
+    """
+    Carte d'une approche dans la comparaison des stratégies
+
+    Args:
+        strategie: 'minimal', 'standard' ou 'maximal'
+        total: Investissement total de l'approche
+        situation: SituationBudget de l'approche
+    """
+    fond, titre, details = COMPARAISON[strategie]
+    return _CARTE_APPROCHE.rendre(
+        classe="glass-box",
+        style=f"background: {fond}",
+        style_titre="font-size: 1.1rem; font-weight: 600; opacity: 0.95;",
+        titre=titre,
+        style_montant="font-size: 3rem; font-weight: 800; margin: 1rem 0; font-family: Poppins;",
+        montant=formater_cout(total),
+        style_reste="background: rgba(0,0,0,0.2); padding: 0.75rem; border-radius: 0.75rem; "
+                    "font-size: 1rem; backdrop-filter: blur(10px);",
+        reste=_reste(situation, "✓ Reste: ", "⚠️ Dépasse: "),
+        pied=_PIED_DETAILS.rendre(details=details)
+    )
+
+
+@lru_cache(maxsize=TAILLE_MEMO)
+def carte_resume(strategie, total, situation):
+    """
+    Carte d'une approche dans l'investissement total requis
+
+    Args:
+        strategie: 'minimal', 'standard' ou 'maximal'
+        total: Investissement total de l'approche
+        situation: SituationBudget de l'approche
+    """
+    fond, couleur, fond_reste, titre = RESUME[strategie]
+    return _CARTE_APPROCHE.rendre(
+        classe="premium-card",
+        style=f"background: {fond}",
+        style_titre=f"color: {couleur}; font-size: 0.95rem; font-weight: 700; text-transform: uppercase;",
+        titre=titre,
+        style_montant=f"color: {couleur}; font-size: 2.5rem; font-weight: 800; margin: 1rem 0; font-family: Poppins;",
+        montant=formater_cout(total),
+        style_reste=f"background: {fond_reste}; padding: 0.75rem; border-radius: 0.5rem; "
+                    f"color: {couleur}; font-size: 0.95rem; font-weight: 600;",
+        reste=_reste(situation, "✓ BUDGET RESTANT: ", "⚠️ DÉPASSEMENT: "),
+        pied=_PIED_OPTIMAL if strategie == 'standard' else ''
+    )
+
+
+@lru_cache(maxsize=64)
+def phase_calendrier(approche, rang):
+    """
+    Phase rang (à partir de 1) du calendrier d'une approche de ROADMAPS
+    """
+    phases = ROADMAPS[approche]['phases']
+    phase = phases[rang - 1]
+    return _PHASE.rendre(
+        mois=phase['mois'],
+        titre=phase['titre'],
+        pct=int(rang / len(phases) * 100),
+        taches=''.join(_TACHE.rendre(tache=tache) for tache in phase['taches'])
+    )
+
+
+@lru_cache(maxsize=64)
+def synthese(nb_obligatoires):
+    return _SYNTHESE.rendre(nombre=nb_obligatoires)
@@ -0,0 +1,195 @@
+"""
+Graphique de comparaison des stratégies (étape 3), mis en cache
+
+Le graphique ne dépend que des trois totaux, du budget et des bandes
+P10-P90 de la simulation: sa spécification JSON est construite une fois
+par combinaison et partagée entre reruns et sessions. Une variante SVG
+statique, sans Plotly côté navigateur, sert les connexions lentes.
+"""
+
+import functools
+import html
+import os
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from utils.cache import CacheLRU
+from utils.calculations import formater_cout
+
+APPROCHES = ('💰 Économique', '⭐ Recommandée', '🏆 Premium')
+COULEURS = ('#10B981', '#3B82F6', '#A855F7')
+COULEUR_BUDGET = '#EF4444'
+COULEUR_TEXTE = '#1f2937'
+TITRE = "Analyse comparative des investissements"
+HAUTEUR = 450
+
+# Rendu statique par défaut (sinon ?graphiques=statiques dans l'URL)
+STATIQUES = os.environ.get('CONFORMITE_GRAPHIQUES_STATIQUES', '').lower() not in ('', '0', 'false', 'non')
+
+# Spécifications JSON et SVG, par (minimal, standard, maximal, budget, bandes)
+CACHE_FIGURES = CacheLRU(taille_max=1024, ttl=None)
+
+
+def construire_figure_strategies(couts, budget, bandes):
+    """
+    Construit le graphique en barres des trois approches
+
+    Args:
+        couts: (minimal, standard, maximal)
+        budget: Montant du budget disponible
+        bandes: ((p10, p90, probabilité de dépassement), ...) par approche
+
+    Returns:
+        go.Figure: Graphique complet
+    """
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=list(APPROCHES),
+        y=list(couts),
+        marker=dict(
+            color=list(COULEURS),
+            line=dict(color='rgba(255, 255, 255, 0.6)', width=2)
+        ),
+        error_y=dict(
+            type='data',
+            symmetric=False,
+            array=[max(p90 - c, 0) for (_, p90, _), c in zip(bandes, couts)],
+            arrayminus=[max(c - p10, 0) for (p10, _, _), c in zip(bandes, couts)],
+            color=COULEUR_TEXTE,
+            thickness=2,
+            width=12
+        ),
+        customdata=[[formater_cout(p10), formater_cout(p90), prob * 100] for p10, p90, prob in bandes],
+        hovertemplate="%{x}<br>Estimation: %{y:,.0f} $<br>P10-P90: %{customdata[0]} à %{customdata[1]}"
+                      "<br>Risque de dépassement: %{customdata[2]:.0f} %<extra></extra>",
+        text=[formater_cout(c) for c in couts],
+        textposition='outside',
+        textfont=dict(size=16, color=COULEUR_TEXTE, family='Poppins', weight='bold')
+    ))
+
+    fig.add_hline(
+        y=budget,
+        line_dash="dash",
+        line_color=COULEUR_BUDGET,
+        line_width=3,
+        annotation_text=f"💰 Budget: {formater_cout(budget)}",
+        annotation_position="right",
+        annotation=dict(font=dict(size=14, color=COULEUR_BUDGET, weight='bold'))
+    )
+
+    fig.update_layout(
+        title=dict(
+            text=TITRE,
+            font=dict(size=20, family='Poppins', weight='bold')
+        ),
+        yaxis_title="Investissement ($)",
+        height=HAUTEUR,
+        showlegend=False,
+        plot_bgcolor='rgba(249, 250, 251, 0.5)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Inter', size=13),
+        margin=dict(t=80, b=60, l=60, r=60)
+    )
+    return fig
+
+
+def _cle(couts, budget, bandes):
+    return tuple(couts) + (budget, tuple(tuple(b) for b in bandes))
+
+
+def spec_strategies(couts, budget, bandes):
+    """
+    Spécification JSON du graphique (mise en cache)
+
+    Returns:
+        str: JSON Plotly (data + layout)
+    """
+    return CACHE_FIGURES.obtenir_ou_calculer(
+        ('json',) + _cle(couts, budget, bandes),
+        lambda: pio.to_json(construire_figure_strategies(couts, budget, bandes), validate=False)
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _figure_depuis_spec(spec):
+    # Partagée entre sessions: à traiter en lecture seule
+    return pio.from_json(spec)
+
+
+def figure_strategies(couts, budget, bandes):
+    """
+    Graphique prêt pour st.plotly_chart, reconstruit au plus une fois par spécification
+
+    Un dict passé à st.plotly_chart serait revalidé par Plotly à chaque
+    rerun: on garde donc aussi l'objet Figure. Il est partagé, ne pas le
+    modifier.
+
+    Returns:
+        go.Figure
+    """
+    return _figure_depuis_spec(spec_strategies(couts, budget, bandes))
+
+
+def _svg_strategies(couts, budget, bandes, largeur=720, hauteur=HAUTEUR):
+    haut, bas, gauche, droite = 70, 50, 20, 150
+    maximum = max([budget] + [p90 for _, p90, _ in bandes] + list(couts)) * 1.15 or 1
+    zone = hauteur - haut - bas
+    colonne = (largeur - gauche - droite) / len(couts)
+    largeur_barre = colonne * 0.55
+
+    def y(valeur):
+        return haut + zone * (1 - valeur / maximum)
+
+    elements = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {largeur} {hauteur}" width="100%" '
+        f'role="img" aria-label="{html.escape(TITRE)}" font-family="Inter, sans-serif">',
+        f'<text x="{gauche}" y="32" font-size="20" font-weight="700" fill="{COULEUR_TEXTE}">{html.escape(TITRE)}</text>',
+        f'<line x1="{gauche}" y1="{y(0):.1f}" x2="{largeur - droite}" y2="{y(0):.1f}" stroke="#d1d5db"/>'
+    ]
+    for i, (cout, (p10, p90, prob), couleur, approche) in enumerate(zip(couts, bandes, COULEURS, APPROCHES)):
+        centre = gauche + colonne * (i + 0.5)
+        elements.append(
+            f'<rect x="{centre - largeur_barre / 2:.1f}" y="{y(cout):.1f}" width="{largeur_barre:.1f}" '
+            f'height="{y(0) - y(cout):.1f}" rx="6" fill="{couleur}">'
+            f'<title>{html.escape(approche)}: {formater_cout(cout)} (P10-P90 {formater_cout(p10)} à '
+            f'{formater_cout(p90)}, risque de dépassement {prob:.0%})</title></rect>'
+        )
+        # Bande P10-P90
+        elements.append(
+            f'<path d="M{centre:.1f} {y(p90):.1f}V{y(p10):.1f}M{centre - 6:.1f} {y(p90):.1f}h12'
+            f'M{centre - 6:.1f} {y(p10):.1f}h12" stroke="{COULEUR_TEXTE}" stroke-width="2" fill="none"/>'
+        )
+        elements.append(
+            f'<text x="{centre:.1f}" y="{min(y(cout), y(p90)) - 8:.1f}" text-anchor="middle" font-size="16" '
+            f'font-weight="700" fill="{COULEUR_TEXTE}">{formater_cout(cout)}</text>'
+        )
+        elements.append(
+            f'<text x="{centre:.1f}" y="{hauteur - 20}" text-anchor="middle" font-size="14" '
+            f'fill="{COULEUR_TEXTE}">{html.escape(approche)}</text>'
+        )
+    elements.append(
+        f'<line x1="{gauche}" y1="{y(budget):.1f}" x2="{largeur - droite}" y2="{y(budget):.1f}" '
+        f'stroke="{COULEUR_BUDGET}" stroke-width="3" stroke-dasharray="8 6"/>'
+    )
+    elements.append(
+        f'<text x="{largeur - droite + 8}" y="{y(budget) + 5:.1f}" font-size="14" font-weight="700" '
+        f'fill="{COULEUR_BUDGET}">💰 Budget: {formater_cout(budget)}</text>'
+    )
+    elements.append('</svg>')
+    return ''.join(elements)
+
+
+def svg_strategies(couts, budget, bandes):
+    """
+    Rendu SVG statique du même graphique (mis en cache)
+
+    Quelques kilo-octets de balisage au lieu de la bibliothèque Plotly et
+    de sa spécification; le survol est remplacé par des infobulles <title>.
+
+    Returns:
+        str: Document SVG
+    """
+    return CACHE_FIGURES.obtenir_ou_calculer(
+        ('svg',) + _cle(couts, budget, bandes), _svg_strategies, couts, budget, bandes
+    )
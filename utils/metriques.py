@@ -0,0 +1,291 @@
+"""
+Instrumentation légère: chronomètres, compteurs et exposition Prometheus
+
+Activée par la variable d'environnement CONFORMITE_METRIQUES=1. Désactivée,
+les décorateurs rendent la fonction d'origine telle quelle et les
+chronomètres se réduisent à un contexte vide partagé: le coût est nul sur
+les fonctions décorées et de l'ordre de 0,3 µs par bloc chronométré.
+
+Les durées sont agrégées en résumés (p50/p95/p99 sur une fenêtre
+glissante, somme et nombre cumulés) et exposées au format texte de
+Prometheus: sur http://127.0.0.1:9464/metrics et/ou dans un fichier
+réécrit périodiquement (collecteur « textfile » de node_exporter).
+"""
+
+import contextlib
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ACTIVE = os.environ.get('CONFORMITE_METRIQUES', '').lower() not in ('', '0', 'false', 'non')
+PORT = int(os.environ.get('CONFORMITE_METRIQUES_PORT', '9464'))
+FICHIER = os.environ.get('CONFORMITE_METRIQUES_FICHIER') or None
+
+PREFIXE = 'conformite_'
+QUANTILES = (0.5, 0.95, 0.99)
+FENETRE = 2048  # dernières observations conservées par série pour les quantiles
+INTERVALLE_FICHIER = 15.0
+
+_NUL = contextlib.nullcontext()
+
+logger = logging.getLogger(__name__)
+
+
+def _cle(nom, etiquettes):
+    return nom, tuple(sorted(etiquettes.items()))
+
+
+def _echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_etiquettes(etiquettes, supplement=()):
+    paires = list(etiquettes) + list(supplement)
+    if not paires:
+        return ''
+    return '{' + ','.join(f'{k}="{_echapper(v)}"' for k, v in paires) + '}'
+
+
+def _quantile(valeurs_triees, q):
+    """Quantile par interpolation linéaire sur des valeurs triées"""
+    if not valeurs_triees:
+        return float('nan')
+    position = (len(valeurs_triees) - 1) * q
+    bas = int(position)
+    haut = min(bas + 1, len(valeurs_triees) - 1)
+    return valeurs_triees[bas] + (valeurs_triees[haut] - valeurs_triees[bas]) * (position - bas)
+
+
+class Registre:
+    """
+    Séries de durées et compteurs, partagées entre les sessions
+
+    Sûr entre threads: chaque session Streamlit s'exécute dans son thread.
+    """
+
+    def __init__(self, fenetre=FENETRE):
+        self.fenetre = fenetre
+        self._verrou = threading.Lock()
+        self._durees = {}
+        self._compteurs = {}
+        self._jauges = {}
+
+    def observer(self, nom, duree, **etiquettes):
+        """Ajoute une durée (en secondes) à la série nom{etiquettes}"""
+        cle = _cle(nom, etiquettes)
+        with self._verrou:
+            serie = self._durees.get(cle)
+            if serie is None:
+                serie = self._durees[cle] = {'fenetre': deque(maxlen=self.fenetre), 'somme': 0.0, 'nombre': 0}
+            serie['fenetre'].append(duree)
+            serie['somme'] += duree
+            serie['nombre'] += 1
+
+    def incrementer(self, nom, valeur=1, **etiquettes):
+        cle = _cle(nom, etiquettes)
+        with self._verrou:
+            self._compteurs[cle] = self._compteurs.get(cle, 0) + valeur
+
+    def jauge(self, nom, fonction, **etiquettes):
+        """Enregistre une valeur lue au moment de l'exposition (fonction sans argument)"""
+        with self._verrou:
+            self._jauges[_cle(nom, etiquettes)] = fonction
+
+    def vider(self):
+        with self._verrou:
+            self._durees.clear()
+            self._compteurs.clear()
+
+    def resume(self, nom, **etiquettes):
+        """
+        Returns:
+            dict: p50, p95, p99, somme et nombre d'une série (None si absente)
+        """
+        with self._verrou:
+            serie = self._durees.get(_cle(nom, etiquettes))
+            if serie is None:
+                return None
+            valeurs = sorted(serie['fenetre'])
+            somme, nombre = serie['somme'], serie['nombre']
+        resume = {f"p{int(q * 100)}": _quantile(valeurs, q) for q in QUANTILES}
+        resume.update(somme=somme, nombre=nombre)
+        return resume
+
+    def exposition(self):
+        """
+        Returns:
+            str: Toutes les séries au format texte de Prometheus (version 0.0.4)
+        """
+        with self._verrou:
+            durees = {cle: (sorted(s['fenetre']), s['somme'], s['nombre']) for cle, s in self._durees.items()}
+            compteurs = dict(self._compteurs)
+            jauges = dict(self._jauges)
+
+        lignes = []
+        for nom in sorted({nom for nom, _ in durees}):
+            metrique = PREFIXE + nom
+            lignes.append(f"# TYPE {metrique} summary")
+            for (n, etiquettes), (valeurs, somme, nombre) in sorted(durees.items()):
+                if n != nom:
+                    continue
+                for q in QUANTILES:
+                    lignes.append(
+                        f"{metrique}{_format_etiquettes(etiquettes, [('quantile', q)])} {_quantile(valeurs, q):.6g}"
+                    )
+                lignes.append(f"{metrique}_sum{_format_etiquettes(etiquettes)} {somme:.6g}")
+                lignes.append(f"{metrique}_count{_format_etiquettes(etiquettes)} {nombre}")
+
+        for nom in sorted({nom for nom, _ in compteurs}):
+            metrique = PREFIXE + nom
+            lignes.append(f"# TYPE {metrique} counter")
+            for (n, etiquettes), valeur in sorted(compteurs.items()):
+                if n == nom:
+                    lignes.append(f"{metrique}{_format_etiquettes(etiquettes)} {valeur}")
+
+        for nom in sorted({nom for nom, _ in jauges}):
+            metrique = PREFIXE + nom
+            lignes.append(f"# TYPE {metrique} gauge")
+            for (n, etiquettes), fonction in sorted(jauges.items(), key=lambda e: e[0]):
+                if n != nom:
+                    continue
+                # Une jauge en erreur est omise: le reste de l'exposition reste lisible
+                try:
+                    valeur = f"{fonction():.6g}"
+                except Exception as e:
+                    logger.warning("Jauge %s%s illisible: %r", metrique, _format_etiquettes(etiquettes), e)
+                    continue
+                lignes.append(f"{metrique}{_format_etiquettes(etiquettes)} {valeur}")
+
+        return '\n'.join(lignes) + '\n'
+
+    def ecrire(self, chemin):
+        """Écrit l'exposition dans un fichier (remplacement atomique)"""
+        chemin = Path(chemin)
+        temporaire = chemin.with_suffix(chemin.suffix + '.tmp')
+        temporaire.write_text(self.exposition(), encoding='utf-8')
+        temporaire.replace(chemin)
+
+
+REGISTRE = Registre()
+
+
+class _Chronometre:
+    __slots__ = ('nom', 'etiquettes', 'debut')
+
+    def __init__(self, nom, etiquettes):
+        self.nom = nom
+        self.etiquettes = etiquettes
+
+    def __enter__(self):
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        REGISTRE.observer(self.nom, time.perf_counter() - self.debut, **self.etiquettes)
+        return False
+
+
+def chronometre(nom, **etiquettes):
+    """
+    Contexte qui mesure la durée du bloc: with chronometre('section_secondes', section='graphique'):
+
+    Sans effet (contexte vide partagé) si les métriques sont désactivées.
+    """
+    if not ACTIVE:
+        return _NUL
+    return _Chronometre(nom, etiquettes)
+
+
+def chronometrer(nom, **etiquettes):
+    """
+    Décorateur qui mesure chaque appel de la fonction
+
+    Si les métriques sont désactivées à l'import, la fonction est rendue
+    telle quelle.
+    """
+    def decorateur(fonction):
+        if not ACTIVE:
+            return fonction
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            debut = time.perf_counter()
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                REGISTRE.observer(nom, time.perf_counter() - debut, **etiquettes)
+        return enveloppe
+    return decorateur
+
+
+def observer(nom, duree, **etiquettes):
+    """Ajoute une durée mesurée ailleurs (sans effet si désactivé)"""
+    if ACTIVE:
+        REGISTRE.observer(nom, duree, **etiquettes)
+
+
+def incrementer(nom, valeur=1, **etiquettes):
+    """Incrémente un compteur (sans effet si désactivé)"""
+    if ACTIVE:
+        REGISTRE.incrementer(nom, valeur, **etiquettes)
+
+
+class _GestionnaireHTTP(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        corps = REGISTRE.exposition().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def demarrer_export(port=PORT, fichier=FICHIER, hote='127.0.0.1', intervalle=INTERVALLE_FICHIER):
+    """
+    Démarre l'exposition des métriques en arrière-plan
+
+    Les deux sorties sont indépendantes: un port déjà pris (deux serveurs
+    Streamlit sur la même machine) est journalisé et n'empêche pas
+    l'écriture du fichier.
+
+    Args:
+        port: Port HTTP local de /metrics (None pour ne pas servir)
+        fichier: Fichier réécrit toutes les intervalle secondes (optionnel)
+        hote: Adresse d'écoute (locale par défaut)
+
+    Returns:
+        ThreadingHTTPServer ou None: Serveur démarré
+    """
+    if fichier:
+        def _ecrire_periodiquement():
+            while True:
+                time.sleep(intervalle)
+                try:
+                    REGISTRE.ecrire(fichier)
+                except Exception:
+                    # Disque plein, dossier supprimé...: on réessaie à l'intervalle suivant
+                    logger.exception("Écriture des métriques dans %s impossible", fichier)
+        threading.Thread(target=_ecrire_periodiquement, name="metriques-fichier", daemon=True).start()
+
+    serveur = None
+    if port:
+        try:
+            serveur = ThreadingHTTPServer((hote, port), _GestionnaireHTTP)
+        except OSError as e:
+            logger.warning("Endpoint /metrics indisponible sur %s:%s: %s", hote, port, e)
+            return None
+        serveur.daemon_threads = True
+        threading.Thread(target=serveur.serve_forever, name="metriques-http", daemon=True).start()
+
+    return serveur
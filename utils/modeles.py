@@ -0,0 +1,221 @@
+"""
+Enregistrements immuables du catalogue et des résultats de calcul
+
+Des tuples nommés (__slots__ vides, sans __dict__) remplacent les
+dictionnaires, et les résultats pointent vers les référentiels du
+catalogue au lieu de les recopier. L'accès façon dictionnaire
+(ref['name'], ref.get(...), 'cle' in ref) reste disponible pour
+l'interface et les exports; en_dict() donne la forme JSON.
+"""
+
+from collections import namedtuple
+
+_ABSENT = object()
+
+
+class _AccesDict:
+    """
+    Accès par clé (compatibilité dict) pour les tuples nommés
+
+    Une clé str désigne un champ, ou une clé annexe (voir _cle_annexe);
+    un entier garde son sens d'index de tuple.
+    """
+    __slots__ = ()
+
+    # Champs internes qui ne sont pas exposés comme clés
+    _MASQUES = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._CLES = frozenset(cls._fields) - cls._MASQUES
+
+    def __getitem__(self, cle):
+        if cle in self._CLES:
+            return getattr(self, cle)
+        if type(cle) is str:
+            return self._cle_annexe(cle)
+        return tuple.__getitem__(self, cle)
+
+    def _cle_annexe(self, cle):
+        raise KeyError(cle)
+
+    def get(self, cle, defaut=None):
+        try:
+            return self[cle]
+        except KeyError:
+            return defaut
+
+    def __contains__(self, cle):
+        return self.get(cle, _ABSENT) is not _ABSENT
+
+    def keys(self):
+        return [c for c in self._fields if c in self._CLES]
+
+    def items(self):
+        return [(c, self[c]) for c in self.keys()]
+
+    def en_dict(self):
+        """
+        Returns:
+            dict: Copie JSON de l'enregistrement (mêmes clés que l'accès par clé)
+        """
+        return {c: _brut(self[c]) for c in self.keys()}
+
+
+def _brut(valeur):
+    """Convertit récursivement en types JSON (enregistrements, vues, tuples)"""
+    if isinstance(valeur, _AccesDict):
+        return valeur.en_dict()
+    if isinstance(valeur, (list, tuple)):
+        return [_brut(v) for v in valeur]
+    if hasattr(valeur, 'items'):
+        return {k: _brut(v) for k, v in valeur.items()}
+    return valeur
+
+
+class Referentiel(_AccesDict, namedtuple(
+    'Referentiel',
+    'id name fullName mandatory sectors baseCost description cloud source autres',
+    defaults=('', False, (), 0, '', False, '', ())
+)):
+    """
+    Référentiel du catalogue, partagé par tous les résultats qui le citent
+
+    Les champs hors schéma sont conservés dans autres (paires clé/valeur).
+    """
+    __slots__ = ()
+    _MASQUES = frozenset({'autres'})
+
+    @classmethod
+    def depuis_catalogue(cls, ref_data, ref_id=None):
+        """
+        Crée l'enregistrement d'une entrée du catalogue
+
+        Args:
+            ref_data: Dictionnaire (ou vue) des données du référentiel
+            ref_id: Identifiant (par défaut ref_data['id'])
+        """
+        champs = {}
+        autres = []
+        for cle, valeur in ref_data.items():
+            if cle in cls._CLES:
+                champs[cle] = valeur
+            else:
+                autres.append((cle, valeur))
+        champs['id'] = ref_id if ref_id is not None else ref_data.get('id', '')
+        champs['sectors'] = tuple(champs.get('sectors', ()))
+        return cls(**champs, autres=tuple(autres))
+
+    def _cle_annexe(self, cle):
+        for nom, valeur in self.autres:
+            if nom == cle:
+                return valeur
+        raise KeyError(cle)
+
+    def keys(self):
+        return list(self._fields[:-1]) + [nom for nom, _ in self.autres]
+
+    def en_dict(self):
+        donnees = {
+            'id': self.id, 'name': self.name, 'fullName': self.fullName,
+            'mandatory': self.mandatory, 'sectors': list(self.sectors),
+            'baseCost': self.baseCost, 'description': self.description,
+            'cloud': self.cloud, 'source': self.source
+        }
+        for nom, valeur in self.autres:
+            donnees[nom] = _brut(valeur)
+        return donnees
+
+
+class CoutReferentiel(_AccesDict, namedtuple(
+    'CoutReferentiel',
+    'referentiel economies cout_minimal cout_standard cout_maximal economie_pct'
+)):
+    """Variantes de coûts d'un référentiel; les autres clés sont lues sur le référentiel"""
+    __slots__ = ()
+    _MASQUES = frozenset({'referentiel'})
+
+    def _cle_annexe(self, cle):
+        return self.referentiel[cle]
+
+    def keys(self):
+        return self.referentiel.keys() + list(self._fields[1:])
+
+    def en_dict(self):
+        donnees = self.referentiel.en_dict()
+        donnees['economies'] = self.economies
+        donnees['cout_minimal'] = self.cout_minimal
+        donnees['cout_standard'] = self.cout_standard
+        donnees['cout_maximal'] = self.cout_maximal
+        donnees['economie_pct'] = self.economie_pct
+        return donnees
+
+
+class Totaux(_AccesDict, namedtuple('Totaux', 'minimal standard maximal')):
+    """Investissement total par approche"""
+    __slots__ = ()
+
+    def en_dict(self):
+        return {'minimal': self.minimal, 'standard': self.standard, 'maximal': self.maximal}
+
+
+# Mutualisation nulle: catalogue sans contrôles communs
+AUCUNE_MUTUALISATION = Totaux(0, 0, 0)
+
+
+class SituationBudget(_AccesDict, namedtuple('SituationBudget', 'reste depasse montant_depassement')):
+    """Écart entre un coût et le budget disponible"""
+    __slots__ = ()
+
+    def en_dict(self):
+        return {'reste': self.reste, 'depasse': self.depasse, 'montant_depassement': self.montant_depassement}
+
+
+class Budget(_AccesDict, namedtuple('Budget', 'montant minimal standard maximal')):
+    """Budget disponible et situation de chaque approche"""
+    __slots__ = ()
+
+    def en_dict(self):
+        return {
+            'montant': self.montant,
+            'minimal': self.minimal.en_dict(),
+            'standard': self.standard.en_dict(),
+            'maximal': self.maximal.en_dict()
+        }
+
+
+class Recommandations(_AccesDict, namedtuple(
+    'Recommandations',
+    'obligatoires optionnels totaux budget economies_totales mutualisation',
+    defaults=(AUCUNE_MUTUALISATION,)
+)):
+    """Recommandations complètes d'un profil (mutualisation: montants déduits des totaux, contrôles communs)"""
+    __slots__ = ()
+
+    def en_dict(self):
+        return {
+            'obligatoires': [r.en_dict() for r in self.obligatoires],
+            'optionnels': [r.en_dict() for r in self.optionnels],
+            'totaux': self.totaux.en_dict(),
+            'budget': self.budget.en_dict(),
+            'economies_totales': self.economies_totales,
+            'mutualisation': self.mutualisation.en_dict()
+        }
+
+
+class SelectionOptionnels(_AccesDict, namedtuple(
+    'SelectionOptionnels',
+    'strategie referentiels cout_total valeur_totale budget_disponible reste'
+)):
+    """Optionnels retenus pour une approche dans le budget laissé par les obligatoires"""
+    __slots__ = ()
+
+
+class SelectionEconomies(_AccesDict, namedtuple('SelectionEconomies', 'masque total nombre version')):
+    """Économies cochées (un bit par économie) et leurs totaux tenus à jour"""
+    __slots__ = ()
+
+
+class ProfilCode(namedtuple('ProfilCode', 'secteur taille budget maturite infrastructure ca_annuel')):
+    """Profil encodé: rangs dans les énumérations de utils.session, masque des infrastructures"""
+    __slots__ = ()
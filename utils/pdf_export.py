@@ -1,7 +1,278 @@
-﻿def generer_pdf_rapport(profil, recommandations, economies_totales):
-    """Fonction placeholder - PDF désactivé pour le moment"""
-    import io
+﻿"""
+Export du rapport d'analyse en PDF (reportlab)
+"""
+
+import io
+import re
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import (
+    KeepTogether,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle
+)
+
+from utils.cache import CacheLRU, cle_canonique
+from utils.calculations import calculer_penalites, formater_cout
+from utils.roadmap import ROADMAPS, date_fin_prevue
+
+# PDF finis, par scénario (profil + recommandations)
+CACHE_PDF = CacheLRU(taille_max=256, ttl=3600)
+
+LIBELLES_PROFIL = {
+    'secteur': {
+        'health': "Santé", 'finance': "Services financiers", 'public': "Secteur public",
+        'tech': "Technologies", 'retail': "Commerce", 'other': "Autre secteur"
+    },
+    'taille': {
+        'micro': "Micro-entreprise (1-10)", 'small': "Petite entreprise (11-49)",
+        'medium': "Moyenne entreprise (50-199)", 'large': "Grande entreprise (200+)"
+    },
+    'budget': {
+        'low': "Budget limité (< 50 000 $)", 'medium': "Budget moyen (50 000 $ - 200 000 $)",
+        'high': "Budget élevé (> 200 000 $)"
+    },
+    'maturite': {
+        'initial': "Initial", 'managed': "Géré", 'defined': "Défini", 'optimized': "Optimisé"
+    },
+    'infrastructure': {'onprem': "Sur site", 'cloud': "Cloud public", 'hybrid': "Hybride"}
+}
+
+APPROCHES = (
+    ('minimal', "Économique", "9-12 mois", "100 % interne"),
+    ('standard', "Recommandée", "6-9 mois", "Mix interne/externe"),
+    ('maximal', "Premium", "3-6 mois", "Consultants seniors")
+)
+
+BLEU = colors.HexColor('#1e40af')
+GRIS_CLAIR = colors.HexColor('#f3f4f6')
+ROUGE = colors.HexColor('#991b1b')
+
+# Styles construits une seule fois à l'import et réutilisés par chaque rapport
+_base = getSampleStyleSheet()
+STYLES = {
+    'titre': ParagraphStyle('Titre', parent=_base['Title'], textColor=BLEU, fontSize=20, spaceAfter=6),
+    'sous_titre': ParagraphStyle('SousTitre', parent=_base['Normal'], alignment=TA_CENTER,
+                                 textColor=colors.HexColor('#4b5563'), spaceAfter=12),
+    'section': ParagraphStyle('Section', parent=_base['Heading2'], textColor=BLEU, spaceBefore=12, spaceAfter=6, keepWithNext=1),
+    'phase': ParagraphStyle('Phase', parent=_base['Heading4'], spaceBefore=4, spaceAfter=2, keepWithNext=1),
+    'texte': ParagraphStyle('Texte', parent=_base['Normal'], fontSize=10, leading=14),
+    'alerte': ParagraphStyle('Alerte', parent=_base['Normal'], fontSize=10, leading=14, textColor=ROUGE),
+    'cellule': ParagraphStyle('Cellule', parent=_base['Normal'], fontSize=9, leading=11)
+}
+
+STYLE_TABLEAU = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), BLEU),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, GRIS_CLAIR]),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#d1d5db')),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
+])
+
+STYLE_FICHE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BACKGROUND', (0, 0), (0, -1), GRIS_CLAIR),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#d1d5db')),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
+])
+
+METHODOLOGIE = (
+    "Estimations basées sur des données de consultants canadiens certifiés (2024-2026), "
+    "des études de marché reconnues et les documents officiels (NIST, ISO, CAI Québec)."
+)
+
+# Les polices standard PDF ne couvrent pas les émojis de l'interface
+_HORS_LATIN1 = re.compile(r'[^\x00-\xff]+')
+
+
+def _texte(valeur):
+    """
+    Texte du catalogue pour un Paragraph: sans les caractères non
+    imprimables avec les polices standard PDF, &, < et > échappés
+    """
+    return escape(_HORS_LATIN1.sub('', str(valeur)).strip())
+
+
+def _libelle(champ, valeur):
+    return LIBELLES_PROFIL[champ].get(valeur, valeur or "-")
+
+
+def _section_profil(profil, economies_totales):
+    infrastructure = ", ".join(_libelle('infrastructure', i) for i in profil.get('infrastructure', [])) or "-"
+    ca_annuel = profil.get('ca_annuel', 0)
+    lignes = [
+        ["Secteur", _libelle('secteur', profil.get('secteur'))],
+        ["Taille", _libelle('taille', profil.get('taille'))],
+        ["Budget", _libelle('budget', profil.get('budget'))],
+        ["Maturité", _libelle('maturite', profil.get('maturite'))],
+        ["Infrastructure", infrastructure],
+        ["Chiffre d'affaires", formater_cout(ca_annuel) if ca_annuel else "Non communiqué"],
+        ["Économies (contrôles existants)", formater_cout(economies_totales)]
+    ]
+    return [
+        Paragraph("Profil de l'organisation", STYLES['section']),
+        Table(lignes, colWidths=[6 * cm, 11 * cm], style=STYLE_FICHE)
+    ]
+
+
+def _section_penalites(profil, recommandations):
+    cout_conformite = recommandations['totaux']['standard']
+    penalites = calculer_penalites(profil.get('ca_annuel', 0), cout_conformite)
+    lignes = [
+        ["Risque maximal (pénalité Loi 25)", formater_cout(penalites['penalite_max'])],
+        ["Investissement recommandé", formater_cout(cout_conformite)],
+        ["Protection nette", formater_cout(penalites['protection_nette'])],
+        ["ROI de la protection", f"{int(penalites['roi_protection'])} %"]
+    ]
+    return [
+        Paragraph("Analyse du risque de non-conformité", STYLES['section']),
+        Table(lignes, colWidths=[9 * cm, 8 * cm], style=STYLE_FICHE),
+        Spacer(1, 0.2 * cm),
+        Paragraph(
+            f"Votre organisation risque une pénalité pouvant atteindre "
+            f"<b>{formater_cout(penalites['penalite_max'])}</b> en cas de non-conformité à la Loi 25.",
+            STYLES['alerte']
+        )
+    ]
+
+
+def _section_strategies(recommandations):
+    totaux = recommandations['totaux']
+    budget = recommandations['budget']
+    lignes = [["Approche", "Investissement", "Budget", "Délai", "Ressources"]]
+    for cle, nom, delai, ressources in APPROCHES:
+        info = budget[cle]
+        if info['depasse']:
+            etat = "Dépasse: " + formater_cout(info['montant_depassement'])
+        else:
+            etat = "Reste: " + formater_cout(info['reste'])
+        lignes.append([nom, formater_cout(totaux[cle]), etat, delai, ressources])
+    return [
+        Paragraph("Comparaison des stratégies d'implémentation", STYLES['section']),
+        Paragraph(f"Budget disponible: <b>{formater_cout(budget['montant'])}</b>", STYLES['texte']),
+        Spacer(1, 0.2 * cm),
+        Table(lignes, colWidths=[3 * cm, 3.3 * cm, 4.2 * cm, 2.5 * cm, 4 * cm], style=STYLE_TABLEAU)
+    ]
+
+
+def _tableau_referentiels(titre, referentiels, mutualisation=None, totaux=None):
+    if not referentiels:
+        return []
+    lignes = [["Référentiel", "Coût de base", "Économies", "Économique", "Recommandée", "Premium"]]
+    for ref in referentiels:
+        lignes.append([
+            Paragraph(_texte(ref['name']), STYLES['cellule']),
+            formater_cout(ref['baseCost']),
+            f"{formater_cout(ref['economies'])} ({ref['economie_pct']} %)",
+            formater_cout(ref['cout_minimal']),
+            formater_cout(ref['cout_standard']),
+            formater_cout(ref['cout_maximal'])
+        ])
+    if mutualisation is not None and any(mutualisation):
+        # Rapprochement avec les totaux des approches
+        lignes.append([Paragraph("Contrôles communs (une seule fois)", STYLES['cellule']), "", ""]
+                      + ["-" + formater_cout(mutualisation[s]) for s in ('minimal', 'standard', 'maximal')])
+        lignes.append([Paragraph("<b>Total</b>", STYLES['cellule']), "", ""]
+                      + [formater_cout(totaux[s]) for s in ('minimal', 'standard', 'maximal')])
+    return [
+        Paragraph(titre, STYLES['section']),
+        Table(lignes, colWidths=[3.6 * cm, 2.6 * cm, 3.4 * cm, 2.6 * cm, 2.6 * cm, 2.6 * cm],
+              style=STYLE_TABLEAU, repeatRows=1)
+    ]
+
+
+def _section_roadmaps():
+    elements = [Paragraph("Calendrier d'implémentation", STYLES['section'])]
+    for cle, nom, _, _ in APPROCHES:
+        roadmap = ROADMAPS[cle]
+        bloc = [Paragraph(
+            f"{nom}: {roadmap['duree_mois']} mois (fin prévue {date_fin_prevue(roadmap['duree_mois'])})",
+            STYLES['phase']
+        )]
+        lignes = [["Mois", "Phase", "Tâches"]]
+        for phase in roadmap['phases']:
+            lignes.append([
+                phase['mois'],
+                Paragraph(_texte(phase['titre']), STYLES['cellule']),
+                Paragraph("<br/>".join(_texte(t) for t in phase['taches']), STYLES['cellule'])
+            ])
+        bloc.append(Table(lignes, colWidths=[1.6 * cm, 5.4 * cm, 10 * cm], style=STYLE_TABLEAU))
+        bloc.append(Spacer(1, 0.3 * cm))
+        elements.append(KeepTogether(bloc))
+    return elements
+
+
+def construire_pdf(profil, recommandations, economies_totales):
+    """
+    Construit le rapport PDF complet en mémoire
+
+    Returns:
+        bytes: Contenu du document PDF
+    """
     buffer = io.BytesIO()
-    buffer.write(b'PDF temporairement desactive')
-    buffer.seek(0)
-    return buffer
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        leftMargin=2 * cm, rightMargin=2 * cm, topMargin=1.8 * cm, bottomMargin=1.8 * cm,
+        title="Rapport d'analyse de conformité",
+        author="Conformité Pro"
+    )
+
+    elements = [
+        Paragraph("Rapport d'analyse de conformité", STYLES['titre']),
+        Paragraph(f"Généré le {datetime.now():%Y-%m-%d}", STYLES['sous_titre']),
+        Paragraph(METHODOLOGIE, STYLES['texte'])
+    ]
+    elements += _section_profil(profil, economies_totales)
+    elements += _section_penalites(profil, recommandations)
+    elements += _section_strategies(recommandations)
+    elements += _tableau_referentiels(
+        "Référentiels obligatoires", recommandations['obligatoires'],
+        recommandations['mutualisation'], recommandations['totaux']
+    )
+    elements += _tableau_referentiels("Référentiels optionnels", recommandations['optionnels'])
+    elements += _section_roadmaps()
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def cle_rapport(profil, recommandations, economies_totales):
+    """Empreinte d'un scénario de rapport (la date du jour figure dans le PDF)"""
+    return cle_canonique(profil, recommandations, economies_totales, datetime.now().date())
+
+
+def generer_pdf_rapport(profil, recommandations, economies_totales):
+    """
+    Génère (ou reprend du cache) le rapport PDF d'un scénario
+
+    Les octets sont mis en cache par empreinte du scénario: un même
+    téléchargement répété ne reconstruit pas le document.
+
+    Args:
+        profil: Dictionnaire du profil
+        recommandations: Résultat de calculer_recommandations_profil
+        economies_totales: Total des économies
+
+    Returns:
+        bytes: Contenu du document PDF
+    """
+    cle = cle_rapport(profil, recommandations, economies_totales)
+    return CACHE_PDF.obtenir_ou_calculer(cle, construire_pdf, profil, recommandations, economies_totales)
+
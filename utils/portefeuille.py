@@ -0,0 +1,233 @@
+"""
+Moteur de calcul par lots pour un portefeuille de profils clients
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.calculations import (
+    COUT_REFERENCE,
+    PLAFOND_ECONOMIES,
+    FACTEUR_MINIMAL,
+    FACTEUR_MAXIMAL,
+    BUDGET_LIMITES,
+    BUDGET_DEFAUT,
+    chiffrer_mutualisation,
+    chiffrer_referentiel
+)
+from utils.controles import construire_matrice_controles
+from utils.modeles import Referentiel
+
+STRATEGIES = ('minimal', 'standard', 'maximal')
+INFRASTRUCTURES_CLOUD = ('cloud', 'hybrid')
+TAILLE_BLOC = 65536
+
+
+def _codes_categories(valeurs, categories):
+    """
+    Encode des valeurs selon leur position dans categories (-1 si inconnue)
+
+    pd.factorize travaille sur une table de hachage; seules les valeurs
+    distinctes sont ensuite recherchées dans categories.
+    """
+    codes, uniques = pd.factorize(valeurs, use_na_sentinel=True)
+    position = {cle: i for i, cle in enumerate(categories)}
+    correspondance = np.array([position.get(u, -1) for u in uniques] + [-1], dtype=np.int64)
+    return correspondance[codes]
+
+
+def _comptes_listes(colonne, categories):
+    """
+    Compte les occurrences de chaque catégorie dans une colonne de listes
+
+    Args:
+        colonne: Série pandas dont chaque valeur est une liste de clés
+        categories: Séquence des clés connues
+
+    Returns:
+        np.ndarray: Matrice (profils × catégories) des occurrences
+    """
+    n = len(colonne)
+    eclatee = pd.Series(colonne.to_numpy(), copy=False).explode()
+    codes = _codes_categories(eclatee.to_numpy(), categories)
+    lignes = eclatee.index.to_numpy()
+    valides = codes >= 0
+    positions = lignes[valides] * len(categories) + codes[valides]
+    comptes = np.bincount(positions, minlength=n * len(categories))
+    return comptes.reshape(n, len(categories))
+
+
+def _comptes_economies(profils, cles):
+    """
+    Matrice des économies sélectionnées, depuis une colonne 'economies'
+    (listes de clés) ou des colonnes booléennes 'eco_<clé>'
+    """
+    if 'economies' in profils.columns:
+        return _comptes_listes(profils['economies'], cles)
+
+    comptes = np.zeros((len(profils), len(cles)), dtype=np.int64)
+    for j, cle in enumerate(cles):
+        colonne = f"eco_{cle}"
+        if colonne in profils.columns:
+            comptes[:, j] = profils[colonne].fillna(False).to_numpy(dtype=bool)
+    return comptes
+
+
+def preparer_catalogue(referentiels):
+    """
+    Convertit le catalogue de référentiels en tableaux NumPy
+
+    Args:
+        referentiels: Dictionnaire de tous les référentiels
+
+    Returns:
+        dict: Coûts de base, masques obligatoire/cloud et table des secteurs
+    """
+    refs = list(referentiels.values())
+    secteurs = sorted({s for ref in refs for s in ref['sectors'] if s != 'all'})
+
+    tous = np.array(['all' in ref['sectors'] for ref in refs], dtype=bool)
+    # Dernière ligne = secteur inconnu (code -1)
+    table_secteurs = np.tile(tous, (len(secteurs) + 1, 1))
+    for i, secteur in enumerate(secteurs):
+        table_secteurs[i] |= np.array([secteur in ref['sectors'] for ref in refs], dtype=bool)
+
+    return {
+        'ids': list(referentiels.keys()),
+        'baseCost': np.array([ref['baseCost'] for ref in refs], dtype=np.float64),
+        'obligatoire': np.array([ref.get('mandatory', False) for ref in refs], dtype=bool),
+        'cloud': np.array([ref.get('cloud', False) for ref in refs], dtype=bool),
+        'secteurs': secteurs,
+        'table_secteurs': table_secteurs
+    }
+
+
+def _mutualisations(catalogue, referentiels, matrice, codes_secteur, has_cloud, total_economies):
+    """
+    Montants déduits de chaque approche pour les contrôles communs, par profil
+
+    Les obligatoires ne dépendent que du secteur et de l'infrastructure
+    cloud, leurs coûts que des économies: le montant est calculé par
+    chiffrer_mutualisation une fois par combinaison présente.
+
+    Returns:
+        dict: {strategie: np.ndarray des montants déduits}
+    """
+    cles = np.stack([codes_secteur * 2 + has_cloud, total_economies], axis=1)
+    combinaisons, inverses = np.unique(cles, axis=0, return_inverse=True)
+    montants = np.zeros((len(combinaisons), len(STRATEGIES)))
+    for k, (combinaison, economies) in enumerate(combinaisons):
+        code, cloud = divmod(int(combinaison), 2)
+        applicable = catalogue['table_secteurs'][code] & ~(catalogue['cloud'] & (not cloud))
+        obligatoires = [
+            chiffrer_referentiel(
+                Referentiel.depuis_catalogue(referentiels[catalogue['ids'][j]], catalogue['ids'][j]),
+                int(economies)
+            )
+            for j in np.flatnonzero(applicable & catalogue['obligatoire'])
+        ]
+        montants[k] = chiffrer_mutualisation(obligatoires, matrice)
+    montants = montants[inverses.reshape(-1)]
+    return {strategie: montants[:, i] for i, strategie in enumerate(STRATEGIES)}
+
+
+def calculer_portefeuille(profils, referentiels, economies_data, taille_bloc=TAILLE_BLOC, controles=None):
+    """
+    Calcule les totaux de recommandations pour chaque profil d'un portefeuille
+
+    Les calculs sont faits sur une matrice profils × référentiels et donnent
+    les mêmes montants que calculer_couts_referentiel / generer_recommandations
+    appliqués profil par profil.
+
+    Args:
+        profils: DataFrame avec les colonnes secteur, infrastructure (listes),
+            budget et economies (listes de clés) ou eco_<clé> (booléens)
+        referentiels: Dictionnaire de tous les référentiels
+        economies_data: Dictionnaire complet des économies disponibles
+        taille_bloc: Nombre de profils traités par bloc matriciel
+        controles: Section 'controles' du catalogue (mutualisation des totaux)
+
+    Returns:
+        pd.DataFrame: Une ligne par profil (même index) avec économies,
+            totaux par approche (contrôles communs déduits, montants en
+            mutualisation_<approche>) et dépassements de budget
+    """
+    n = len(profils)
+    catalogue = preparer_catalogue(referentiels)
+
+    # Économies sélectionnées
+    cles = list(economies_data.keys())
+    valeurs = np.array([economies_data[k]['economie'] for k in cles], dtype=np.int64)
+    total_economies = _comptes_economies(profils, cles) @ valeurs
+
+    # Applicabilité: secteur et infrastructure cloud
+    codes_secteur = _codes_categories(profils['secteur'].to_numpy(), catalogue['secteurs'])
+    has_cloud = _comptes_listes(profils['infrastructure'], INFRASTRUCTURES_CLOUD).any(axis=1)
+
+    # Budget
+    budget_montant = (
+        profils['budget'].map(BUDGET_LIMITES).fillna(BUDGET_DEFAUT).to_numpy(dtype=np.float64)
+    )
+
+    base = catalogue['baseCost']
+    proportion = base / COUT_REFERENCE
+    plafond = base * PLAFOND_ECONOMIES
+    maximal = base * FACTEUR_MAXIMAL
+    obligatoire = catalogue['obligatoire']
+    colonnes_obligatoires = np.flatnonzero(obligatoire)
+
+    totaux = {s: np.zeros(n) for s in STRATEGIES}
+    economies_obligatoires = np.zeros(n)
+    nb_obligatoires = np.zeros(n, dtype=np.int64)
+    nb_optionnels = np.zeros(n, dtype=np.int64)
+
+    for debut in range(0, n, taille_bloc):
+        bloc = slice(debut, min(debut + taille_bloc, n))
+
+        applicable = catalogue['table_secteurs'][codes_secteur[bloc]]
+        applicable &= ~(catalogue['cloud'] & ~has_cloud[bloc, None])
+        nb_obligatoires[bloc] = (applicable & obligatoire).sum(axis=1)
+        nb_optionnels[bloc] = (applicable & ~obligatoire).sum(axis=1)
+
+        # Coûts des obligatoires seulement: les optionnels n'entrent pas dans les totaux
+        economies = np.minimum(
+            total_economies[bloc, None] * proportion[colonnes_obligatoires],
+            plafond[colonnes_obligatoires]
+        )
+        standard = base[colonnes_obligatoires] - economies
+        minimal = standard * FACTEUR_MINIMAL
+        masque = applicable[:, colonnes_obligatoires]
+
+        # Sommes colonne par colonne, dans l'ordre du catalogue, pour
+        # reproduire exactement le sum() de generer_recommandations
+        for k, j in enumerate(colonnes_obligatoires):
+            m = masque[:, k]
+            totaux['minimal'][bloc] += np.where(m, minimal[:, k], 0.0)
+            totaux['standard'][bloc] += np.where(m, standard[:, k], 0.0)
+            totaux['maximal'][bloc] += np.where(m, maximal[j], 0.0)
+            economies_obligatoires[bloc] += np.where(m, economies[:, k], 0.0)
+
+    mutualisation = {s: np.zeros(n) for s in STRATEGIES}
+    matrice = construire_matrice_controles(referentiels, controles)
+    if matrice is not None and n:
+        mutualisation = _mutualisations(catalogue, referentiels, matrice, codes_secteur, has_cloud, total_economies)
+        for strategie in STRATEGIES:
+            totaux[strategie] -= mutualisation[strategie]
+
+    resultats = {
+        'economies_totales': total_economies,
+        'economies_obligatoires': economies_obligatoires,
+        'nb_obligatoires': nb_obligatoires,
+        'nb_optionnels': nb_optionnels,
+        'budget_montant': budget_montant
+    }
+    for strategie in STRATEGIES:
+        reste = budget_montant - totaux[strategie]
+        depasse = reste < 0
+        resultats[f'mutualisation_{strategie}'] = mutualisation[strategie]
+        resultats[f'total_{strategie}'] = totaux[strategie]
+        resultats[f'reste_{strategie}'] = np.abs(reste)
+        resultats[f'depasse_{strategie}'] = depasse
+        resultats[f'depassement_{strategie}'] = np.where(depasse, np.abs(reste), 0.0)
+
+    return pd.DataFrame(resultats, index=profils.index)
@@ -0,0 +1,309 @@
+"""
+Profilage à la demande d'un rerun de l'assistant (cProfile, tracemalloc)
+
+Réservé aux opérateurs, sans redéploiement:
+- CONFORMITE_PROFILAGE=1 profile les CONFORMITE_PROFILAGE_NB prochains
+  reruns (1 par défaut) du processus, toutes sessions confondues;
+  CONFORMITE_PROFILAGE_ETAPES=3 (ou 2,3) les limite aux étapes listées;
+- ?profilage=<jeton> dans l'URL profile les reruns de cette session, si
+  le jeton correspond à CONFORMITE_PROFILAGE_JETON (sans jeton configuré,
+  le paramètre est ignoré). &profilage_memoire=1 ajoute tracemalloc.
+
+Chaque capture écrit, dans CONFORMITE_PROFILAGE_DOSSIER, un fichier .prof
+(lisible par pstats, snakeviz...) et un résumé .txt des fonctions les plus
+coûteuses, nommés d'après l'horodatage, l'étape et l'empreinte du profil.
+Les captures les plus anciennes sont supprimées au-delà de TAILLE_MAX
+octets ou de NB_MAX_CAPTURES captures.
+"""
+
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from utils.cache import cle_canonique
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = os.environ.get('CONFORMITE_PROFILAGE', '').lower() not in ('', '0', 'false', 'non')
+NB_CAPTURES = int(os.environ.get('CONFORMITE_PROFILAGE_NB', '1'))
+JETON = os.environ.get('CONFORMITE_PROFILAGE_JETON') or None
+MEMOIRE = os.environ.get('CONFORMITE_PROFILAGE_MEMOIRE', '').lower() not in ('', '0', 'false', 'non')
+DOSSIER = Path(os.environ.get('CONFORMITE_PROFILAGE_DOSSIER')
+               or Path(__file__).resolve().parent.parent / 'profils')
+
+TAILLE_MAX = int(os.environ.get('CONFORMITE_PROFILAGE_TAILLE_MAX', 50 * 1024 * 1024))
+NB_MAX_CAPTURES = 200
+NB_LIGNES_RESUME = 30
+NB_ALLOCATIONS = 15
+EXTENSIONS = ('.prof', '.txt')
+
+_verrou_memoire = threading.Lock()
+_captures_memoire = 0
+_verrou_rotation = threading.Lock()
+_verrou_quota = threading.Lock()
+_captures_restantes = NB_CAPTURES
+
+
+def lire_etapes(valeur):
+    """
+    Étapes à profiler d'après CONFORMITE_PROFILAGE_ETAPES
+
+    Args:
+        valeur: Liste d'étapes séparées par des virgules ('' pour toutes)
+
+    Returns:
+        frozenset ou None: Numéros des étapes (None: toutes les étapes)
+    """
+    morceaux = [m.strip() for m in valeur.split(',') if m.strip()]
+    if not morceaux:
+        return None
+    etapes = set()
+    for morceau in morceaux:
+        if morceau.isdigit():
+            etapes.add(int(morceau))
+        else:
+            logger.warning("CONFORMITE_PROFILAGE_ETAPES: %r ignoré (attendu: numéros d'étapes, ex. 2,3)", morceau)
+    return frozenset(etapes)
+
+
+ETAPES = lire_etapes(os.environ.get('CONFORMITE_PROFILAGE_ETAPES', ''))
+
+
+def etape_demandee(etape, active=ACTIVE, etapes=ETAPES):
+    """
+    Indique si les variables d'environnement demandent le profilage de cette étape
+
+    Args:
+        etape: Étape du rerun (1, 2 ou 3)
+        active: Valeur de CONFORMITE_PROFILAGE (interrupteur)
+        etapes: Étapes retenues (lire_etapes), None pour toutes
+    """
+    return active and (etapes is None or etape in etapes)
+
+
+def reserver_capture():
+    """
+    Consomme une capture du quota CONFORMITE_PROFILAGE_NB
+
+    Returns:
+        bool: False si le quota du processus est épuisé
+    """
+    global _captures_restantes
+    with _verrou_quota:
+        if _captures_restantes <= 0:
+            return False
+        _captures_restantes -= 1
+        if _captures_restantes == 0:
+            logger.info("Dernière capture de CONFORMITE_PROFILAGE_NB: redémarrer pour en refaire")
+        return True
+
+
+def jeton_valide(parametre, jeton=JETON):
+    """Compare le paramètre d'URL au jeton configuré (temps constant)"""
+    if not jeton or not parametre:
+        return False
+    return hmac.compare_digest(str(parametre).encode('utf-8'), jeton.encode('utf-8'))
+
+
+def empreinte_profil(profil, economies=0):
+    """
+    Empreinte courte du profil et des économies: regroupe les captures d'un même scénario
+
+    Args:
+        profil: Profil encodé de la session (ProfilCode ou None)
+        economies: Masque des économies cochées
+    """
+    return cle_canonique(profil, economies)[:12]
+
+
+def _activer_memoire():
+    """Démarre tracemalloc (partagé entre sessions); retourne True si la capture le suit"""
+    global _captures_memoire
+    with _verrou_memoire:
+        if _captures_memoire == 0 and tracemalloc.is_tracing():
+            # Démarré par ailleurs (python -X tracemalloc): on ne l'arrêtera pas
+            return False
+        if _captures_memoire == 0:
+            tracemalloc.start()
+        _captures_memoire += 1
+        tracemalloc.reset_peak()
+        return True
+
+
+def _desactiver_memoire():
+    global _captures_memoire
+    with _verrou_memoire:
+        _captures_memoire -= 1
+        if _captures_memoire == 0:
+            tracemalloc.stop()
+
+
+class Capture:
+    """
+    Profilage d'un rerun, de demarrer() à terminer()
+
+    terminer() est idempotent: l'appeler avant st.rerun() puis en fin de
+    script n'écrit qu'une capture.
+    """
+
+    def __init__(self, etape, empreinte, memoire=False, dossier=DOSSIER):
+        self.etape = etape
+        self.empreinte = empreinte
+        self.memoire = memoire
+        self.dossier = Path(dossier)
+        self.profileur = cProfile.Profile()
+        self.debut = None
+        self.active = False
+        self.memoire_suivie = False
+
+    def demarrer(self):
+        try:
+            self.profileur.enable()
+        except ValueError as e:
+            # Un autre profileur est déjà actif dans ce thread
+            logger.warning("Profilage impossible: %s", e)
+            return self
+        if self.memoire:
+            self.memoire_suivie = _activer_memoire()
+        self.debut = time.perf_counter()
+        self.active = True
+        return self
+
+    def terminer(self):
+        """
+        Arrête le profilage et écrit la capture
+
+        Returns:
+            Path ou None: Chemin du fichier .prof écrit
+        """
+        if not self.active:
+            return None
+        self.active = False
+        self.profileur.disable()
+        duree = time.perf_counter() - self.debut
+
+        instantane = None
+        pic = None
+        if self.memoire_suivie:
+            instantane = tracemalloc.take_snapshot()
+            pic = tracemalloc.get_traced_memory()[1]
+            _desactiver_memoire()
+
+        try:
+            return self._ecrire(duree, instantane, pic)
+        except OSError as e:
+            logger.warning("Écriture du profil impossible: %s", e)
+            return None
+
+    def _ecrire(self, duree, instantane, pic):
+        self.dossier.mkdir(parents=True, exist_ok=True)
+        nom = f"{datetime.now():%Y%m%dT%H%M%S_%f}_etape{self.etape}_{self.empreinte}"
+        chemin_prof = self.dossier / f"{nom}.prof"
+        self.profileur.dump_stats(chemin_prof)
+        (self.dossier / f"{nom}.txt").write_text(
+            resumer(self.profileur, self.etape, self.empreinte, duree, instantane, pic),
+            encoding='utf-8'
+        )
+        pivoter(self.dossier)
+        return chemin_prof
+
+    def __enter__(self):
+        return self.demarrer()
+
+    def __exit__(self, *exc):
+        self.terminer()
+        return False
+
+
+def resumer(profileur, etape, empreinte, duree, instantane=None, pic=None, nb_lignes=NB_LIGNES_RESUME):
+    """
+    Résumé texte d'une capture
+
+    Returns:
+        str: En-tête, fonctions triées par temps cumulé puis par temps propre,
+             et principales allocations si tracemalloc était actif
+    """
+    sortie = io.StringIO()
+    sortie.write(f"Étape: {etape}\nProfil: {empreinte}\nDurée: {duree * 1000:.1f} ms\n")
+    if pic is not None:
+        sortie.write(f"Pic mémoire: {pic / 1024:.0f} Ko\n")
+
+    for tri, titre in (('cumulative', "temps cumulé"), ('tottime', "temps propre")):
+        sortie.write(f"\n===== {nb_lignes} premières fonctions par {titre} =====\n")
+        pstats.Stats(profileur, stream=sortie).strip_dirs().sort_stats(tri).print_stats(nb_lignes)
+
+    if instantane is not None:
+        sortie.write(f"\n===== {NB_ALLOCATIONS} principales allocations =====\n")
+        for statistique in instantane.statistics('lineno')[:NB_ALLOCATIONS]:
+            sortie.write(f"{statistique}\n")
+    return sortie.getvalue()
+
+
+def pivoter(dossier=DOSSIER, taille_max=TAILLE_MAX, nb_max=NB_MAX_CAPTURES):
+    """
+    Supprime les captures les plus anciennes (.prof et .txt ensemble)
+    jusqu'à respecter la taille totale et le nombre maximal de captures
+
+    Returns:
+        int: Nombre de captures supprimées
+    """
+    with _verrou_rotation:
+        captures = {}
+        for fichier in Path(dossier).iterdir():
+            if fichier.suffix in EXTENSIONS and fichier.is_file():
+                captures.setdefault(fichier.stem, []).append(fichier)
+
+        # Les noms commencent par l'horodatage: l'ordre alphabétique est chronologique
+        tailles = {stem: sum(f.stat().st_size for f in fichiers) for stem, fichiers in captures.items()}
+        total = sum(tailles.values())
+        supprimees = 0
+        for stem in sorted(captures):
+            if total <= taille_max and len(captures) - supprimees <= nb_max:
+                break
+            for fichier in captures[stem]:
+                fichier.unlink(missing_ok=True)
+            total -= tailles[stem]
+            supprimees += 1
+        return supprimees
+
+
+def capture_demandee(etape, parametres):
+    """
+    Args:
+        etape: Étape du rerun
+        parametres: Paramètres d'URL (st.query_params)
+
+    Returns:
+        tuple: (profiler, avec tracemalloc)
+    """
+    if jeton_valide(parametres.get('profilage')):
+        return True, MEMOIRE or parametres.get('profilage_memoire') == '1'
+    return etape_demandee(etape) and reserver_capture(), MEMOIRE
+
+
+def demarrer_capture(etape, parametres, profil=None, economies=0):
+    """
+    Démarre la capture du rerun courant si elle est demandée
+
+    Returns:
+        Capture ou None: À terminer en fin de rerun (et avant st.rerun())
+    """
+    profiler, memoire = capture_demandee(etape, parametres)
+    if not profiler:
+        return None
+    return Capture(etape, empreinte_profil(profil, economies), memoire).demarrer()
+
+
+def terminer_capture(capture):
+    """Termine la capture si elle existe (sans effet sinon)"""
+    if capture is not None:
+        return capture.terminer()
+    return None
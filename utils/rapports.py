@@ -0,0 +1,183 @@
+"""
+File de génération des rapports PDF en arrière-plan (pool de processus)
+"""
+
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.pdf_export import CACHE_PDF, cle_rapport, generer_pdf_rapport
+
+EN_FILE = 'en_file'
+EN_COURS = 'en_cours'
+PRET = 'pret'
+ERREUR = 'erreur'
+INCONNU = 'inconnu'
+
+
+def _reussi(future):
+    return future.done() and not future.cancelled() and future.exception() is None
+
+
+class FileRapportsPleine(Exception):
+    """Trop de rapports en attente: la demande doit être refaite plus tard"""
+
+
+class GestionnaireRapports:
+    """
+    Soumet les rapports à un pool de processus borné et suit leur état
+
+    Le rendu PDF se fait hors du thread de la session Streamlit: soumettre()
+    retourne immédiatement un identifiant que l'interface interroge ensuite.
+    Au-delà de profondeur_max rapports non terminés, les nouvelles demandes
+    sont refusées (FileRapportsPleine) au lieu de s'accumuler. Un travail
+    terminé garde son PDF jusqu'à oublier() (téléchargé) ou au plus
+    conservation secondes après la fin; la purge a lieu à chaque appel.
+    """
+
+    def __init__(self, workers=2, profondeur_max=32, conservation=600):
+        self.workers = workers
+        self.profondeur_max = profondeur_max
+        self.conservation = conservation
+        self._pool = None
+        self._travaux = {}
+        self._verrou = threading.Lock()
+
+    def _executeur(self):
+        if self._pool is None:
+            # spawn: ne pas dupliquer par fork les threads du serveur Streamlit
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
+
+    def _purger(self, maintenant):
+        expires = [
+            job_id for job_id, travail in self._travaux.items()
+            if travail['termine'] is not None and maintenant - travail['termine'] > self.conservation
+        ]
+        for job_id in expires:
+            del self._travaux[job_id]
+
+    def _terminer(self, job_id):
+        with self._verrou:
+            travail = self._travaux.get(job_id)
+            if travail is not None:
+                travail['termine'] = time.monotonic()
+
+    def profondeur(self):
+        """Nombre de rapports soumis et pas encore terminés"""
+        with self._verrou:
+            self._purger(time.monotonic())
+            return sum(
+                1 for t in self._travaux.values()
+                if t['future'] is not None and not t['future'].done()
+            )
+
+    def soumettre(self, profil, recommandations, economies_totales):
+        """
+        Demande la génération d'un rapport
+
+        Returns:
+            str: Identifiant du travail
+
+        Raises:
+            FileRapportsPleine: si la file d'attente est pleine
+        """
+        cle = cle_rapport(profil, recommandations, economies_totales)
+        job_id = uuid.uuid4().hex
+        maintenant = time.monotonic()
+
+        with self._verrou:
+            self._purger(maintenant)
+
+            # Scénario déjà rendu: travail terminé d'emblée, avec son contenu
+            # (le cache peut l'évincer avant le téléchargement)
+            contenu = CACHE_PDF.obtenir(cle)
+            if contenu is not None:
+                self._travaux[job_id] = {
+                    'future': None, 'contenu': contenu, 'soumis': maintenant, 'termine': maintenant
+                }
+                return job_id
+
+            en_attente = sum(
+                1 for t in self._travaux.values()
+                if t['future'] is not None and not t['future'].done()
+            )
+            if en_attente >= self.profondeur_max:
+                raise FileRapportsPleine(
+                    f"{en_attente} rapports en attente (maximum {self.profondeur_max})"
+                )
+
+            future = self._executeur().submit(generer_pdf_rapport, profil, recommandations, economies_totales)
+            self._travaux[job_id] = {'future': future, 'contenu': None, 'soumis': maintenant, 'termine': None}
+
+        def _stocker(f):
+            # Rendu dans un processus du pool (qui a son propre CACHE_PDF):
+            # les octets sont rangés dans le cache de ce processus-ci
+            if _reussi(f):
+                CACHE_PDF.definir(cle, f.result())
+            self._terminer(job_id)
+
+        future.add_done_callback(_stocker)
+        return job_id
+
+    def statut(self, job_id):
+        """
+        Returns:
+            dict: etat (en_file, en_cours, pret, erreur, inconnu),
+                position dans la file et secondes écoulées
+        """
+        with self._verrou:
+            self._purger(time.monotonic())
+            travail = self._travaux.get(job_id)
+            if travail is None:
+                return {'etat': INCONNU, 'position': 0, 'ecoule': 0.0}
+
+            future = travail['future']
+            ecoule = time.monotonic() - travail['soumis']
+            if future is None or _reussi(future):
+                etat = PRET
+            elif future.done():
+                etat = ERREUR
+            elif future.running():
+                etat = EN_COURS
+            else:
+                etat = EN_FILE
+
+            position = 0
+            if etat == EN_FILE:
+                position = sum(
+                    1 for t in self._travaux.values()
+                    if t['future'] is not None and not t['future'].done()
+                    and t['soumis'] < travail['soumis']
+                )
+            return {'etat': etat, 'position': position, 'ecoule': ecoule}
+
+    def resultat(self, job_id):
+        """
+        Returns:
+            bytes | None: Contenu du PDF si le rapport est prêt
+        """
+        with self._verrou:
+            self._purger(time.monotonic())
+            travail = self._travaux.get(job_id)
+        if travail is None:
+            return None
+        future = travail['future']
+        if future is not None:
+            return future.result() if _reussi(future) else None
+        return travail['contenu']
+
+    def oublier(self, job_id):
+        """Libère un travail et son PDF (rapport téléchargé)"""
+        with self._verrou:
+            self._travaux.pop(job_id, None)
+
+    def arreter(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,200 @@
+"""
+Graphe de calcul réactif des valeurs dérivées de l'assistant
+
+Chaque nœud déclare ses entrées (sources ou autres nœuds) et n'est
+recalculé que si l'une d'elles a changé depuis son dernier calcul. Les
+valeurs sont tirées à la demande: un rerun qui ne lit pas un nœud ne le
+calcule pas. Un nœud recalculé à l'identique (==) ne propage pas le
+changement à ses dépendants.
+
+Le graphe des recommandations (graphe_recommandations) découpe ainsi
+l'étape 3: changer le chiffre d'affaires ne recalcule que les pénalités,
+changer le budget que les nœuds qui en dépendent. Les nœuds exécutés
+pendant une passe sont listés dans executes, journalisés (DEBUG) et
+comptés dans la métrique noeuds_reactifs_total.
+"""
+
+import logging
+import threading
+
+from utils import metriques
+from utils.calculations import (
+    BUDGET_DEFAUT,
+    BUDGET_LIMITES,
+    calculer_penalites,
+    calculer_recommandations_en_cache,
+    optimiser_optionnels_par_strategie
+)
+from utils.simulation import simuler_recommandations_en_cache
+
+logger = logging.getLogger(__name__)
+
+SOURCES_RECOMMANDATIONS = ('catalogue', 'secteur', 'infrastructure', 'budget', 'ca_annuel', 'economies')
+
+
+class _Noeud:
+    __slots__ = ('fonction', 'entrees', 'valeur', 'version', 'versions_entrees', 'verifie')
+
+    def __init__(self, fonction, entrees):
+        self.fonction = fonction
+        self.entrees = entrees
+        self.valeur = None
+        self.version = 0          # génération du dernier changement de valeur (0: jamais calculé)
+        self.versions_entrees = None
+        self.verifie = -1         # génération à laquelle le nœud a été vérifié
+
+
+class Graphe:
+    """
+    Sources et nœuds dérivés, recalculés à la demande
+
+    Sûr entre threads (un verrou par graphe); un graphe par session.
+    """
+
+    def __init__(self, nom='graphe'):
+        self.nom = nom
+        self._noeuds = {}
+        self._generation = 1
+        self._verrou = threading.RLock()
+        self.executes = []
+
+    def source(self, nom, valeur=None):
+        """Déclare une valeur d'entrée"""
+        noeud = self._noeuds[nom] = _Noeud(None, ())
+        noeud.valeur = valeur
+        noeud.version = self._generation
+        return self
+
+    def noeud(self, nom, fonction, *entrees):
+        """
+        Déclare un nœud dérivé
+
+        Args:
+            nom: Nom du nœud
+            fonction: Calcul, appelé avec les valeurs des entrées dans l'ordre
+            entrees: Noms des sources ou nœuds déjà déclarés
+
+        Raises:
+            KeyError: si une entrée n'est pas déclarée
+        """
+        for entree in entrees:
+            if entree not in self._noeuds:
+                raise KeyError(f"Entrée inconnue pour le nœud '{nom}': {entree}")
+        self._noeuds[nom] = _Noeud(fonction, entrees)
+        return self
+
+    def definir(self, nom, valeur):
+        """
+        Met à jour une source
+
+        Returns:
+            bool: True si la valeur a changé (les dépendants seront recalculés)
+        """
+        with self._verrou:
+            noeud = self._noeuds[nom]
+            if noeud.fonction is not None:
+                raise ValueError(f"'{nom}' est un nœud dérivé, pas une source")
+            if noeud.valeur is valeur or noeud.valeur == valeur:
+                return False
+            self._generation += 1
+            noeud.valeur = valeur
+            noeud.version = self._generation
+            return True
+
+    def definir_sources(self, **valeurs):
+        """Met à jour plusieurs sources; renvoie les noms de celles qui ont changé"""
+        return [nom for nom, valeur in valeurs.items() if self.definir(nom, valeur)]
+
+    def nouvelle_passe(self):
+        """Début d'un rerun: vide la liste des nœuds exécutés"""
+        with self._verrou:
+            self.executes = []
+
+    def _actualiser(self, nom):
+        noeud = self._noeuds[nom]
+        if noeud.fonction is None or noeud.verifie == self._generation:
+            return noeud
+
+        entrees = [self._actualiser(entree) for entree in noeud.entrees]
+        versions = tuple(entree.version for entree in entrees)
+        if versions != noeud.versions_entrees:
+            valeur = noeud.fonction(*(entree.valeur for entree in entrees))
+            self.executes.append(nom)
+            metriques.incrementer('noeuds_reactifs_total', graphe=self.nom, noeud=nom)
+            if noeud.version == 0 or not (valeur is noeud.valeur or valeur == noeud.valeur):
+                noeud.valeur = valeur
+                noeud.version = self._generation
+            noeud.versions_entrees = versions
+        noeud.verifie = self._generation
+        return noeud
+
+    def valeur(self, nom):
+        """Valeur d'une source ou d'un nœud, recalculé au besoin avec ses entrées"""
+        with self._verrou:
+            nb_executes = len(self.executes)
+            valeur = self._actualiser(nom).valeur
+            if len(self.executes) > nb_executes:
+                logger.debug("%s: %s -> nœuds recalculés %s", self.nom, nom, self.executes[nb_executes:])
+            return valeur
+
+    def valeurs_retenues(self):
+        """Valeurs des nœuds dérivés (mesure mémoire, voir utils.session.taille_objet)"""
+        with self._verrou:
+            return [noeud.valeur for noeud in self._noeuds.values() if noeud.fonction is not None]
+
+    def statistiques(self):
+        """
+        Returns:
+            dict: Nombre de nœuds, sources, génération et nœuds exécutés pendant la passe
+        """
+        with self._verrou:
+            return {
+                'noeuds': len(self._noeuds),
+                'sources': sum(1 for n in self._noeuds.values() if n.fonction is None),
+                'generation': self._generation,
+                'executes': list(self.executes)
+            }
+
+
+def _recommandations(catalogue, secteur, infrastructure, budget, economies):
+    # Cache partagé entre sessions: un même scénario n'est calculé qu'une fois
+    profil = {'secteur': secteur, 'infrastructure': sorted(infrastructure), 'budget': budget}
+    return calculer_recommandations_en_cache(
+        catalogue.data, profil, list(economies), catalogue.version, catalogue.index
+    )
+
+
+def _graphique(totaux, montant_budget, simulation):
+    bandes = tuple(
+        (simulation[s]['p10'], simulation[s]['p90'], simulation[s]['prob_depassement'])
+        for s in ('minimal', 'standard', 'maximal')
+    )
+    return (totaux.minimal, totaux.standard, totaux.maximal), montant_budget, bandes
+
+
+def graphe_recommandations():
+    """
+    Graphe des valeurs dérivées de l'étape 3
+
+    Sources: SOURCES_RECOMMANDATIONS (instantané du catalogue, champs du
+    profil, clés des économies cochées). Le nœud 'recommandations' passe
+    par calculer_recommandations_en_cache: les sessions d'un même scénario
+    partagent le résultat.
+
+    Returns:
+        Graphe
+    """
+    graphe = Graphe('recommandations')
+    for source in SOURCES_RECOMMANDATIONS:
+        graphe.source(source)
+    return (
+        graphe
+        .noeud('recommandations', _recommandations, 'catalogue', 'secteur', 'infrastructure', 'budget', 'economies')
+        .noeud('totaux', lambda recommandations: recommandations.totaux, 'recommandations')
+        .noeud('montant_budget', lambda budget: BUDGET_LIMITES.get(budget, BUDGET_DEFAUT), 'budget')
+        .noeud('penalites', lambda ca_annuel, totaux: calculer_penalites(ca_annuel, totaux.standard),
+               'ca_annuel', 'totaux')
+        .noeud('simulation', simuler_recommandations_en_cache, 'recommandations')
+        .noeud('graphique', _graphique, 'totaux', 'montant_budget', 'simulation')
+        .noeud('optionnels_budget', optimiser_optionnels_par_strategie, 'recommandations')
+    )
@@ -0,0 +1,58 @@
+"""
+Calendriers d'implémentation par approche (Économique / Recommandée / Premium)
+"""
+
+from datetime import datetime
+
+ROADMAPS = {
+    'minimal': {
+        'libelle': "💰 Économique (9-12 mois)",
+        'duree_mois': 12,
+        'phases': [
+            {"mois": "1-2", "titre": "📋 Analyse GAP interne", "taches": ["Auto-évaluation complète", "Identification écarts Loi 25", "Priorisation actions"]},
+            {"mois": "3-5", "titre": "📝 Documentation & Politiques", "taches": ["Rédaction politiques (templates CAI)", "Registre des traitements", "Procédures internes"]},
+            {"mois": "6-8", "titre": "🔒 Mise en conformité technique", "taches": ["Implémentation contrôles techniques", "Formation équipe interne", "Outils gratuits (Excel)"]},
+            {"mois": "9-10", "titre": "✅ ÉFVP & Tests", "taches": ["ÉFVP simplifiées (2 processus)", "Tests auto-vérification", "Corrections"]},
+            {"mois": "11-12", "titre": "🎯 Finalisation", "taches": ["Revue finale interne", "Documentation complète", "Plan amélioration continue"]}
+        ]
+    },
+    'standard': {
+        'libelle': "⭐ Recommandée (6-9 mois)",
+        'duree_mois': 9,
+        'phases': [
+            {"mois": "1", "titre": "📋 GAP Analysis (Consultant)", "taches": ["Audit externe complet", "Rapport d'écarts détaillé", "Plan d'action priorisé"]},
+            {"mois": "2-3", "titre": "📝 Documentation & Gouvernance", "taches": ["Politiques professionnelles", "Registre traitements complet", "Formation équipe (mixte)"]},
+            {"mois": "4-5", "titre": "🔒 Implémentation technique", "taches": ["Outils conformité standards", "Contrôles de sécurité", "Intégration processus"]},
+            {"mois": "6-7", "titre": "✅ ÉFVP & Validation", "taches": ["ÉFVP 2-3 processus critiques", "Support consultant ponctuel", "Ajustements"]},
+            {"mois": "8-9", "titre": "🎯 Audit & Certification", "taches": ["Revue finale consultant", "Corrections dernière minute", "Attestation conformité"]}
+        ]
+    },
+    'maximal': {
+        'libelle': "🏆 Premium (3-6 mois)",
+        'duree_mois': 6,
+        'phases': [
+            {"mois": "1", "titre": "📋 Audit Complet (Seniors)", "taches": ["Analyse exhaustive multi-consultants", "Rapport exécutif détaillé", "Roadmap personnalisée"]},
+            {"mois": "2", "titre": "📝 Documentation Premium", "taches": ["Politiques sur mesure", "Formation présentielle complète", "Outils premium automatisés"]},
+            {"mois": "3-4", "titre": "🔒 Implémentation Accélérée", "taches": ["Équipe consultants dédiée", "Mise en place tous contrôles", "Support quotidien"]},
+            {"mois": "5", "titre": "✅ ÉFVP Approfondies", "taches": ["ÉFVP tous processus", "Tests exhaustifs", "Optimisations"]},
+            {"mois": "6", "titre": "🏆 Certification & Support", "taches": ["Audit externe certifié", "Certification officielle", "Support 12 mois inclus"]}
+        ]
+    }
+}
+
+
+def date_fin_prevue(duree_mois, depuis=None):
+    """
+    Calcule le mois de fin prévu d'une roadmap
+
+    Args:
+        duree_mois: Durée de la roadmap en mois
+        depuis: Date de départ (aujourd'hui par défaut)
+
+    Returns:
+        str: Mois/année de fin, ex. "7/2027"
+    """
+    depuis = depuis or datetime.now()
+    mois = (depuis.month + duree_mois) % 12 or 12
+    annee = depuis.year + (depuis.month + duree_mois - 1) // 12
+    return f"{mois}/{annee}"
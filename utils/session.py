@@ -0,0 +1,320 @@
+"""
+État de session compact et budget mémoire des sessions
+
+Le profil saisi à l'étape 1 est conservé sous forme encodée (ProfilCode:
+rangs dans les énumérations ci-dessous et masque des infrastructures), les
+économies sous forme de masque (SelectionEconomies). Les données dérivées
+d'une session (recommandations, classeur Excel...) sont tenues hors de
+st.session_state, dans un RegistreSessions partagé qui mesure leur taille
+et les libère pour les sessions inactives ou au-delà du budget mémoire:
+une session évincée les recalcule simplement à son prochain rerun. Les
+valeurs qu'elle ne fait que référencer dans les caches partagés
+(CACHE_RECOMMANDATIONS...) ne lui sont pas imputées.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from utils.calculations import cles_selectionnees, selection_economies
+from utils.modeles import ProfilCode, Referentiel
+
+SECTEURS = ('health', 'finance', 'public', 'tech', 'retail', 'other')
+TAILLES = ('micro', 'small', 'medium', 'large')
+BUDGETS = ('low', 'medium', 'high')
+MATURITES = ('initial', 'managed', 'defined', 'optimized')
+INFRASTRUCTURES = ('onprem', 'cloud', 'hybrid')
+
+BUDGET_MEMOIRE = int(os.environ.get('CONFORMITE_BUDGET_SESSIONS_MO', '256')) * 1024 * 1024
+DELAI_INACTIVITE = float(os.environ.get('CONFORMITE_INACTIVITE_SESSIONS', '900'))  # secondes
+DELAI_EXPIRATION = 6 * 3600  # au-delà, la session est oubliée du registre
+
+
+def _rang(valeur, enumeration, champ):
+    try:
+        return enumeration.index(valeur)
+    except ValueError:
+        raise ValueError(f"Valeur inconnue pour {champ}: {valeur!r}") from None
+
+
+def encoder_profil(profil):
+    """
+    Encode un profil complet de l'étape 1
+
+    Args:
+        profil: Dictionnaire secteur, taille, budget, maturite, infrastructure, ca_annuel
+
+    Returns:
+        ProfilCode ou None: None pour un profil vide
+
+    Raises:
+        ValueError: si une valeur n'appartient pas à son énumération
+    """
+    if not profil:
+        return None
+    infrastructure = 0
+    for valeur in profil.get('infrastructure', ()):
+        infrastructure |= 1 << _rang(valeur, INFRASTRUCTURES, 'infrastructure')
+    return ProfilCode(
+        _rang(profil['secteur'], SECTEURS, 'secteur'),
+        _rang(profil['taille'], TAILLES, 'taille'),
+        _rang(profil['budget'], BUDGETS, 'budget'),
+        _rang(profil['maturite'], MATURITES, 'maturite'),
+        infrastructure,
+        profil.get('ca_annuel', 0) or 0
+    )
+
+
+def decoder_profil(code):
+    """
+    Reconstitue le dictionnaire attendu par les calculs
+
+    Returns:
+        dict: Profil (vide si code est None); infrastructures dans l'ordre de INFRASTRUCTURES
+    """
+    if code is None:
+        return {}
+    return {
+        'secteur': SECTEURS[code.secteur],
+        'taille': TAILLES[code.taille],
+        'budget': BUDGETS[code.budget],
+        'maturite': MATURITES[code.maturite],
+        'infrastructure': [v for i, v in enumerate(INFRASTRUCTURES) if code.infrastructure >> i & 1],
+        'ca_annuel': code.ca_annuel
+    }
+
+
+def migrer_selection(selection, anciennes_cles, index):
+    """
+    Reporte une sélection d'économies sur un nouvel index (catalogue rechargé)
+
+    Args:
+        selection: SelectionEconomies construite sur l'ancien index
+        anciennes_cles: Clés de l'ancien index (index['cles'], partagé entre sessions)
+        index: Nouvel index des économies
+
+    Returns:
+        SelectionEconomies: Mêmes clés cochées, celles qui ont disparu en moins
+    """
+    return selection_economies(index, cles_selectionnees(selection, {'cles': anciennes_cles}))
+
+
+def taille_objet(valeur, exclure=()):
+    """
+    Estimation de la mémoire retenue par une valeur (octets)
+
+    Parcourt conteneurs et enregistrements, ainsi que les objets qui
+    exposent valeurs_retenues() (graphe réactif: valeurs de ses nœuds);
+    les référentiels du catalogue et les objets de exclure, partagés entre
+    toutes les sessions, ne sont pas comptés.
+    """
+    vus = {id(objet) for objet in exclure}
+
+    def taille(objet):
+        if id(objet) in vus or isinstance(objet, Referentiel):
+            return 0
+        vus.add(id(objet))
+        total = sys.getsizeof(objet)
+        if isinstance(objet, dict):
+            total += sum(taille(k) + taille(v) for k, v in objet.items())
+        elif isinstance(objet, (list, tuple, set, frozenset)):
+            total += sum(taille(v) for v in objet)
+        elif hasattr(objet, 'valeurs_retenues'):
+            total += sum(taille(v) for v in objet.valeurs_retenues())
+        return total
+
+    return taille(valeur)
+
+
+class _Session:
+    __slots__ = ('derniere_activite', 'taille_etat', 'derivees', 'octets')
+
+    def __init__(self, maintenant):
+        self.derniere_activite = maintenant
+        self.taille_etat = 0
+        self.derivees = {}  # nom -> (scenario, valeur, octets)
+        self.octets = 0
+
+
+class RegistreSessions:
+    """
+    Données dérivées par session, avec comptabilité mémoire et éviction
+
+    Deux files dans l'ordre de la dernière activité (toutes les sessions,
+    et celles qui retiennent des données dérivées): les inactives sont en
+    tête, si bien que chaque nettoyage s'arrête à la première session
+    active et ne parcourt que ce qu'il libère. Sûr entre threads.
+
+    Les valeurs présentes dans les caches de partages (et leurs champs
+    directs) sont exclues des mesures: elles sont bornées par ces caches
+    et l'éviction d'une session ne les libère pas.
+    """
+
+    def __init__(self, budget_octets=BUDGET_MEMOIRE, delai_inactivite=DELAI_INACTIVITE,
+                 delai_expiration=DELAI_EXPIRATION, horloge=time.monotonic, partages=()):
+        self.budget_octets = budget_octets
+        self.delai_inactivite = delai_inactivite
+        self.delai_expiration = delai_expiration
+        self.partages = tuple(partages)
+        self._horloge = horloge
+        self._verrou = threading.Lock()
+        self._sessions = OrderedDict()
+        self._avec_derivees = OrderedDict()
+        self.octets = 0
+        self.evictions = 0
+
+    def _mesurer(self, valeur):
+        partagees = [v for cache in self.partages for v in cache.valeurs()]
+        # Champs directs aussi: le nœud 'totaux' du graphe est recommandations.totaux
+        champs = [champ for v in partagees if isinstance(v, tuple) for champ in v]
+        return taille_objet(valeur, exclure=partagees + champs)
+
+    def _session(self, id_session, maintenant):
+        session = self._sessions.get(id_session)
+        if session is None:
+            session = self._sessions[id_session] = _Session(maintenant)
+        else:
+            session.derniere_activite = maintenant
+            self._sessions.move_to_end(id_session)
+            if id_session in self._avec_derivees:
+                self._avec_derivees.move_to_end(id_session)
+        return session
+
+    def _liberer(self, id_session, session):
+        self.octets -= session.octets
+        session.derivees = {}
+        session.octets = 0
+        self._avec_derivees.pop(id_session, None)
+
+    def _nettoyer(self, maintenant):
+        # Données dérivées des sessions inactives, puis au-delà du budget
+        # celles des sessions les moins récemment actives
+        while self._avec_derivees:
+            id_session = next(iter(self._avec_derivees))
+            session = self._sessions[id_session]
+            if (maintenant - session.derniere_activite < self.delai_inactivite
+                    and self.octets <= self.budget_octets):
+                break
+            self._liberer(id_session, session)
+            self.evictions += 1
+
+        # Sessions expirées: oubliées du registre
+        while self._sessions:
+            id_session = next(iter(self._sessions))
+            if maintenant - self._sessions[id_session].derniere_activite < self.delai_expiration:
+                break
+            self._liberer(id_session, self._sessions.pop(id_session))
+
+    def toucher(self, id_session, taille_etat=None):
+        """
+        Signale un rerun de la session (et la taille de son état, si mesurée)
+        """
+        maintenant = self._horloge()
+        with self._verrou:
+            session = self._session(id_session, maintenant)
+            if taille_etat is not None:
+                session.taille_etat = taille_etat
+            self._nettoyer(maintenant)
+
+    def derivee(self, id_session, scenario, nom, fonction, *args):
+        """
+        Donnée dérivée de la session, recalculée si le scénario a changé
+
+        Args:
+            id_session: Identifiant de la session
+            scenario: Clé hachable de ce dont dépend la donnée (version, profil, masque)
+            nom: Nom de la donnée ('recommandations', 'excel'...)
+            fonction: Calcul à exécuter en cas d'absence
+
+        Returns:
+            Valeur retenue ou calculée
+        """
+        with self._verrou:
+            session = self._session(id_session, self._horloge())
+            entree = session.derivees.get(nom)
+            if entree is not None and entree[0] == scenario:
+                return entree[1]
+
+        valeur = fonction(*args)
+        octets = self._mesurer(valeur)
+
+        with self._verrou:
+            session = self._session(id_session, self._horloge())
+            precedente = session.derivees.get(nom)
+            if precedente is not None:
+                session.octets -= precedente[2]
+                self.octets -= precedente[2]
+            session.derivees[nom] = (scenario, valeur, octets)
+            session.octets += octets
+            self.octets += octets
+            self._avec_derivees[id_session] = None
+            self._avec_derivees.move_to_end(id_session)
+            self._nettoyer(self._horloge())
+        return valeur
+
+    def remesurer(self, id_session, nom):
+        """
+        Met à jour la taille d'une donnée dérivée qui a grossi en place
+        (graphe réactif après une évaluation) et applique le budget mémoire
+
+        Args:
+            id_session: Identifiant de la session
+            nom: Nom de la donnée
+        """
+        with self._verrou:
+            session = self._sessions.get(id_session)
+            entree = session.derivees.get(nom) if session is not None else None
+            if entree is None:
+                return
+            scenario, valeur, precedents = entree
+        octets = self._mesurer(valeur)
+
+        with self._verrou:
+            # La donnée a pu être libérée ou remplacée pendant la mesure
+            if session.derivees.get(nom) is not entree:
+                return
+            session.derivees[nom] = (scenario, valeur, octets)
+            session.octets += octets - precedents
+            self.octets += octets - precedents
+            self._nettoyer(self._horloge())
+
+    def liberer(self, id_session, noms=None):
+        """
+        Libère les données dérivées d'une session (nouvelle analyse)
+
+        Args:
+            id_session: Identifiant de la session
+            noms: Données à libérer (toutes par défaut)
+        """
+        with self._verrou:
+            session = self._sessions.get(id_session)
+            if session is None:
+                return
+            if noms is None:
+                self._liberer(id_session, session)
+                return
+            for nom in noms:
+                entree = session.derivees.pop(nom, None)
+                if entree is not None:
+                    session.octets -= entree[2]
+                    self.octets -= entree[2]
+            if not session.derivees:
+                self._avec_derivees.pop(id_session, None)
+
+    def statistiques(self):
+        """
+        Returns:
+            dict: sessions, sessions avec données dérivées, octets dérivés,
+                  octets d'état (somme des tailles signalées), évictions
+        """
+        with self._verrou:
+            return {
+                'sessions': len(self._sessions),
+                'sessions_derivees': len(self._avec_derivees),
+                'octets_derives': self.octets,
+                'octets_etat': sum(s.taille_etat for s in self._sessions.values()),
+                'budget_octets': self.budget_octets,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,137 @@
+"""
+Simulation Monte-Carlo de l'incertitude sur les coûts de conformité
+
+Le coût de base de chaque référentiel et les facteurs du modèle de coûts
+(FACTEUR_MINIMAL, FACTEUR_MAXIMAL, PLAFOND_ECONOMIES) sont tirés selon des
+distributions configurables. Tous les tirages d'un référentiel sont
+calculés d'un bloc en tableaux NumPy: aucune boucle Python sur les tirages.
+"""
+
+import numpy as np
+
+from utils.cache import CacheLRU, cle_canonique
+from utils.calculations import COUT_REFERENCE, STRATEGIES
+
+NB_TIRAGES = 100000
+GRAINE = 2024
+QUANTILES = (10, 50, 90)
+
+# (loi, paramètres): triangulaire (min, mode, max), uniforme (min, max),
+# normale (moyenne, écart-type). 'baseCost' est un multiplicateur du coût
+# de base, tiré indépendamment pour chaque référentiel.
+DISTRIBUTIONS_DEFAUT = {
+    'baseCost': ('triangulaire', 0.85, 1.0, 1.40),
+    'facteur_minimal': ('triangulaire', 0.35, 0.45, 0.60),
+    'facteur_maximal': ('triangulaire', 1.05, 1.15, 1.35),
+    'plafond_economies': ('triangulaire', 0.50, 0.65, 0.75)
+}
+
+# Résultats de simulation, par scénario
+CACHE_SIMULATIONS = CacheLRU(taille_max=512, ttl=3600)
+
+
+def tirer(generateur, distribution, nb_tirages):
+    """
+    Tire nb_tirages valeurs d'une distribution (loi, *paramètres)
+
+    Raises:
+        ValueError: si la loi est inconnue
+    """
+    loi, *parametres = distribution
+    if loi == 'triangulaire':
+        return generateur.triangular(*parametres, size=nb_tirages)
+    if loi == 'uniforme':
+        return generateur.uniform(*parametres, size=nb_tirages)
+    if loi == 'normale':
+        return np.maximum(generateur.normal(*parametres, size=nb_tirages), 0.0)
+    raise ValueError(f"Loi de distribution inconnue: {loi}")
+
+
+def simuler_totaux(couts_base, total_economies, distributions=None, nb_tirages=NB_TIRAGES, graine=GRAINE):
+    """
+    Tire les totaux des trois approches pour une liste de coûts de base
+
+    Même modèle que calculer_couts_referentiel, appliqué à des vecteurs
+    de tirages: la boucle ne porte que sur les référentiels.
+
+    Args:
+        couts_base: Coûts de base des référentiels obligatoires
+        total_economies: Total des économies sélectionnées
+        distributions: Distributions à substituer à DISTRIBUTIONS_DEFAUT
+        nb_tirages: Nombre de tirages
+        graine: Graine du générateur (résultats reproductibles)
+
+    Returns:
+        dict: {strategie: np.ndarray des totaux tirés}
+    """
+    distributions = {**DISTRIBUTIONS_DEFAUT, **(distributions or {})}
+    generateur = np.random.default_rng(graine)
+
+    facteur_minimal = tirer(generateur, distributions['facteur_minimal'], nb_tirages)
+    facteur_maximal = tirer(generateur, distributions['facteur_maximal'], nb_tirages)
+    plafond = tirer(generateur, distributions['plafond_economies'], nb_tirages)
+
+    totaux = {s: np.zeros(nb_tirages) for s in STRATEGIES}
+    for cout_base in couts_base:
+        base = cout_base * tirer(generateur, distributions['baseCost'], nb_tirages)
+        economies = np.minimum(total_economies * base / COUT_REFERENCE, base * plafond)
+        standard = base - economies
+        totaux['standard'] += standard
+        totaux['minimal'] += standard * facteur_minimal
+        totaux['maximal'] += base * facteur_maximal
+    return totaux
+
+
+def simuler_recommandations(recommandations, distributions=None, nb_tirages=NB_TIRAGES, graine=GRAINE):
+    """
+    Intervalles de coûts et risque de dépassement pour un scénario
+
+    Args:
+        recommandations: Résultat de generer_recommandations
+        distributions: Distributions à substituer à DISTRIBUTIONS_DEFAUT
+        nb_tirages: Nombre de tirages
+        graine: Graine du générateur
+
+    Returns:
+        dict: {strategie: {p10, p50, p90, moyenne, prob_depassement}}
+    """
+    budget_montant = recommandations['budget']['montant']
+    totaux = simuler_totaux(
+        [ref['baseCost'] for ref in recommandations['obligatoires']],
+        recommandations['economies_totales'], distributions, nb_tirages, graine
+    )
+    mutualisation = recommandations['mutualisation']
+
+    resultats = {}
+    for strategie, tirages in totaux.items():
+        if mutualisation[strategie]:
+            # Contrôles communs: même part déduite que du total de l'approche
+            brut = recommandations['totaux'][strategie] + mutualisation[strategie]
+            tirages = tirages * (1 - mutualisation[strategie] / brut)
+        p10, p50, p90 = np.percentile(tirages, QUANTILES)
+        resultats[strategie] = {
+            'p10': float(p10),
+            'p50': float(p50),
+            'p90': float(p90),
+            'moyenne': float(tirages.mean()),
+            'prob_depassement': float(np.count_nonzero(tirages > budget_montant)) / nb_tirages
+        }
+    return resultats
+
+
+def simuler_recommandations_en_cache(recommandations, distributions=None, nb_tirages=NB_TIRAGES, graine=GRAINE):
+    """
+    Version mémoïsée de simuler_recommandations
+
+    La clé ne retient que ce qui entre dans la simulation: coûts de base
+    des obligatoires, économies, mutualisation, budget, distributions,
+    tirages et graine.
+    """
+    cle = cle_canonique(
+        [ref['baseCost'] for ref in recommandations['obligatoires']],
+        recommandations['economies_totales'], recommandations['mutualisation'],
+        recommandations['budget']['montant'], distributions, nb_tirages, graine
+    )
+    return CACHE_SIMULATIONS.obtenir_ou_calculer(
+        cle, simuler_recommandations, recommandations, distributions, nb_tirages, graine
+    )
@@ -0,0 +1,49 @@
+"""
+Feuille de style premium servie comme fichier statique versionné
+"""
+
+import hashlib
+from pathlib import Path
+
+DOSSIER_STATIQUE = Path(__file__).resolve().parent.parent / "static"
+FEUILLE_SOURCE = DOSSIER_STATIQUE / "premium.css"
+
+
+def publier_feuille_de_style(source=FEUILLE_SOURCE):
+    """
+    Publie la feuille de style sous un nom contenant l'empreinte de son contenu
+
+    Le nom change à chaque modification du CSS: les navigateurs peuvent
+    garder le fichier en cache sans jamais servir une version périmée.
+
+    Args:
+        source: Chemin de la feuille de style source
+
+    Returns:
+        str: Nom du fichier publié (premium.<empreinte>.css)
+    """
+    source = Path(source)
+    contenu = source.read_bytes()
+    empreinte = hashlib.sha256(contenu).hexdigest()[:12]
+    nom = f"{source.stem}.{empreinte}{source.suffix}"
+    cible = source.with_name(nom)
+
+    if not cible.exists():
+        temporaire = cible.with_suffix('.tmp')
+        temporaire.write_bytes(contenu)
+        temporaire.replace(cible)
+        # Retirer les versions précédentes
+        for ancienne in source.parent.glob(f"{source.stem}.*{source.suffix}"):
+            if ancienne not in (source, cible):
+                ancienne.unlink(missing_ok=True)
+    return nom
+
+
+def balise_feuille_de_style(nom):
+    """Balise <link> vers un fichier de static/ servi par Streamlit"""
+    return f'<link rel="stylesheet" href="app/static/{nom}">'
+
+
+def balise_style_en_ligne(source=FEUILLE_SOURCE):
+    """Balise <style> avec le CSS complet (si le service statique est désactivé)"""
+    return f"<style>\n{Path(source).read_text(encoding='utf-8')}</style>"